@@ -1,11 +1,12 @@
 # backend/app/api/v1/books.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi import status
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.models.book import Book as BookModel
-from backend.app.schemas.book import Book as BookSchema, BookCreate
+from backend.app.schemas.book import Book as BookSchema, BookCreate, SimilarBooksResponse
 from backend.app.database.db import get_db
 from backend.app.services.books import get_book_details, create_book,  get_book_with_ratings
+from backend.app.services.similar_books import get_similar_books_json
 
 
 router = APIRouter()
@@ -17,6 +18,18 @@ async def read_book(isbn: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Book not found")
     return book
 
+@router.get("/books/{isbn}/similar", responses={200: {"model": SimilarBooksResponse}})
+async def read_similar_books(
+    isbn: str,
+    top_n: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    # The body is cached pre-serialized, so skip response_model validation
+    payload = await get_similar_books_json(db, isbn, top_n)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Book not in the recommendation model")
+    return Response(content=payload, media_type="application/json")
+
 @router.post("/books/", response_model=BookSchema, status_code=status.HTTP_201_CREATED)
 async def create_book_endpoint(book: BookCreate, db: AsyncSession = Depends(get_db)):
     db_book = await create_book(db, book)
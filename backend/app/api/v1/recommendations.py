@@ -1,14 +1,46 @@
-from fastapi import APIRouter, HTTPException
-from model.P_R_M.hybrid_model import recommend_books
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database.db import get_db
+from backend.app.schemas.recommendation import BatchRecommendationRequest, BatchRecommendationResponse
+from backend.app.services.recommendation_executor import recommendation_executor
+from backend.app.services.recommendations import (
+    get_two_stage_recommendations,
+    get_user_recommendations,
+    recommend_books_for_users
+)
+from model.P_R_M.registry import ModelNotReady
 
 router = APIRouter()
 
+# Declared before /recommend/{user_id} so "metrics" is not parsed as a user id
+@router.get("/recommend/metrics")
+async def get_recommendation_metrics():
+    return recommendation_executor.metrics()
+
 @router.get("/recommend/{user_id}")
-async def get_recommendations(user_id: int):
+async def get_recommendations(
+    user_id: int,
+    diversity: float = Query(0.0, ge=0.0, le=1.0, description="MMR diversity; 0 keeps pure score order"),
+    db: AsyncSession = Depends(get_db)
+):
     try:
         print(f"🐛 DEBUG: Recommending for user {user_id}")
-        recs = recommend_books(user_id)
-        return {"user_id": user_id, "recommendations": recs}
+        model_version, recs = await get_user_recommendations(db, user_id, diversity=diversity)
+        return {"user_id": user_id, "recommendations": recs, "model_version": model_version}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except (HTTPException, ModelNotReady):
+        raise
     except Exception as e:
         print(f"❌ Recommendation Error: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+@router.get("/recommend/{user_id}/two-stage")
+async def get_two_stage(user_id: int, top_n: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    model_version, recs, report = await get_two_stage_recommendations(db, user_id, top_n=top_n)
+    return {"user_id": user_id, "recommendations": recs, "model_version": model_version, "timings": report}
+
+@router.post("/recommend/batch", response_model=BatchRecommendationResponse)
+async def get_batch_recommendations(request: BatchRecommendationRequest, db: AsyncSession = Depends(get_db)):
+    model_version, recs, unknown = await recommend_books_for_users(db, request.user_ids, top_n=request.top_n)
+    return {"recommendations": recs, "unknown": unknown, "model_version": model_version}
@@ -1,4 +1,6 @@
 # backend/app/database/cache.py
+import uuid
+from contextlib import asynccontextmanager
 import redis.asyncio as redis  # Changed to async Redis
 from backend.utils.config import settings
 
@@ -9,5 +11,29 @@ redis_client = redis.Redis(
     decode_responses=True
 )
 
+# Deletes the lock only if it still holds our token (it may have expired and been retaken)
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 async def get_cache():
-    return redis_client
\ No newline at end of file
+    return redis_client
+
+@asynccontextmanager
+async def redis_lock(name: str, ttl: int):
+    """
+    Cross-process lock (SET NX with an expiry), for jobs that every uvicorn
+    worker schedules but only one may run. Yields whether it was acquired;
+    never blocks.
+    """
+    key = f"lock:{name}"
+    token = uuid.uuid4().hex
+    acquired = await redis_client.set(key, token, nx=True, ex=ttl)
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            await redis_client.eval(_RELEASE_LOCK, 1, key, token)
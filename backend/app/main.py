@@ -1,6 +1,7 @@
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,10 +10,17 @@ from backend.app.models.user import Session
 # Import routers from api/v1
 from backend.app.api.v1 import books, users, ratings, bookmarks, reviews, search, auth, recommendations
 from backend.utils import refresh_popular_books
+# Imported from their modules: they use the Redis client, whose module imports
+# backend.utils.config, so the package __init__ must not pull them in
+from backend.utils.incremental_update import compact_model, update_model_incrementally
+from backend.utils.materialize_recommendations import materialize_recommendations
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import asyncpg
 from backend.utils.config import settings
 from backend.app.database.db import init_models, async_session, engine
+from backend.app.services.recommendation_executor import recommendation_executor
+from backend.app.services.recommendations import candidate_pipeline
+from model.P_R_M.registry import ModelNotReady, registry
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from sqlalchemy import text
@@ -21,13 +29,6 @@ logger = logging.getLogger(__name__)
 
 print("🐛 DEBUG: Starting app.py")
 
-try:
-    from model.P_R_M.hybrid_model import recommend_books
-    print("🐛 DEBUG: Imports successful")
-except ImportError as e:
-    print(f"❌ Import Error: {e}")
-    raise
-
 async def cleanup_expired_sessions():
     async with async_session() as db:  # Use async_session directly
         try:
@@ -46,6 +47,14 @@ async def cleanup_expired_sessions():
 async def lifespan(app: FastAPI):
     #print("🐛 DEBUG: Starting up application")
     
+    # Model artifacts load (and warm up) on a background thread while the rest
+    # of startup runs; /health/ready reports when they are in place
+    registry.initialize_in_background(
+        warmup_queries=settings.MODEL_WARMUP_QUERIES,
+        max_attempts=settings.MODEL_LOAD_ATTEMPTS,
+        backoff=settings.MODEL_LOAD_BACKOFF_SECONDS
+    )
+    
     # Single database setup block using SQLAlchemy
     async with engine.begin() as conn:
         # Create extension and tables in one transaction
@@ -84,6 +93,38 @@ async def lifespan(app: FastAPI):
         hours=1
     )
     
+    # Precomputed recommendations: full build on first run, then only changed users
+    scheduler.add_job(
+        materialize_recommendations,
+        trigger="interval",
+        minutes=settings.RECOMMENDATION_REFRESH_MINUTES,
+        next_run_time=datetime.now(timezone.utc),
+        max_instances=1
+    )
+    
+    # Fold new ratings into live user vectors, keeping the model version
+    scheduler.add_job(
+        update_model_incrementally,
+        trigger="interval",
+        minutes=settings.MODEL_UPDATE_MINUTES,
+        max_instances=1
+    )
+    
+    # Less often, compact the accumulated ratings into a new model version
+    scheduler.add_job(
+        compact_model,
+        trigger="interval",
+        minutes=settings.MODEL_COMPACT_MINUTES,
+        max_instances=1
+    )
+    
+    # Pick up a new model version when the CURRENT pointer changes
+    scheduler.add_job(
+        registry.refresh_from_pointer,
+        trigger="interval",
+        minutes=1
+    )
+    
     # Session cleanup
     scheduler.add_job(
         cleanup_expired_sessions,
@@ -102,6 +143,8 @@ async def lifespan(app: FastAPI):
         print("🐛 DEBUG: Shutting down application")
         scheduler.shutdown()
         print("🐛 DEBUG: Scheduler stopped")
+        recommendation_executor.shutdown()
+        candidate_pipeline.shutdown()
 
 # Create FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
@@ -133,10 +176,29 @@ app.include_router(reviews.router, prefix="/api/v1")
 app.include_router(search.router, prefix="/api/v1")
 app.include_router(auth.router, prefix="/api/v1")
 
+@app.exception_handler(ModelNotReady)
+async def model_not_ready_handler(request: Request, exc: ModelNotReady):
+    return JSONResponse(status_code=503, content={"detail": "Model is loading"}, headers={"Retry-After": "5"})
+
 @app.get("/")
 async def root():
     return {"message": "Congrats, It Works!"}
 
+@app.get("/health/live")
+async def health_live():
+    # A model that can never load fails liveness too, so the orchestrator
+    # restarts the process instead of leaving it unready forever
+    if failure := registry.failure():
+        return JSONResponse(status_code=503, content={"status": "failed", "detail": failure})
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def health_ready():
+    # Load balancers route traffic here only once the model is loaded and warm
+    if not registry.is_ready():
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    return {"status": "ready", "model_version": registry.current().version_id}
+
 if __name__ == "__main__":
     print("🐛 DEBUG: Starting Uvicorn")
     import uvicorn
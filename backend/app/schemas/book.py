@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class BookBase(BaseModel):
     isbn: str = Field(..., min_length=10, max_length=20, example="9780061120084")
@@ -16,4 +16,16 @@ class Book(BookBase):
     rating_count: Optional[int] = Field(None, ge=0)
     
     class Config:
-        from_attributes = True  # Allows ORM mode (formerly ORM_mode)
\ No newline at end of file
+        from_attributes = True  # Allows ORM mode (formerly ORM_mode)
+
+class SimilarBook(BaseModel):
+    isbn: str
+    title: str
+    author: str
+    cover_url: Optional[str] = None
+    similarity: float
+
+class SimilarBooksResponse(BaseModel):
+    isbn: str
+    similar: List[SimilarBook]
+    model_version: str
@@ -0,0 +1,13 @@
+# backend/app/schemas/recommendation.py
+from typing import Dict, List
+from pydantic import BaseModel, Field
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=10000)
+    top_n: int = Field(10, ge=1, le=100)
+
+class BatchRecommendationResponse(BaseModel):
+    recommendations: Dict[int, List[str]]
+    # Requested users with no factor row and no ratings of books the model knows
+    unknown: List[int] = []
+    model_version: str
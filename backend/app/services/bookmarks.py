@@ -6,6 +6,9 @@ from backend.app.models.bookmark import Bookmark
 from backend.app.models.book import Book
 from backend.app.schemas.bookmarks import BookmarkCreate
 from backend.app.database.cache import redis_client
+from backend.app.services.seen_items import invalidate_seen, mark_seen
+from backend.app.services.recommendations import invalidate_user_recommendations
+from model.P_R_M.registry import registry
 
 async def bookmark_book(db: AsyncSession, user_id: int, bookmark_data: BookmarkCreate):
     # Check if book exists
@@ -37,8 +40,14 @@ async def bookmark_book(db: AsyncSession, user_id: int, bookmark_data: BookmarkC
     await db.commit()
     await db.refresh(db_bookmark)
     
-    # Clear relevant caches
+    # Clear relevant caches; the bookmark is already committed, so a cache
+    # failure (or a model still loading) must not fail the request
     redis_client.delete(f"user:{user_id}:bookmarks")
+    if registry.is_ready():
+        try:
+            await mark_seen(user_id, bookmark_data.book_isbn)
+        except Exception as e:
+            print(f"Cache error: {e}")
     return db_bookmark
 
 async def unbookmark_book(db: AsyncSession, user_id: int, book_isbn: str):
@@ -62,6 +71,13 @@ async def unbookmark_book(db: AsyncSession, user_id: int, book_isbn: str):
     # Clear relevant caches
     redis_client.delete(f"user:{user_id}:bookmarks")
     redis_client.delete(f"book:{book_isbn}")
+    if registry.is_ready():
+        try:
+            await invalidate_seen(user_id)
+            # Stored lists were built while the book was excluded
+            await invalidate_user_recommendations(user_id)
+        except Exception as e:
+            print(f"Cache error: {e}")
     return True
 
 async def get_user_bookmarks(
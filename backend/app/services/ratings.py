@@ -6,6 +6,9 @@ from backend.app.models.rating import Rating
 from backend.app.schemas.rating import RatingCreate
 from fastapi import HTTPException, status
 from backend.app.database.cache import redis_client
+from backend.app.services.seen_items import invalidate_seen, mark_seen
+from backend.app.services.recommendations import invalidate_user_recommendations
+from model.P_R_M.registry import registry
 
 
 async def rate_book(db: AsyncSession, user_id: int, rating_data: RatingCreate):
@@ -34,8 +37,15 @@ async def rate_book(db: AsyncSession, user_id: int, rating_data: RatingCreate):
     await db.commit()
     await db.refresh(db_rating if not existing else existing)
 
-    # Clear relevant caches
+    # Clear relevant caches; the rating is already committed, so a cache
+    # failure (or a model still loading) must not fail the request
     redis_client.delete(f"book:{rating_data.book_isbn}")
+    if registry.is_ready():
+        try:
+            await mark_seen(user_id, rating_data.book_isbn)
+            await invalidate_user_recommendations(user_id)
+        except Exception as e:
+            print(f"Cache error: {e}")
     return db_rating if not existing else existing
 
 async def delete_rating(db: AsyncSession, user_id: int, book_isbn: str):
@@ -58,6 +68,12 @@ async def delete_rating(db: AsyncSession, user_id: int, book_isbn: str):
 
     # Clear relevant caches
     redis_client.delete(f"book:{book_isbn}")
+    if registry.is_ready():
+        try:
+            await invalidate_seen(user_id)
+            await invalidate_user_recommendations(user_id)
+        except Exception as e:
+            print(f"Cache error: {e}")
     
     return True
 
@@ -0,0 +1,88 @@
+# backend/app/services/recommendation_executor.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from backend.utils.config import settings
+
+class RecommendationExecutor:
+    """
+    Bounded thread pool for CPU-heavy recommendation work.
+
+    Scoring is NumPy matrix work that releases the GIL, and the model arrays are
+    shared memory maps, so threads give real parallelism without copying the
+    factors into worker processes. The event loop only awaits the futures.
+    Requests beyond max_workers + max_queue are rejected with 503 instead of
+    piling up behind each other.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recommend")
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._run_time_total = 0.0
+
+    async def run(self, func, *args):
+        """Run func(*args) on the pool; raises 503 when the queue is full."""
+        # Only touched from the event loop thread, so no lock is needed
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Recommendation service is busy, try again shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        submitted_at = time.perf_counter()
+
+        def timed():
+            started_at = time.perf_counter()
+            return func(*args), started_at, time.perf_counter()
+
+        self._pending += 1
+        self._submitted += 1
+        try:
+            result, started_at, finished_at = await asyncio.get_running_loop().run_in_executor(self._pool, timed)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        queue_wait = started_at - submitted_at
+        self._completed += 1
+        self._queue_wait_total += queue_wait
+        self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+        self._run_time_total += finished_at - started_at
+        return result
+
+    def metrics(self):
+        completed = max(self._completed, 1)
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self.max_workers),
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_queue_wait_ms": round(self._queue_wait_total / completed * 1000, 3),
+            "max_queue_wait_ms": round(self._queue_wait_max * 1000, 3),
+            "avg_run_time_ms": round(self._run_time_total / completed * 1000, 3),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+recommendation_executor = RecommendationExecutor(
+    max_workers=settings.RECOMMENDATION_WORKERS,
+    max_queue=settings.RECOMMENDATION_MAX_QUEUE
+)
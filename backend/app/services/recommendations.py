@@ -1,16 +1,195 @@
 # L2/services/recommendation_service.py
+import json
+import time
 import numpy as np
-from model.P_R_M.hybrid_model import (
-    hybrid_score,
-    index_to_isbn,
-    user_factors,
-    item_factors,
-    top_k_similarities
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database.cache import redis_client
+from backend.app.models.rating import Rating
+from backend.app.services.recommendation_executor import recommendation_executor
+from backend.app.services.seen_items import get_seen_items
+from backend.app.services.user_vectors import (
+    get_overlay_vector,
+    get_user_vector,
+    invalidate_user_vector,
+    load_ratings_by_user
 )
+from backend.utils.config import settings
+from model.P_R_M.candidates import CandidatePipeline
+from model.P_R_M.registry import registry
 
-def recommend_books(user_id, top_n=10):
-    """Wrapper function for recommendations"""
-    scores = [hybrid_score(user_id, book_id) 
-              for book_id in range(item_factors.shape[0])]
-    top_books_indices = np.argsort(scores)[-top_n:][::-1]
-    return [index_to_isbn[idx] for idx in top_books_indices]
\ No newline at end of file
+# Keys include the model version, so a hot swap naturally invalidates the store
+RECOMMENDATION_KEY = "recs:{version}:{user_id}"
+RECOMMENDATION_WATERMARK_KEY = "recs:{version}:watermark"
+
+# CF top-k, content neighbours of recent ratings and popular books, run concurrently
+candidate_pipeline = CandidatePipeline()
+
+def model_user_ids(user_ids):
+    """
+    Keys of backend users in model.users. Database ids are offset past the
+    Book-Crossing User-IDs the factors were trained on, so a new account never
+    lands on another reader's factor row.
+    """
+    return np.asarray(user_ids, dtype=np.int64) + settings.MODEL_USER_ID_OFFSET
+
+def backend_user_ids(model_ids):
+    """Database ids of the backend users among model.users keys (Book-Crossing users are dropped)"""
+    model_ids = np.asarray(model_ids, dtype=np.int64)
+    return model_ids[model_ids >= settings.MODEL_USER_ID_OFFSET] - settings.MODEL_USER_ID_OFFSET
+
+async def get_scoring_vector(db: AsyncSession, model, user_id: int):
+    """
+    Latent vector the user is scored with: their live overlay vector (see
+    backend/utils/incremental_update.py) or user_factors row, or for users
+    without a row one folded in from their live ratings.
+    Returns None when the model knows none of the user's books.
+    """
+    user_row = model.users.encode_one(int(model_user_ids([user_id])[0]))
+    if user_row is None:
+        return await get_user_vector(db, model, user_id)
+    overlay = await get_overlay_vector(model, user_id)
+    return overlay if overlay is not None else model.user_factors[user_row]
+
+def _recommend_batch(model, user_ids, top_n=10):
+    """(recommendations of the users with a factor row, ids of the users without one)"""
+    model_ids = model_user_ids(user_ids)
+    has_row = model.users.encode(model_ids) >= 0
+    known = np.asarray(user_ids)[has_row].tolist()
+    recs = model.recommend_batch(model_ids[has_row], top_n=top_n) if known else {}
+    return (
+        {user_id: recs[model_id] for user_id, model_id in zip(known, model_ids[has_row].tolist())},
+        np.asarray(user_ids)[~has_row].tolist()
+    )
+
+def _recommend_folded(model, ratings_by_user, top_n=10):
+    """Recommendations of users folded in from their ratings; users the model knows none of the books of are left out"""
+    recs = {}
+    for user_id, (isbns, ratings) in ratings_by_user.items():
+        vector = model.fold_in(isbns, np.asarray(ratings, dtype=np.float32) * settings.FOLD_IN_RATING_SCALE)
+        if vector is not None:
+            recs[user_id] = model.recommend_vector(vector, top_n)
+    return recs
+
+async def recommend_books_for_users(db: AsyncSession, user_ids, top_n=10):
+    """
+    Batch wrapper: one GEMM per memory-bounded chunk of the users with a
+    factor row, off the event loop. Users without one (backend users until
+    the next compaction) are folded in from their live ratings, loaded in one
+    query. Returns (model_version, recommendations, unknown) where unknown
+    lists the users with nothing to score on.
+    """
+    model = registry.current()
+    recs, missing = await recommendation_executor.run(_recommend_batch, model, user_ids, top_n)
+    if missing:
+        ratings_by_user = await load_ratings_by_user(db, missing)
+        recs.update(await recommendation_executor.run(_recommend_folded, model, ratings_by_user, top_n))
+    return model.version_id, recs, [user_id for user_id in missing if user_id not in recs]
+
+async def store_recommendations(version_id: str, recommendations: dict):
+    """Write precomputed top-n lists to Redis in one pipelined round-trip"""
+    pipe = redis_client.pipeline(transaction=False)
+    for user_id, isbns in recommendations.items():
+        pipe.setex(
+            RECOMMENDATION_KEY.format(version=version_id, user_id=user_id),
+            settings.RECOMMENDATION_STORE_TTL,
+            json.dumps(isbns)
+        )
+    await pipe.execute()
+
+async def invalidate_user_recommendations(user_id: int):
+    """Drop stored recommendations and the folded-in vector after the user's ratings change"""
+    model = registry.current()
+    await redis_client.delete(RECOMMENDATION_KEY.format(version=model.version_id, user_id=user_id))
+    await invalidate_user_vector(user_id)
+
+async def get_popular_books(db: AsyncSession, top_n: int = 10, exclude_isbns=()):
+    """Most-rated books, for users with nothing to personalize on"""
+    result = await db.execute(
+        text("""
+            SELECT isbn
+            FROM book_schema.popular_books
+            ORDER BY rating_count DESC
+            LIMIT :limit
+        """),
+        {"limit": top_n + len(exclude_isbns)}
+    )
+    exclude_isbns = set(exclude_isbns)
+    return [row[0] for row in result if row[0] not in exclude_isbns][:top_n]
+
+async def get_user_recommendations(db: AsyncSession, user_id: int, top_n: int = 10, diversity: float = 0.0):
+    """
+    Serve from the precomputed store, scoring live only on a miss.
+    Books the user already rated or bookmarked are filtered out.
+    Users are scored with the vector from get_scoring_vector, so ratings since
+    the last compaction count; users the model knows none of the books of get
+    popular books.
+    With diversity > 0 the list is MMR re-ranked live instead (see
+    ModelVersion.diversify); the store only holds plain score order.
+    Returns (model_version, isbns); the whole request uses one model version.
+    """
+    model = registry.current()
+    seen = await get_seen_items(db, model, user_id)
+    if diversity > 0:
+        return model.version_id, await _diversified_recommendations(db, model, user_id, top_n, seen, diversity)
+    try:
+        if cached := await redis_client.get(RECOMMENDATION_KEY.format(version=model.version_id, user_id=user_id)):
+            isbns = json.loads(cached)
+            if len(seen):
+                unseen = ~np.isin(model.items.encode(isbns), seen)
+                isbns = [isbn for isbn, keep in zip(isbns, unseen) if keep]
+            if len(isbns) >= top_n:
+                return model.version_id, isbns[:top_n]
+    except Exception as e:
+        print(f"Cache error: {e}")
+
+    store_top_n = max(top_n, settings.RECOMMENDATION_STORE_TOP_N)
+    user_vector = await get_scoring_vector(db, model, user_id)
+    if user_vector is None:
+        # Not cached, so the first rating switches the user to personalized results
+        return model.version_id, await get_popular_books(db, top_n, model.to_isbns(seen))
+    isbns = await recommendation_executor.run(model.recommend_vector, user_vector, store_top_n, seen)
+    try:
+        await store_recommendations(model.version_id, {user_id: isbns})
+    except Exception as e:
+        print(f"Cache error: {e}")
+    return model.version_id, isbns[:top_n]
+
+async def _diversified_recommendations(db: AsyncSession, model, user_id: int, top_n: int, seen, diversity: float):
+    """Live MMR-re-ranked list; not stored, since it depends on the requested diversity"""
+    user_vector = await get_scoring_vector(db, model, user_id)
+    if user_vector is None:
+        return await get_popular_books(db, top_n, model.to_isbns(seen))
+    return await recommendation_executor.run(model.recommend_vector, user_vector, top_n, seen, diversity)
+
+async def _recent_rated_isbns(db: AsyncSession, user_id: int, limit: int):
+    """The user's most recently rated or re-rated ISBNs"""
+    result = await db.execute(
+        select(Rating.book_isbn)
+        .where(Rating.user_id == user_id)
+        .order_by(func.coalesce(Rating.updated_at, Rating.created_at).desc())
+        .limit(limit)
+    )
+    return [row[0] for row in result]
+
+async def get_two_stage_recommendations(db: AsyncSession, user_id: int, top_n: int = 10):
+    """
+    Candidate generation + ranking (see model/P_R_M/candidates.py): only the
+    union of the CF top-k, the content neighbours of the user's recent ratings
+    and the popular books is scored. Works for users without a factor row too.
+    Returns (model_version, isbns, report) with per-stage milliseconds.
+    """
+    start = time.perf_counter()
+    model = registry.current()
+    seen = await get_seen_items(db, model, user_id)
+    context = {
+        "user_vector": await get_scoring_vector(db, model, user_id),
+        "recent_isbns": await _recent_rated_isbns(db, user_id, settings.CANDIDATE_RECENT_RATINGS),
+        "popular_isbns": await get_popular_books(db, settings.CANDIDATE_POPULAR_K),
+        "exclude": seen,
+    }
+    fetch_ms = (time.perf_counter() - start) * 1000
+
+    rows, report = await recommendation_executor.run(candidate_pipeline.recommend, model, context, top_n)
+    report["ms"]["fetch"] = fetch_ms
+    return model.version_id, model.to_isbns(rows), report
@@ -0,0 +1,67 @@
+# backend/app/services/seen_items.py
+import numpy as np
+from sqlalchemy import select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database.cache import redis_client
+from backend.app.models.bookmark import Bookmark
+from backend.app.models.rating import Rating
+from backend.utils.config import settings
+from model.P_R_M.registry import registry
+
+# Item rows are only meaningful for one model version, so the key includes it.
+# Members are item_factors rows; Redis stores small all-integer sets as a sorted
+# int array (intset), so a profile costs a few bytes per book.
+SEEN_ITEMS_KEY = "seen:{version}:{user_id}"
+# Marks a set that has been fully loaded from the database
+LOADED_MARKER = -1
+
+async def _load_seen_isbns(db: AsyncSession, user_id: int):
+    """ISBNs the user rated or bookmarked"""
+    result = await db.execute(union(
+        select(Rating.book_isbn).where(Rating.user_id == user_id),
+        select(Bookmark.book_isbn).where(Bookmark.user_id == user_id)
+    ))
+    return [row[0] for row in result]
+
+async def get_seen_items(db: AsyncSession, model, user_id: int):
+    """
+    Sorted int32 array of item rows the user has already rated or bookmarked.
+    Served from Redis; the first call per user and model version fills the set
+    from user_schema.ratings and user_schema.bookmarks.
+    """
+    key = SEEN_ITEMS_KEY.format(version=model.version_id, user_id=user_id)
+    try:
+        members = await redis_client.smembers(key)
+    except Exception as e:
+        print(f"Cache error: {e}")
+        members = None
+
+    if members and str(LOADED_MARKER) in members:
+        rows = np.fromiter((int(m) for m in members), dtype=np.int32, count=len(members))
+        rows.sort()
+        return rows[rows >= 0]
+
+    rows = model.items.encode(await _load_seen_isbns(db, user_id))
+    rows = np.unique(rows[rows >= 0]).astype(np.int32)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.sadd(key, LOADED_MARKER, *rows.tolist())
+        pipe.expire(key, settings.SEEN_ITEMS_TTL)
+        await pipe.execute()
+    except Exception as e:
+        print(f"Cache error: {e}")
+    return rows
+
+async def mark_seen(user_id: int, book_isbn: str):
+    """Add one book to the user's seen set after a rating or bookmark"""
+    model = registry.current()
+    row = model.items.encode_one(book_isbn)
+    if row is None:
+        return
+    # A set without the loaded marker is completed from the database on next read
+    await redis_client.sadd(SEEN_ITEMS_KEY.format(version=model.version_id, user_id=user_id), row)
+
+async def invalidate_seen(user_id: int):
+    """Drop the seen set after a rating or bookmark is removed"""
+    model = registry.current()
+    await redis_client.delete(SEEN_ITEMS_KEY.format(version=model.version_id, user_id=user_id))
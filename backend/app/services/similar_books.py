@@ -0,0 +1,72 @@
+# backend/app/services/similar_books.py
+import json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database.cache import redis_client
+from backend.app.models.book import Book as BookModel
+from backend.app.schemas.book import SimilarBook, SimilarBooksResponse
+from backend.app.services.recommendation_executor import recommendation_executor
+from backend.utils.config import settings
+from model.P_R_M.registry import registry
+
+# Neighbours only depend on the content artifacts, so the key survives
+# incremental versions (which only change the factors)
+SIMILAR_BOOKS_KEY = "similar:{content_version}:{isbn}:{top_n}"
+
+def _with_model_version(body: str, version_id: str):
+    """Append model_version to a cached body (a JSON object) without re-parsing it"""
+    return f'{body[:-1]},"model_version":{json.dumps(version_id)}}}'
+
+def _neighbours(model, isbn, top_n):
+    """(ISBNs, similarities) of the book's top_n content neighbours, or None if it has no content row"""
+    row = model.content_items.encode_one(isbn)
+    if row is None:
+        return None
+    indices, weights = model.graph.neighbours(row)
+    return model.content_items.decode(indices[:top_n]).tolist(), weights[:top_n].astype(float).tolist()
+
+async def get_similar_books_json(db: AsyncSession, isbn: str, top_n: int = 10):
+    """
+    Serialized SimilarBooksResponse for a book, or None if the book is not in
+    the content model. The JSON is cached as-is, so a hit is one Redis read
+    with no parsing or re-serialization. The cached body leaves out
+    model_version: it is shared by every version with the same content
+    artifacts, so the live version is appended per response.
+    """
+    model = registry.current()
+    key = SIMILAR_BOOKS_KEY.format(content_version=model.content_version, isbn=isbn, top_n=top_n)
+    try:
+        if cached := await redis_client.get(key):
+            return _with_model_version(cached, model.version_id)
+    except Exception as e:
+        print(f"Cache error: {e}")
+
+    neighbours = await recommendation_executor.run(_neighbours, model, isbn, top_n)
+    if neighbours is None:
+        return None
+    neighbour_isbns, similarities = neighbours
+
+    # One query for all neighbours; books missing from the catalog table are skipped
+    result = await db.execute(select(BookModel).where(BookModel.isbn.in_(neighbour_isbns)))
+    books = {book.isbn: book for book in result.scalars()}
+    payload = SimilarBooksResponse(
+        isbn=isbn,
+        similar=[
+            SimilarBook(
+                isbn=neighbour,
+                title=books[neighbour].title,
+                author=books[neighbour].author,
+                cover_url=books[neighbour].cover_url,
+                similarity=similarity
+            )
+            for neighbour, similarity in zip(neighbour_isbns, similarities)
+            if neighbour in books
+        ],
+        model_version=model.version_id
+    ).model_dump_json(exclude={"model_version"})
+
+    try:
+        await redis_client.setex(key, settings.SIMILAR_BOOKS_TTL, payload)
+    except Exception as e:
+        print(f"Cache error: {e}")
+    return _with_model_version(payload, model.version_id)
@@ -0,0 +1,93 @@
+# backend/app/services/user_vectors.py
+import json
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database.cache import redis_client
+from backend.app.models.rating import Rating
+from backend.utils.config import settings
+from model.P_R_M.registry import registry
+
+# A folded-in vector is only valid against the item factors it was projected
+# onto, so the key includes the model version
+USER_VECTOR_KEY = "user_vector:{version}:{user_id}"
+# Live vectors of users with a factor row, updated between compactions
+# (see backend/utils/incremental_update.py); one hash per model version
+USER_OVERLAY_KEY = "user_overlay:{version}"
+
+async def _load_ratings(db: AsyncSession, user_id: int):
+    """(isbns, ratings) from user_schema.ratings"""
+    result = await db.execute(
+        select(Rating.book_isbn, Rating.rating).where(Rating.user_id == user_id)
+    )
+    rows = result.all()
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+async def load_ratings_by_user(db: AsyncSession, user_ids):
+    """Dict of user id -> (isbns, ratings) in one query, for the users that rated anything"""
+    result = await db.execute(
+        select(Rating.user_id, Rating.book_isbn, Rating.rating).where(Rating.user_id.in_(list(user_ids)))
+    )
+    by_user = {}
+    for user_id, isbn, rating in result:
+        isbns, ratings = by_user.setdefault(user_id, ([], []))
+        isbns.append(isbn)
+        ratings.append(rating)
+    return by_user
+
+async def get_user_vector(db: AsyncSession, model, user_id: int):
+    """
+    Latent vector for a user without a row in user_factors, folded in from
+    their live ratings against the model's fixed item factors.
+    Returns None when none of the user's rated books are in the model.
+    """
+    key = USER_VECTOR_KEY.format(version=model.version_id, user_id=user_id)
+    try:
+        if cached := await redis_client.get(key):
+            return np.asarray(json.loads(cached), dtype=np.float32)
+    except Exception as e:
+        print(f"Cache error: {e}")
+
+    isbns, ratings = await _load_ratings(db, user_id)
+    if not isbns:
+        return None
+    # Backend ratings are 1-5; the factors were trained on the 0-10 Book-Crossing scale
+    vector = model.fold_in(isbns, np.asarray(ratings, dtype=np.float32) * settings.FOLD_IN_RATING_SCALE)
+    if vector is None:
+        return None
+    try:
+        await redis_client.setex(key, settings.USER_VECTOR_TTL, json.dumps(vector.tolist()))
+    except Exception as e:
+        print(f"Cache error: {e}")
+    return vector
+
+async def invalidate_user_vector(user_id: int):
+    """Drop the cached vector after the user's ratings change"""
+    model = registry.current()
+    await redis_client.delete(USER_VECTOR_KEY.format(version=model.version_id, user_id=user_id))
+
+async def get_overlay_vectors(model, user_ids):
+    """Dict of user id -> live vector for the users that have one"""
+    if len(user_ids) == 0:
+        return {}
+    try:
+        values = await redis_client.hmget(USER_OVERLAY_KEY.format(version=model.version_id), list(user_ids))
+    except Exception as e:
+        print(f"Cache error: {e}")
+        return {}
+    return {
+        user_id: np.asarray(json.loads(value), dtype=np.float32)
+        for user_id, value in zip(user_ids, values) if value is not None
+    }
+
+async def get_overlay_vector(model, user_id: int):
+    """The user's live vector, or None to use their user_factors row"""
+    return (await get_overlay_vectors(model, [user_id])).get(user_id)
+
+async def store_overlay_vectors(version_id: str, vectors: dict):
+    """Write live vectors; they expire once a couple of compactions have replaced them"""
+    key = USER_OVERLAY_KEY.format(version=version_id)
+    pipe = redis_client.pipeline()
+    pipe.hset(key, mapping={user_id: json.dumps(vector.tolist()) for user_id, vector in vectors.items()})
+    pipe.expire(key, 2 * settings.MODEL_COMPACT_MINUTES * 60)
+    await pipe.execute()
@@ -0,0 +1,83 @@
+import os
+import sys
+
+# backend/tests is a package, so pytest puts backend/ first on sys.path, where
+# backend/utils shadows the top-level utils package that the model imports.
+# Bind utils to the top-level package before anything imports the model; the
+# backend itself only ever imports backend.utils.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import utils.config  # noqa: E402,F401
+
+# Settings() requires these; the services under test never send mail or call Google Books
+for _name in ("SMTP_USERNAME", "SMTP_PASSWORD", "EMAIL_SENDER", "GOOGLE_BOOKS_API_KEY"):
+    os.environ.setdefault(_name, "test")
+
+import pytest
+
+from model.P_R_M.registry import load_version
+from model.tests.conftest import artifact_dir  # noqa: F401  (shared artifact fixture)
+
+
+class FakeRedis:
+    """The few redis.asyncio calls the services make, over a dict."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.hashes.pop(key, None)
+
+    async def hmget(self, key, fields):
+        stored = self.hashes.get(key, {})
+        return [stored.get(str(field)) for field in fields]
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update({str(field): value for field, value in mapping.items()})
+
+    async def expire(self, key, ttl):
+        pass
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    from backend.app.services import recommendations, user_vectors
+
+    redis = FakeRedis()
+    for module in (recommendations, user_vectors):
+        monkeypatch.setattr(module, "redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def model(artifact_dir, monkeypatch):
+    """The artifact_dir set loaded and served as the live version."""
+    from model.P_R_M.registry import registry
+
+    version = load_version(artifact_dir)
+    monkeypatch.setattr(registry, "_current", version)
+    monkeypatch.setattr(registry, "is_ready", lambda: True)
+    return version
@@ -0,0 +1,39 @@
+import asyncio
+
+import numpy as np
+
+from backend.app.services import recommendations
+from backend.utils.config import settings
+
+
+async def _ratings(db, user_ids):
+    # Backend user 40 rated two books the model knows, user 41 only an unknown one
+    ratings = {40: (["isbn001", "isbn002"], [5, 4]), 41: (["not-in-model"], [3])}
+    return {user_id: ratings[user_id] for user_id in user_ids if user_id in ratings}
+
+
+def test_batch_folds_in_users_without_a_factor_row(model, monkeypatch):
+    monkeypatch.setattr(recommendations, "load_ratings_by_user", _ratings)
+    monkeypatch.setattr(settings, "MODEL_USER_ID_OFFSET", 100)
+
+    # Users 0 and 5 have factor rows (model keys 100 and 105), 40-42 do not
+    version_id, recs, unknown = asyncio.run(
+        recommendations.recommend_books_for_users(None, [0, 40, 5, 41, 42], 3)
+    )
+
+    assert version_id == model.version_id
+    assert set(recs) == {0, 5, 40}
+    assert recs[0] == model.recommend(100, top_n=3)
+    vector = model.fold_in(["isbn001", "isbn002"], np.array([5, 4]) * settings.FOLD_IN_RATING_SCALE)
+    assert recs[40] == model.recommend_vector(vector, 3)
+    assert unknown == [41, 42]
+
+
+def test_batch_of_only_unknown_users(model, monkeypatch):
+    monkeypatch.setattr(recommendations, "load_ratings_by_user", _ratings)
+
+    monkeypatch.setattr(settings, "MODEL_USER_ID_OFFSET", 100)
+
+    _, recs, unknown = asyncio.run(recommendations.recommend_books_for_users(None, [41, 42], 3))
+
+    assert recs == {} and unknown == [41, 42]
@@ -0,0 +1,42 @@
+import asyncio
+
+from backend.app.services import bookmarks
+from backend.app.services.recommendations import RECOMMENDATION_KEY
+
+
+class FakeSession:
+    """Returns the one bookmark for any query and records deletes."""
+
+    def __init__(self, bookmark):
+        self.bookmark = bookmark
+        self.deleted = []
+
+    async def execute(self, query):
+        bookmark = self.bookmark
+
+        class Result:
+            def scalar_one_or_none(self):
+                return bookmark
+        return Result()
+
+    async def delete(self, obj):
+        self.deleted.append(obj)
+
+    async def commit(self):
+        pass
+
+
+def test_unbookmark_drops_the_stored_recommendations(model, fake_redis, monkeypatch):
+    monkeypatch.setattr(bookmarks, "redis_client", fake_redis)
+    invalidated = []
+
+    async def invalidate_seen(user_id):
+        invalidated.append(user_id)
+    monkeypatch.setattr(bookmarks, "invalidate_seen", invalidate_seen)
+    key = RECOMMENDATION_KEY.format(version=model.version_id, user_id=7)
+    fake_redis.values[key] = '["isbn001"]'
+
+    assert asyncio.run(bookmarks.unbookmark_book(FakeSession(object()), 7, "isbn002"))
+
+    assert invalidated == [7]
+    assert key not in fake_redis.values
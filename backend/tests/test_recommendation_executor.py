@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.services.recommendation_executor import RecommendationExecutor
+
+
+def test_work_runs_off_the_event_loop_thread():
+    executor = RecommendationExecutor(max_workers=2, max_queue=0)
+    loop_free = threading.Event()
+
+    def work():
+        # Only returns if the event loop kept running while this thread waited
+        return threading.get_ident(), loop_free.wait(5)
+
+    async def unblock():
+        loop_free.set()
+
+    async def main():
+        (worker_thread, unblocked), _ = await asyncio.gather(executor.run(work), unblock())
+        return threading.get_ident(), worker_thread, unblocked
+
+    try:
+        loop_thread, worker_thread, unblocked = asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+    assert worker_thread != loop_thread
+    assert unblocked
+    assert executor.metrics()["completed"] == 1
+
+
+def test_full_queue_is_rejected_with_503():
+    executor = RecommendationExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = [asyncio.create_task(executor.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await executor.run(lambda: None)
+        metrics = executor.metrics()
+        release.set()
+        await asyncio.gather(*running)
+        return rejected.value, metrics
+
+    try:
+        rejected, busy = asyncio.run(main())
+    finally:
+        release.set()
+        executor.shutdown()
+
+    assert rejected.status_code == 503
+    assert rejected.headers == {"Retry-After": "1"}
+    # One running, one queued behind it
+    assert busy["in_flight"] == 2 and busy["queue_depth"] == 1 and busy["rejected"] == 1
+    # Capacity comes back once the work finishes
+    assert executor.metrics()["in_flight"] == 0 and executor.metrics()["completed"] == 2
+
+
+def test_failures_are_counted_and_raised():
+    executor = RecommendationExecutor(max_workers=1, max_queue=0)
+
+    def fail():
+        raise ValueError("boom")
+
+    try:
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(fail))
+    finally:
+        executor.shutdown()
+
+    assert executor.metrics()["failed"] == 1 and executor.metrics()["in_flight"] == 0
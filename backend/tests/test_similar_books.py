@@ -0,0 +1,33 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from backend.app.schemas.book import SimilarBooksResponse
+from backend.app.services import similar_books
+
+
+class FakeSession:
+    """Every neighbour is in the catalog table."""
+
+    async def execute(self, query):
+        isbns = query.whereclause.right.value
+
+        class Result:
+            def scalars(self):
+                return [SimpleNamespace(isbn=isbn, title=isbn, author="a", cover_url=None) for isbn in isbns]
+        return Result()
+
+
+def test_cached_body_reports_the_live_model_version(model, fake_redis, monkeypatch):
+    monkeypatch.setattr(similar_books, "redis_client", fake_redis)
+
+    first = json.loads(asyncio.run(similar_books.get_similar_books_json(FakeSession(), "isbn001", 3)))
+    # An incremental version shares the content artifacts, and so the cache entry
+    monkeypatch.setattr(model, "version_id", "incremental-2")
+    second = asyncio.run(similar_books.get_similar_books_json(FakeSession(), "isbn001", 3))
+
+    assert first["model_version"] == "v1"
+    assert len(first["similar"]) == 3
+    assert SimilarBooksResponse.model_validate_json(second).model_version == "incremental-2"
+    assert json.loads(second)["similar"] == first["similar"]
+    assert all("model_version" not in value for value in fake_redis.values.values())
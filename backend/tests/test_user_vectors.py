@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import numpy as np
+
+from backend.app.services import recommendations, user_vectors
+from backend.app.services.user_vectors import USER_VECTOR_KEY
+from backend.utils.config import settings
+
+
+class CountingLoader:
+    def __init__(self, isbns, ratings):
+        self.calls = 0
+        self.rows = (isbns, ratings)
+
+    async def __call__(self, db, user_id):
+        self.calls += 1
+        return self.rows
+
+
+def test_user_vector_is_folded_in_once_then_read_from_the_cache(model, fake_redis, monkeypatch):
+    loader = CountingLoader(["isbn001", "isbn002", "not-in-model"], [5, 4, 3])
+    monkeypatch.setattr(user_vectors, "_load_ratings", loader)
+
+    first = asyncio.run(user_vectors.get_user_vector(None, model, 7))
+    second = asyncio.run(user_vectors.get_user_vector(None, model, 7))
+
+    expected = model.fold_in(
+        ["isbn001", "isbn002", "not-in-model"], np.array([5, 4, 3]) * settings.FOLD_IN_RATING_SCALE
+    )
+    np.testing.assert_allclose(first, expected, rtol=1e-6)
+    # The cached JSON round-trips to the same float32 vector without touching the database
+    assert loader.calls == 1
+    assert second.dtype == np.float32
+    np.testing.assert_array_equal(second, first)
+    key = USER_VECTOR_KEY.format(version=model.version_id, user_id=7)
+    assert json.loads(fake_redis.values[key]) == first.tolist()
+
+
+def test_user_without_known_books_has_no_vector(model, fake_redis, monkeypatch):
+    monkeypatch.setattr(user_vectors, "_load_ratings", CountingLoader(["not-in-model"], [4]))
+
+    assert asyncio.run(user_vectors.get_user_vector(None, model, 8)) is None
+    assert fake_redis.values == {}
+
+
+def test_backend_ids_are_offset_past_book_crossing_ids(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_USER_ID_OFFSET", 1000)
+
+    assert recommendations.model_user_ids([0, 7]).tolist() == [1000, 1007]
+    # Book-Crossing users (below the offset) have no backend id
+    assert recommendations.backend_user_ids(np.array([5, 999, 1000, 1042])).tolist() == [0, 42]
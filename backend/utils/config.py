@@ -21,6 +21,29 @@ class Settings(BaseSettings):
     REDIS_DB: int = int(os.getenv("REDIS_DB", 0))
     REDIS_BLOCKLIST_PREFIX: str = "blocklist:"
 
+    RECOMMENDATION_STORE_TOP_N: int = 50
+    RECOMMENDATION_STORE_TTL: int = 7 * 24 * 3600
+    RECOMMENDATION_STORE_BATCH_SIZE: int = 2000
+    RECOMMENDATION_REFRESH_MINUTES: int = 15
+    SEEN_ITEMS_TTL: int = 7 * 24 * 3600
+    RECOMMENDATION_WORKERS: int = 4
+    RECOMMENDATION_MAX_QUEUE: int = 64
+    USER_VECTOR_TTL: int = 24 * 3600
+    FOLD_IN_RATING_SCALE: float = 2.0
+    # Backend user ids are keyed past the Book-Crossing User-IDs in the model
+    MODEL_USER_ID_OFFSET: int = 1_000_000_000
+    MODEL_UPDATE_MINUTES: int = 10
+    MODEL_UPDATE_EPOCHS: int = 5
+    MODEL_COMPACT_MINUTES: int = 6 * 60
+    MODEL_COMPACT_MIN_RATINGS: int = 1000
+    MODEL_KEEP_VERSIONS: int = 5
+    SIMILAR_BOOKS_TTL: int = 24 * 3600
+    MODEL_WARMUP_QUERIES: int = 100
+    MODEL_LOAD_ATTEMPTS: int = 5
+    MODEL_LOAD_BACKOFF_SECONDS: float = 2.0
+    CANDIDATE_RECENT_RATINGS: int = 20
+    CANDIDATE_POPULAR_K: int = 100
+
     FRONTEND_URL: str = "http://localhost:5173"
 
     SMTP_SERVER: str = "smtp.gmail.com"
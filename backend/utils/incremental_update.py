@@ -0,0 +1,117 @@
+# backend/utils/incremental_update.py
+import asyncio
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from backend.app.database.cache import redis_client, redis_lock
+from backend.app.database.db import async_session
+from backend.app.models.rating import Rating
+from backend.app.services.recommendations import RECOMMENDATION_KEY, backend_user_ids, model_user_ids
+from backend.app.services.user_vectors import store_overlay_vectors
+from backend.utils.config import settings
+from model.P_R_M.incremental import DeltaBuffer, IncrementalUpdater, overlay_user_vectors, prune_versions
+from model.P_R_M.registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Ratings up to this time are part of a compacted artifact version
+INCREMENTAL_WATERMARK_KEY = "model:incremental:watermark"
+# Ratings up to this time are reflected in the live user overlay
+OVERLAY_WATERMARK_KEY = "model:overlay:watermark"
+
+# Every uvicorn worker schedules both jobs; the locks let one of them run
+OVERLAY_LOCK = "model:overlay"
+COMPACT_LOCK = "model:compact"
+
+async def _watermark(key: str):
+    value = await redis_client.get(key)
+    return datetime.fromisoformat(value) if value else datetime.min.replace(tzinfo=timezone.utc)
+
+async def _ratings_since(watermark: datetime, only_users=None):
+    """(model user ids, isbns, ratings) created or updated after the watermark, optionally for some users only"""
+    query = (
+        select(Rating.user_id, Rating.book_isbn, Rating.rating)
+        .where(func.coalesce(Rating.updated_at, Rating.created_at) > watermark)
+        .order_by(func.coalesce(Rating.updated_at, Rating.created_at))
+    )
+    if only_users is not None:
+        query = query.where(Rating.user_id.in_(only_users))
+    async with async_session() as db:
+        rows = (await db.execute(query)).all()
+    # Backend users get their own factor rows, never a Book-Crossing user's
+    user_ids = model_user_ids([r[0] for r in rows]).tolist()
+    return user_ids, [r[1] for r in rows], [r[2] * settings.FOLD_IN_RATING_SCALE for r in rows]
+
+async def update_model_incrementally():
+    """
+    Refresh the live vectors of users who rated since the last run: their
+    ratings since the last compaction are swept into their factor rows with
+    the item factors held fixed (see overlay_user_vectors) and the results go
+    to the per-version overlay in Redis. The served artifacts and version ID
+    stay the same, so nothing else keyed by version is invalidated.
+    """
+    if not registry.is_ready():
+        return  # Ratings are pulled once the model has loaded
+    async with redis_lock(OVERLAY_LOCK, ttl=settings.MODEL_UPDATE_MINUTES * 60) as acquired:
+        if not acquired:
+            return
+        started_at = datetime.now(timezone.utc)
+        changed, _, _ = await _ratings_since(await _watermark(OVERLAY_WATERMARK_KEY))
+        changed = sorted(set(backend_user_ids(changed).tolist()))
+        if changed:
+            model = registry.current()
+            delta = await _ratings_since(await _watermark(INCREMENTAL_WATERMARK_KEY), changed)
+            user_ids, vectors = await asyncio.to_thread(
+                overlay_user_vectors, model, *delta, n_epochs=settings.MODEL_UPDATE_EPOCHS
+            )
+            user_ids = backend_user_ids(user_ids).tolist()
+            if user_ids:
+                await store_overlay_vectors(model.version_id, dict(zip(user_ids, vectors)))
+                # Stored lists were scored with the old vectors
+                await redis_client.delete(*[
+                    RECOMMENDATION_KEY.format(version=model.version_id, user_id=user_id) for user_id in user_ids
+                ])
+            logger.info(
+                f"Overlay update for model {model.version_id}: {len(delta[2])} ratings, {len(user_ids)} users"
+            )
+        await redis_client.set(OVERLAY_WATERMARK_KEY, started_at.isoformat())
+
+def _update_and_compact(model, user_ids, isbns, ratings):
+    updater = IncrementalUpdater(model, n_epochs=settings.MODEL_UPDATE_EPOCHS)
+    stats = updater.apply(user_ids, isbns, ratings)
+    version_id, directory = updater.compact()
+    prune_versions(settings.MODEL_KEEP_VERSIONS, current=version_id)
+    return stats, version_id, directory
+
+async def compact_model():
+    """
+    Every MODEL_COMPACT_MINUTES: once enough ratings arrived since the last
+    compaction, warm-start a copy of the factors on them (new users and books
+    get rows) and publish it as a new artifact version. Every worker picks it
+    up through the CURRENT pointer; the overlay of the new version starts
+    empty, since its factor rows already include those ratings.
+    """
+    if not registry.is_ready():
+        return
+    async with redis_lock(COMPACT_LOCK, ttl=settings.MODEL_COMPACT_MINUTES * 60) as acquired:
+        if not acquired:
+            return
+        started_at = datetime.now(timezone.utc)
+        buffer = DeltaBuffer()
+        buffer.add(*await _ratings_since(await _watermark(INCREMENTAL_WATERMARK_KEY)))
+        if len(buffer) < settings.MODEL_COMPACT_MIN_RATINGS:
+            return
+
+        model = registry.current()
+        stats, version_id, directory = await asyncio.to_thread(
+            _update_and_compact, model, *buffer.to_arrays()
+        )
+        # The overlay of the new version only needs the ratings it does not include
+        await redis_client.set(INCREMENTAL_WATERMARK_KEY, started_at.isoformat())
+        await redis_client.set(OVERLAY_WATERMARK_KEY, started_at.isoformat())
+        registry.load_in_background(directory, version_id)
+        logger.info(
+            f"Compacted {model.version_id} -> {version_id}: {stats['ratings']} ratings, "
+            f"{stats['users']} users, {stats['items']} books, delta RMSE {stats['rmse'][-1]:.4f}, "
+            f"{stats['seconds']:.2f}s"
+        )
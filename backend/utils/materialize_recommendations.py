@@ -0,0 +1,71 @@
+# backend/utils/materialize_recommendations.py
+import asyncio
+import logging
+import numpy as np
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from backend.app.database.cache import redis_client
+from backend.app.database.db import async_session
+from backend.app.models.rating import Rating
+from backend.app.services.recommendations import (
+    RECOMMENDATION_WATERMARK_KEY,
+    backend_user_ids,
+    model_user_ids,
+    store_recommendations
+)
+from backend.app.services.user_vectors import get_overlay_vectors
+from backend.utils.config import settings
+from model.P_R_M.registry import registry
+
+logger = logging.getLogger(__name__)
+
+async def _users_rated_since(watermark: datetime):
+    """User ids with a rating created or updated after the watermark"""
+    async with async_session() as db:
+        result = await db.execute(
+            select(Rating.user_id.distinct())
+            .where(func.coalesce(Rating.updated_at, Rating.created_at) > watermark)
+        )
+        return [row[0] for row in result]
+
+async def materialize_recommendations(full: bool = False):
+    """
+    Precompute top-n ISBN lists and write them to Redis.
+    The first run for a model version (no watermark yet) or full=True covers
+    every backend user with a row in user_factors; later runs only recompute
+    users whose ratings changed.
+    """
+    if not registry.is_ready():
+        logger.info("Model still loading; skipping recommendation materialization")
+        return
+    started_at = datetime.now(timezone.utc)
+    model = registry.current()
+    watermark_key = RECOMMENDATION_WATERMARK_KEY.format(version=model.version_id)
+    watermark = await redis_client.get(watermark_key)
+
+    # Book-Crossing training users have no account, so only backend users are stored
+    if full or not watermark:
+        user_ids = backend_user_ids(model.users.keys)
+    else:
+        changed = np.asarray(await _users_rated_since(datetime.fromisoformat(watermark)), dtype=np.int64)
+        user_ids = changed[model.users.encode(model_user_ids(changed)) >= 0]
+
+    batch_size = settings.RECOMMENDATION_STORE_BATCH_SIZE
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        model_ids = model_user_ids(chunk)
+        recommendations = await asyncio.to_thread(
+            model.recommend_batch, model_ids, settings.RECOMMENDATION_STORE_TOP_N
+        )
+        recommendations = {
+            user_id: recommendations[model_id] for user_id, model_id in zip(chunk.tolist(), model_ids.tolist())
+        }
+        # Users rating since the last compaction are scored with their live vector instead
+        for user_id, vector in (await get_overlay_vectors(model, chunk.tolist())).items():
+            recommendations[user_id] = await asyncio.to_thread(
+                model.recommend_vector, vector, settings.RECOMMENDATION_STORE_TOP_N
+            )
+        await store_recommendations(model.version_id, recommendations)
+
+    await redis_client.set(watermark_key, started_at.isoformat())
+    logger.info(f"Materialized recommendations for {len(user_ids)} users (model {model.version_id})")
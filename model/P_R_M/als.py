@@ -0,0 +1,122 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Upper bound on the per-rating outer products held by one solve block
+DEFAULT_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def row_blocks(indptr, block_nnz):
+    """
+    Split CSR rows into contiguous blocks of about block_nnz stored ratings.
+    A single row with more ratings than that gets a block of its own.
+    :return: List of (start_row, end_row) pairs.
+    """
+    n_rows = len(indptr) - 1
+    cuts = np.searchsorted(indptr, np.arange(0, indptr[-1], block_nnz), side="right") - 1
+    bounds = np.unique(np.concatenate([cuts, [0, n_rows]]))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def solve_block(matrix, fixed, regularization, out, start, end):
+    """
+    Least-squares update of rows start..end of one side, the other side fixed.
+    For every row u with ratings r over items I:
+        (V_I^T V_I + reg * I) x_u = V_I^T r
+    The Gram matrices of the whole block come from one einsum plus an
+    add.reduceat over row boundaries, and all systems go through a single
+    batched np.linalg.solve. Rows without ratings are set to zero.
+    """
+    indptr = matrix.indptr[start:end + 1]
+    lo, hi = indptr[0], indptr[-1]
+    counts = np.diff(indptr)
+    rated = np.nonzero(counts)[0]
+    out[start:end] = 0
+    if hi == lo:
+        return
+
+    vectors = fixed[matrix.indices[lo:hi]]
+    ratings = matrix.data[lo:hi]
+    offsets = (indptr[:-1] - lo)[rated]
+
+    gram = np.add.reduceat(np.einsum("nk,nl->nkl", vectors, vectors), offsets, axis=0)
+    rhs = np.add.reduceat(vectors * ratings[:, None], offsets, axis=0)
+    gram += regularization * np.eye(fixed.shape[1], dtype=fixed.dtype)
+    out[start + rated] = np.linalg.solve(gram, rhs[..., None])[..., 0]
+
+
+def als_sweep(matrix, fixed, regularization, out, executor, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Update every row of out from fixed, one block per worker task."""
+    n_factors = fixed.shape[1]
+    block_nnz = max(1, block_bytes // (n_factors * n_factors * fixed.itemsize))
+    futures = [
+        executor.submit(solve_block, matrix, fixed, regularization, out, start, end)
+        for start, end in row_blocks(matrix.indptr, block_nnz)
+    ]
+    for future in futures:
+        future.result()
+
+
+def observed_rmse(matrix, user_factors, item_factors, block_nnz=1 << 20):
+    """RMSE over the stored ratings only (missing entries are not zeros)."""
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    squared = 0.0
+    for lo in range(0, matrix.nnz, block_nnz):
+        hi = min(lo + block_nnz, matrix.nnz)
+        predicted = np.einsum(
+            "nk,nk->n", user_factors[rows[lo:hi]], item_factors[matrix.indices[lo:hi]]
+        )
+        squared += float(((matrix.data[lo:hi] - predicted) ** 2).sum())
+    return float(np.sqrt(squared / max(matrix.nnz, 1)))
+
+
+def train_als(matrix, n_factors=50, regularization=0.1, n_iter=15, n_threads=None, seed=42,
+              dtype=np.float32, verbose=True):
+    """
+    Alternating least squares on explicit ratings.
+    Only stored entries of the CSR matrix count as observations, unlike
+    TruncatedSVD which fits the zeros as well.
+    :param matrix: (n_users x n_items) scipy CSR matrix of ratings.
+    :param n_factors: Latent dimensions.
+    :param regularization: L2 weight (the same value fold_in expects).
+    :param n_iter: Number of (user, item) sweep pairs.
+    :param n_threads: Worker threads for the block solves (all cores if None).
+    :return: (user_factors, item_factors, history) where history has one dict
+             per iteration with seconds and observed RMSE.
+    """
+    matrix = matrix.tocsr().astype(dtype)
+    matrix.sort_indices()
+    transposed = matrix.T.tocsr()
+    n_users, n_items = matrix.shape
+
+    rng = np.random.default_rng(seed)
+    user_factors = np.zeros((n_users, n_factors), dtype=dtype)
+    item_factors = rng.normal(0, 1 / np.sqrt(n_factors), (n_items, n_factors)).astype(dtype)
+
+    history = []
+    with ThreadPoolExecutor(max_workers=n_threads or os.cpu_count()) as executor:
+        for iteration in range(1, n_iter + 1):
+            start = time.perf_counter()
+            als_sweep(matrix, item_factors, regularization, user_factors, executor)
+            als_sweep(transposed, user_factors, regularization, item_factors, executor)
+            seconds = time.perf_counter() - start
+
+            rmse = observed_rmse(matrix, user_factors, item_factors)
+            history.append({"iteration": iteration, "seconds": seconds, "rmse": rmse})
+            if verbose:
+                print(f"ALS iteration {iteration}/{n_iter}: {seconds:.2f}s, train RMSE {rmse:.4f}")
+    return user_factors, item_factors, history
+
+
+def write_model_meta(path, algorithm, **params):
+    """
+    Record how the factors were trained next to them.
+    The serving side reads fold_in_regularization from here.
+    """
+    meta = {"algorithm": algorithm, **params}
+    with open(path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
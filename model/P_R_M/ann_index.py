@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from model.P_R_M.model_loader import load_array
+from model.P_R_M.scoring import select_top_n
+from utils.config import ANN_INDEX_DIR
+
+# Rows assigned per distance block during k-means (bounds temporary memory)
+ASSIGN_BLOCK_ROWS = 16384
+
+
+def kmeans(vectors, n_clusters, n_iter=20, seed=42, max_train_points=None):
+    """
+    Plain Lloyd's k-means used as the IVF coarse quantizer.
+    :param vectors: (n, d) float32 matrix.
+    :param n_clusters: Number of centroids.
+    :param n_iter: Lloyd iterations.
+    :param seed: Random seed for initialization and sampling.
+    :param max_train_points: Train on a random sample of this size (all rows if None).
+    :return: (n_clusters, d) centroid matrix.
+    """
+    rng = np.random.default_rng(seed)
+    train = vectors
+    if max_train_points is not None and len(vectors) > max_train_points:
+        train = vectors[np.sort(rng.choice(len(vectors), max_train_points, replace=False))]
+
+    centroids = train[rng.choice(len(train), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = assign(train, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, train)
+
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters from random points so every list stays usable
+        if empty.any():
+            centroids[empty] = train[rng.choice(len(train), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def assign(vectors, centroids):
+    """Index of the nearest centroid (L2) for every row, computed in blocks."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = vectors[start:start + ASSIGN_BLOCK_ROWS]
+        # argmin ||x - c||^2 == argmax (2 x.c - ||c||^2)
+        scores = 2 * (block @ centroids.T) - centroid_norms
+        assignments[start:start + len(block)] = scores.argmax(axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """
+    Inverted-file index for maximum-inner-product search over the hybrid score.
+
+    Items are stored as ``[alpha * item_factors, (1 - alpha) * content_score]``
+    and queried with ``[user_vector, 1]``, so the inner product is exactly the
+    hybrid score. Items are clustered with k-means; a query only scans the
+    ``nprobe`` lists whose centroids score highest.
+    """
+
+    FILES = ("centroids", "list_offsets", "list_items", "list_vectors")
+
+    def __init__(self, centroids, list_offsets, list_items, list_vectors, alpha):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_items = list_items
+        self.list_vectors = list_vectors
+        self.alpha = alpha
+
+    @property
+    def n_lists(self):
+        return self.centroids.shape[0]
+
+    @property
+    def n_items(self):
+        return self.list_items.shape[0]
+
+    @classmethod
+    def build(cls, item_factors, content_scores, alpha=0.8, n_lists=None, n_iter=20, seed=42):
+        """
+        Build the index from item factors and per-item content scores.
+        :param n_lists: Number of inverted lists (about 4 * sqrt(n_items) if None).
+        """
+        n_items = item_factors.shape[0]
+        n_lists = n_lists or max(1, int(4 * np.sqrt(n_items)))
+        vectors = np.hstack([
+            alpha * np.asarray(item_factors, dtype=np.float32),
+            (1 - alpha) * np.asarray(content_scores, dtype=np.float32)[:, None],
+        ]).astype(np.float32)
+
+        centroids = kmeans(vectors, n_lists, n_iter=n_iter, seed=seed, max_train_points=256 * n_lists)
+        return cls._from_centroids(centroids, vectors, alpha)
+
+    @classmethod
+    def _from_centroids(cls, centroids, vectors, alpha):
+        assignments = assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=len(centroids)), out=list_offsets[1:])
+        return cls(centroids, list_offsets, order.astype(np.int32), vectors[order], alpha)
+
+    def reassign(self, item_factors, content_scores):
+        """
+        Index for updated item factors under the existing centroids: one
+        assignment pass instead of k-means, for factors that only drifted
+        (e.g. after an incremental update). New items are filed too.
+        """
+        vectors = np.hstack([
+            self.alpha * np.asarray(item_factors, dtype=np.float32),
+            (1 - self.alpha) * np.asarray(content_scores, dtype=np.float32)[:, None],
+        ]).astype(np.float32)
+        return self._from_centroids(np.asarray(self.centroids), vectors, self.alpha)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in self.FILES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"alpha": self.alpha, "n_lists": self.n_lists, "n_items": self.n_items}, f)
+
+    @classmethod
+    def load(cls, directory, use_mmap=True):
+        """Load an index saved by save(); the large arrays are memory-mapped."""
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = [load_array(os.path.join(directory, f"{name}.npy"), use_mmap=use_mmap) for name in cls.FILES]
+        return cls(*arrays, alpha=meta["alpha"])
+
+    def search(self, user_vector, top_n=10, nprobe=8, exclude=None):
+        """
+        Approximate top-n items by hybrid score.
+        :param user_vector: Latent user vector (same width as item_factors).
+        :param nprobe: Number of inverted lists to scan; higher is slower and more exact.
+        :param exclude: Sorted array of item rows that must not be returned.
+        :return: Array of item rows, best first; shorter than top_n when the
+                 probed lists hold fewer non-excluded items.
+        """
+        query = np.append(np.asarray(user_vector, dtype=np.float32), np.float32(1.0))
+        probe = select_top_n(self.centroids @ query, nprobe)
+
+        # Concatenate the probed list ranges into one gather + one matvec
+        starts = self.list_offsets[probe]
+        lengths = self.list_offsets[probe + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+
+        scores = self.list_vectors[positions] @ query
+        if exclude is not None and len(exclude):
+            scores[np.isin(self.list_items[positions], exclude, assume_unique=True)] = -np.inf
+        return self.list_items[positions[select_top_n(scores, top_n)]].astype(np.int64)
+
+
+def benchmark(index, scorer, user_rows, top_n=10, nprobe_values=(1, 2, 4, 8, 16, 32)):
+    """
+    Recall and latency of the index against exact scoring (the recommend_books path).
+    :return: List of dicts with nprobe, recall and mean milliseconds per query.
+    """
+    start = time.perf_counter()
+    exact = [set(scorer.recommend(row, top_n=top_n).tolist()) for row in user_rows]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(user_rows)
+    results = [{"nprobe": "exact", "recall": 1.0, "ms_per_query": exact_ms}]
+
+    for nprobe in nprobe_values:
+        hits = 0
+        start = time.perf_counter()
+        for row, truth in zip(user_rows, exact):
+            found = index.search(scorer.user_factors[row], top_n=top_n, nprobe=nprobe)
+            hits += len(truth.intersection(found.tolist()))
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(user_rows)
+        results.append({
+            "nprobe": nprobe,
+            "recall": hits / (len(user_rows) * top_n),
+            "ms_per_query": elapsed_ms,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    from model.P_R_M.registry import load_version
+
+    parser = argparse.ArgumentParser(description="Build or benchmark the IVF index over item factors")
+    parser.add_argument("command", choices=["build", "bench"])
+    parser.add_argument("--artifacts", default=None, help="Artifact set directory (default layout if omitted)")
+    parser.add_argument("--out", default=None, help="Index directory (default: <artifacts>/ann or ANN_INDEX_DIR)")
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--n-iter", type=int, default=20)
+    parser.add_argument("--users", type=int, default=1000, help="Sampled users for the benchmark")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    model = load_version(args.artifacts)
+    index_dir = args.out or (os.path.join(args.artifacts, "ann") if args.artifacts else ANN_INDEX_DIR)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = IVFIndex.build(model.item_factors, model.content_scores, alpha=model.scorer.alpha,
+                               n_lists=args.n_lists, n_iter=args.n_iter)
+        index.save(index_dir)
+        print(f"Built {index.n_lists} lists over {index.n_items} items in {time.perf_counter() - start:.1f}s -> {index_dir}")
+    else:
+        index = IVFIndex.load(index_dir)
+        rng = np.random.default_rng(42)
+        user_rows = rng.choice(model.n_users, min(args.users, model.n_users), replace=False)
+        print(f"{'nprobe':>8} {'recall@' + str(args.top_n):>10} {'ms/query':>10}")
+        for result in benchmark(index, model.scorer, user_rows, top_n=args.top_n, nprobe_values=args.nprobe):
+            print(f"{result['nprobe']:>8} {result['recall']:>10.4f} {result['ms_per_query']:>10.3f}")
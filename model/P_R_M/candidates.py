@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model.P_R_M.scoring import select_top_n
+from utils.config import ANN_NPROBE, CANDIDATE_CF_K, CANDIDATE_CONTENT_K
+
+
+def cf_candidates(model, context, k=CANDIDATE_CF_K):
+    """
+    Top-k item rows by hybrid score for the user's latent vector (IVF index when
+    ANN_NPROBE > 0, exact scoring otherwise). Empty without a vector.
+    """
+    user_vector = context.get("user_vector")
+    if user_vector is None:
+        return np.empty(0, dtype=np.int64)
+    exclude = context.get("exclude")
+    if model.ann is not None and ANN_NPROBE > 0:
+        return model.ann.search(user_vector, top_n=k, nprobe=ANN_NPROBE, exclude=exclude)
+    return model.scorer.recommend_vector(user_vector, top_n=k, exclude=exclude)
+
+
+def content_candidates(model, context, k=CANDIDATE_CONTENT_K):
+    """
+    Content neighbours (top_k_indices) of the user's recently rated books.
+    Neighbours listed by several recent books rank higher; costs
+    O(recent books x neighbours), independent of catalog size.
+    """
+    content_rows = model.content_items.encode(context.get("recent_isbns", []))
+    content_rows = content_rows[content_rows >= 0]
+    if len(content_rows) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    neighbours = np.asarray(model.top_k_indices[content_rows]).ravel()
+    similarities = np.asarray(model.top_k_similarities[content_rows], dtype=np.float32).ravel()
+    keep = neighbours >= 0
+    unique, inverse = np.unique(neighbours[keep], return_inverse=True)
+    totals = np.bincount(inverse, weights=similarities[keep])
+    best = unique[select_top_n(totals, k)]
+
+    # Neighbours are content (Books.csv) rows; candidates are item_factors rows
+    item_rows = model.items.encode(model.content_items.decode(best))
+    return item_rows[item_rows >= 0]
+
+
+def popular_candidates(model, context, k=None):
+    """Item rows of the popular ISBNs passed in the context (e.g. book_schema.popular_books)."""
+    isbns = context.get("popular_isbns", [])
+    item_rows = model.items.encode(isbns[:k] if k else isbns)
+    return item_rows[item_rows >= 0]
+
+
+def default_sources():
+    return {
+        "cf": cf_candidates,
+        "content": content_candidates,
+        "popular": popular_candidates,
+    }
+
+
+class CandidatePipeline:
+    """
+    Two-stage recommender: cheap candidate generators run concurrently, and
+    only their deduplicated union (a few hundred books) is scored with the
+    hybrid formula. Besides the CF top-k, no stage touches the whole catalog.
+
+    A source is any callable (model, context) -> item_factors rows; the
+    context dict carries what the sources need ("user_vector",
+    "recent_isbns", "popular_isbns", "exclude").
+    """
+
+    def __init__(self, sources=None, max_workers=None):
+        """
+        :param sources: Dict of name -> source callable (default_sources() if None).
+        :param max_workers: Threads for the sources (one per source if None).
+        """
+        self.sources = dict(sources or default_sources())
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.sources), thread_name_prefix="candidate-source"
+        )
+
+    def _timed(self, source, model, context):
+        start = time.perf_counter()
+        rows = np.asarray(source(model, context), dtype=np.int64)
+        return rows, (time.perf_counter() - start) * 1000
+
+    def recommend(self, model, context, top_n=10):
+        """
+        Generate, merge and rank candidates for one user.
+        :param model: ModelVersion.
+        :param context: Inputs of the sources (see class docstring).
+        :return: (item_rows best first, report) where report holds per-stage
+                 milliseconds and candidate counts.
+        """
+        start = time.perf_counter()
+        futures = {
+            name: self._pool.submit(self._timed, source, model, context)
+            for name, source in self.sources.items()
+        }
+        report = {"ms": {}, "candidates": {}}
+        generated = []
+        for name, future in futures.items():
+            rows, ms = future.result()
+            report["ms"][name] = ms
+            report["candidates"][name] = len(rows)
+            generated.append(rows)
+        report["ms"]["generate"] = (time.perf_counter() - start) * 1000
+
+        stage = time.perf_counter()
+        candidates = np.unique(np.concatenate(generated)) if generated else np.empty(0, dtype=np.int64)
+        exclude = context.get("exclude")
+        if exclude is not None and len(exclude):
+            candidates = candidates[~np.isin(candidates, exclude)]
+        report["candidates"]["merged"] = len(candidates)
+        report["ms"]["merge"] = (time.perf_counter() - stage) * 1000
+
+        stage = time.perf_counter()
+        scores = model.score_items(context.get("user_vector"), candidates)
+        ranked = candidates[select_top_n(scores, top_n)]
+        report["ms"]["rank"] = (time.perf_counter() - stage) * 1000
+        report["ms"]["total"] = (time.perf_counter() - start) * 1000
+        return ranked, report
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
@@ -1,58 +1,99 @@
+import argparse
+import os
+import time
 import numpy as np
-import pandas as pd
-from scipy.sparse import lil_matrix, csr_matrix
 from sklearn.decomposition import TruncatedSVD
-import pickle
-
-ratings_df = pd.read_csv("../datasets/bookcrossing_dataset/Ratings.csv", sep=";")
-ratings_df["Rating"] = pd.to_numeric(ratings_df["Rating"], errors="coerce")
-ratings_df = ratings_df[ratings_df["Rating"] > 0]  # Filter out implicit feedback
-
-# Create mappings for user and book IDs to indices
-user_to_index = {user_id: idx for idx, user_id in enumerate(ratings_df["User-ID"].unique())}
-book_to_index = {book_id: idx for idx, book_id in enumerate(ratings_df["ISBN"].unique())}
-
-# # Debug prints to verify mappings
-# print(f"User to index sample: {list(user_to_index.items())[:5]}")
-# print(f"Book to index sample: {list(book_to_index.items())[:5]}")
-
-# Create the user-item matrix in lil format for efficient updates
-num_users = len(user_to_index)
-num_books = len(book_to_index)
-user_item_matrix = lil_matrix((num_users, num_books), dtype=np.float32)
-
-# Populate the user-item matrix with ratings
-for idx, row in ratings_df.iterrows():
-    user_idx = user_to_index[row["User-ID"]]
-    book_idx = book_to_index[row["ISBN"]]
-    user_item_matrix[user_idx, book_idx] = row["Rating"]
-    if idx % 10000 == 0:  # Print progress every 10,000 rows
-        print(f"Processed {idx + 1} / {len(ratings_df)} rows...")
-
-# Convert to csr format for efficient computations
-user_item_matrix = user_item_matrix.tocsr()
-
-# Debug prints to check sparsity
-sparsity = 1 - (user_item_matrix.nnz / (user_item_matrix.shape[0] * user_item_matrix.shape[1]))
-print(f"Sparsity of user-item matrix: {sparsity:.4f}")
-
-# Matrix Factorization (SVD)
-n_components = 50
-svd = TruncatedSVD(n_components=n_components, random_state=42)
-user_factors = svd.fit_transform(user_item_matrix)
-item_factors = svd.components_.T
-
-# print(f"User factors sample: {user_factors[:5]}")
-# print(f"Item factors sample: {item_factors[:5]}")
-
-# Save the latent factors for later use
-np.save("../datasets/user_factors.npy", user_factors)
-np.save("../datasets/item_factors.npy", item_factors)
-
-# Save the mappings for later use
-with open("../datasets/user_to_index.pkl", "wb") as f:
-    pickle.dump(user_to_index, f)
-with open("../datasets/book_to_index.pkl", "wb") as f:
-    pickle.dump(book_to_index, f)
-
-print("Collaborative Filtering: Matrix Factorization completed!")
\ No newline at end of file
+from model.P_R_M.als import train_als, write_model_meta
+from model.P_R_M.id_mapping import IdMapping
+from model.P_R_M.ingestion import DEFAULT_CHUNKSIZE, load_ratings_matrix
+from utils.config import DATASETS_DIR, RATINGS_PATH
+
+
+def train_factors(ratings_path=RATINGS_PATH, out_dir=DATASETS_DIR,
+                  algorithm="svd", factors=50, regularization=0.1, iterations=15, threads=None,
+                  chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Train user/item factors and write them with their ID mappings and model_meta.json to out_dir.
+    :param algorithm: "svd" (TruncatedSVD) or "als" (alternating least squares).
+    :param regularization: ALS L2 weight.
+    :param iterations: ALS sweeps.
+    :param threads: ALS worker threads (all cores if None).
+    """
+    # Chunked CSV -> CSR build, cached by the hash of Ratings.csv
+    user_item_matrix, user_ids, isbns = load_ratings_matrix(
+        ratings_path,
+        chunksize=chunksize,
+        min_rating=0  # Filter out implicit feedback
+    )
+
+    # Debug prints to check sparsity
+    sparsity = 1 - (user_item_matrix.nnz / (user_item_matrix.shape[0] * user_item_matrix.shape[1]))
+    print(f"Sparsity of user-item matrix: {sparsity:.4f}")
+
+    meta_path = os.path.join(out_dir, "model_meta.json")
+    if algorithm == "als":
+        # Alternating least squares over the observed ratings only
+        user_factors, item_factors, history = train_als(
+            user_item_matrix,
+            n_factors=factors,
+            regularization=regularization,
+            n_iter=iterations,
+            n_threads=threads
+        )
+        print(f"ALS: {np.mean([h['seconds'] for h in history]):.2f}s per iteration")
+        write_model_meta(
+            meta_path, "als",
+            n_factors=factors,
+            regularization=regularization,
+            n_iter=iterations,
+            fold_in_regularization=regularization,
+            seconds_per_iteration=[h["seconds"] for h in history],
+            train_rmse=history[-1]["rmse"] if history else None
+        )
+    else:
+        # Matrix Factorization (SVD)
+        start = time.perf_counter()
+        svd = TruncatedSVD(n_components=factors, random_state=42)
+        user_factors = svd.fit_transform(user_item_matrix)
+        item_factors = svd.components_.T
+        print(f"SVD: {time.perf_counter() - start:.2f}s")
+        # user_factors = X @ item_factors, so new users fold in by plain projection
+        write_model_meta(
+            meta_path, "svd",
+            n_factors=factors,
+            fold_in_regularization=None,
+            seconds=time.perf_counter() - start
+        )
+
+    # print(f"User factors sample: {user_factors[:5]}")
+    # print(f"Item factors sample: {item_factors[:5]}")
+
+    # Save the latent factors for later use
+    np.save(os.path.join(out_dir, "user_factors.npy"), user_factors)
+    np.save(os.path.join(out_dir, "item_factors.npy"), item_factors)
+
+    # Save the row -> ID mappings for later use
+    IdMapping(user_ids).save(os.path.join(out_dir, "user_ids.npz"))
+    IdMapping(isbns).save(os.path.join(out_dir, "item_isbns.npz"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train collaborative filtering factors from Ratings.csv")
+    parser.add_argument("--algorithm", choices=["svd", "als"], default="svd")
+    parser.add_argument("--factors", type=int, default=50)
+    parser.add_argument("--regularization", type=float, default=0.1, help="ALS L2 weight")
+    parser.add_argument("--iterations", type=int, default=15, help="ALS sweeps")
+    parser.add_argument("--threads", type=int, default=None, help="ALS worker threads (all cores if omitted)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Ratings.csv rows per parsed chunk")
+    args = parser.parse_args()
+
+    train_factors(
+        algorithm=args.algorithm,
+        factors=args.factors,
+        regularization=args.regularization,
+        iterations=args.iterations,
+        threads=args.threads,
+        chunksize=args.chunksize
+    )
+
+    print("Collaborative Filtering: Matrix Factorization completed!")
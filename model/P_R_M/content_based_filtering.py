@@ -1,44 +1,35 @@
-import pickle
+import os
 import numpy as np
 from scipy.sparse import load_npz
-from sklearn.metrics.pairwise import cosine_similarity
-from tqdm import tqdm  # For progress bar
+from model.P_R_M.similarity_builder import build_top_k
+from utils.config import DATASETS_DIR
 
-# Load the sparse TF-IDF matrix
-tfidf_matrix = load_npz("../datasets/tfidf_matrix_sparse.npz")
 
-# After loading the mappings (if available)
-with open("../datasets/book_to_index.pkl", "rb") as f:
-    book_to_index = pickle.load(f)
+def build_content_neighbours(tfidf_path=os.path.join(DATASETS_DIR, "tfidf_matrix_sparse.npz"),
+                             similarities_path=os.path.join(DATASETS_DIR, "top_k_similarities.npy"),
+                             indices_path=os.path.join(DATASETS_DIR, "top_k_indices.npy"),
+                             top_k=100, block_rows=None):
+    """
+    Top-k cosine neighbours of every book in the TF-IDF matrix.
+    Rows follow Books.csv order; content_isbns.npz (from preprocessing.py) maps them to ISBNs.
+    :param top_k: Neighbours saved per book.
+    :param block_rows: Rows per worker block; by default sized from a per-worker memory budget.
+    """
+    # Load the sparse TF-IDF matrix
+    tfidf_matrix = load_npz(tfidf_path)
 
-# # Debug prints to verify book mappings
-# print(f"Book to index sample: {list(book_to_index.items())[:5]}")
+    # Sparse x sparse^T cosine blocks with vectorized row-wise top-k, one block per CPU core
+    top_k_similarities, top_k_indices = build_top_k(tfidf_matrix, top_k=top_k, block_rows=block_rows)
 
-# Parameters
-n_books = tfidf_matrix.shape[0]
-chunk_size = 1000  # Adjust based on your system's memory
-top_k = 100  # Save only top 100 similar books for each book
+    # Save the top-k similarities (float32) and indices (int32, -1 where a book has fewer than top_k neighbours)
+    np.save(similarities_path, top_k_similarities)
+    np.save(indices_path, top_k_indices)
 
-# Initialize arrays to store top-k similarities and indices
-top_k_similarities = np.zeros((n_books, top_k))
-top_k_indices = np.zeros((n_books, top_k), dtype=int)
 
-# Compute cosine similarity in chunks
-for i in tqdm(range(0, n_books, chunk_size)):
-    chunk = tfidf_matrix[i:i + chunk_size]
-    sim_chunk = cosine_similarity(chunk, tfidf_matrix)
+if __name__ == "__main__":
+    build_content_neighbours()
 
-    # Find top-k similarities for the current chunk
-    for j in range(sim_chunk.shape[0]):
-        top_k_indices[i + j] = np.argpartition(sim_chunk[j], -top_k)[-top_k:]
-        top_k_similarities[i + j] = sim_chunk[j][top_k_indices[i + j]]
+    # print(f"Top-k similarities sample: {top_k_similarities[:5]}")
+    # print(f"Top-k indices sample: {top_k_indices[:5]}")
 
-# Save the top-k similarities and indices
-np.save("../datasets/top_k_similarities.npy", top_k_similarities)
-np.save("../datasets/top_k_indices.npy", top_k_indices)
-
-
-# print(f"Top-k similarities sample: {top_k_similarities[:5]}")
-# print(f"Top-k indices sample: {top_k_indices[:5]}")
-
-print("Content-Based Filtering: Top-k cosine similarities computed!")
\ No newline at end of file
+    print("Content-Based Filtering: Top-k cosine similarities computed!")
@@ -0,0 +1,80 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from model.P_R_M.scoring import select_top_n
+from model.P_R_M.similarity_builder import top_k_rows
+
+
+class ContentScorer:
+    """
+    Content-based scoring over the sparse neighbour graph.
+
+    With G the (n_items x n_items) graph (G[b, i] = similarity of neighbour i
+    of book b) and x a user's 0/1 profile, the content score of every book is
+    G @ x, i.e. how strongly each book's neighbour list overlaps the profile.
+    Only the columns of G for the user's own books matter, so the graph is
+    stored transposed: the score is the sum of the reverse-graph rows of the
+    profile items, and a user costs O(profile size x in-degree), not
+    O(catalog size x k).
+    Items are content rows (Books.csv order, see content_isbns.npz).
+    """
+
+    def __init__(self, graph):
+        """
+        :param graph: NeighbourGraph over content rows.
+        """
+        # reverse[i, b] = G[b, i]: the books that list i as a neighbour
+        self.reverse = graph.to_csr().T.tocsr()
+        self.n_items = graph.n_items
+
+    def score(self, item_rows, weights=None):
+        """
+        Content scores of every book for one profile.
+        :param item_rows: Content rows the user interacted with.
+        :param weights: Optional per-item weights (e.g. ratings); 1 if None.
+        :return: float32 score vector of length n_items.
+        """
+        item_rows = np.asarray(item_rows, dtype=np.int64)
+        starts = self.reverse.indptr[item_rows]
+        lengths = self.reverse.indptr[item_rows + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(self.n_items, dtype=np.float32)
+
+        # Gather the reverse-graph rows of the profile and sum them per book
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        values = self.reverse.data[positions]
+        if weights is not None:
+            values = values * np.repeat(np.asarray(weights, dtype=np.float32), lengths)
+        return np.bincount(self.reverse.indices[positions], weights=values, minlength=self.n_items).astype(np.float32)
+
+    def recommend(self, item_rows, top_n=10, weights=None, exclude_profile=True):
+        """
+        Top-n content rows for one profile, best first.
+        Books with no neighbour in the profile are never returned.
+        """
+        scores = self.score(item_rows, weights)
+        if exclude_profile:
+            scores[np.asarray(item_rows, dtype=np.int64)] = 0
+        top = select_top_n(scores, top_n)
+        return top[scores[top] > 0]
+
+    def score_batch(self, profiles):
+        """
+        Content scores for a block of users: X @ G^T as one sparse product.
+        :param profiles: (n_users x n_items) sparse user-item matrix over content rows.
+        :return: (n_users x n_items) sparse CSR score matrix.
+        """
+        return (csr_matrix(profiles, dtype=np.float32) @ self.reverse).tocsr()
+
+    def recommend_batch(self, profiles, top_n=10, exclude_profile=True):
+        """
+        Top-n content rows for a block of users.
+        :return: (n_users x top_n) int32 rows, best first, -1 where a user
+                 has fewer than top_n candidates.
+        """
+        scores = self.score_batch(profiles)
+        if exclude_profile:
+            scores = scores - scores.multiply(csr_matrix(profiles).astype(bool))
+            scores.eliminate_zeros()
+        return top_k_rows(scores.tocsr(), top_n)[1]
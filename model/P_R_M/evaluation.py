@@ -0,0 +1,223 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from model.P_R_M.ingestion import load_ratings_matrix
+from model.P_R_M.registry import load_version
+from utils.config import RATINGS_PATH
+
+METRICS = ("precision", "recall", "ndcg", "map")
+
+# Set in each worker by _init_worker; artifacts are memory-mapped, so all
+# workers share one page-cache copy of the factors
+_model = None
+
+
+def split_ratings(matrix, test_size=0.2, seed=42):
+    """
+    Random hold-out split of the stored ratings of a CSR matrix.
+    :return: (train, test) CSR matrices with the same shape.
+    """
+    matrix = matrix.tocoo()
+    is_test = np.random.default_rng(seed).random(matrix.nnz) < test_size
+    parts = []
+    for mask in (~is_test, is_test):
+        parts.append(csr_matrix(
+            (matrix.data[mask], (matrix.row[mask], matrix.col[mask])), shape=matrix.shape
+        ))
+    return tuple(parts)
+
+
+def align_to_model(matrix, user_ids, isbns, model):
+    """
+    Re-index a ratings matrix (from ingestion) onto the model's user and item rows.
+    Users the model doesn't know are dropped; ratings of unknown books are
+    dropped too but still counted as relevant.
+    :return: (user_rows, truth, n_relevant, source_rows) where row i of the
+             boolean CSR truth holds the item rows of model user user_rows[i],
+             and source_rows[i] is that user's row in matrix.
+    """
+    matrix = matrix.tocsr()
+    n_relevant = np.diff(matrix.indptr)
+    model_users = model.users.encode(user_ids)
+    source_rows = np.nonzero((model_users >= 0) & (n_relevant > 0))[0]
+    truth = item_rows_matrix(matrix[source_rows], isbns, model)
+    return model_users[source_rows], truth, n_relevant[source_rows], source_rows
+
+
+def item_rows_matrix(matrix, isbns, model):
+    """Boolean CSR with the columns of an ingestion matrix mapped to model item rows."""
+    coo = matrix.tocoo()
+    model_items = model.items.encode(isbns)[coo.col]
+    known = model_items >= 0
+    out = csr_matrix(
+        (np.ones(int(known.sum()), dtype=bool), (coo.row[known], model_items[known])),
+        shape=(matrix.shape[0], len(model.items))
+    )
+    out.sort_indices()
+    return out
+
+
+def hit_matrix(recommended, truth):
+    """
+    Boolean (n_users x k) matrix: recommended[u, j] is in row u of truth.
+    One searchsorted over (row, item) keys replaces per-user set intersections.
+    """
+    n_items = truth.shape[1]
+    truth_keys = np.repeat(np.arange(truth.shape[0], dtype=np.int64), np.diff(truth.indptr)) * n_items + truth.indices
+    rec_keys = np.arange(recommended.shape[0], dtype=np.int64)[:, None] * n_items + recommended
+    positions = np.minimum(np.searchsorted(truth_keys, rec_keys), max(len(truth_keys) - 1, 0))
+    hits = truth_keys[positions] == rec_keys if len(truth_keys) else np.zeros(rec_keys.shape, dtype=bool)
+    return hits & (recommended >= 0)
+
+
+def ranking_metrics(hits, n_relevant):
+    """
+    Per-user Precision/Recall/NDCG/MAP@k, vectorized over users.
+    :param hits: Boolean (n_users x k) hit matrix in rank order.
+    :param n_relevant: Number of held-out items per user.
+    :return: Dict of metric name -> per-user array.
+    """
+    k = hits.shape[1]
+    n_relevant = np.asarray(n_relevant, dtype=np.float64)
+    n_hits = hits.sum(axis=1)
+
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = (hits * discounts).sum(axis=1)
+    ideal = np.cumsum(discounts)[np.minimum(n_relevant, k).astype(np.int64) - 1]
+
+    precision_at = np.cumsum(hits, axis=1) / np.arange(1, k + 1)
+    average_precision = (precision_at * hits).sum(axis=1) / np.minimum(n_relevant, k)
+    return {
+        "precision": n_hits / k,
+        "recall": n_hits / n_relevant,
+        "ndcg": dcg / ideal,
+        "map": average_precision,
+    }
+
+
+def evaluate_chunk(model, user_rows, truth, n_relevant, k=10, exclude=None):
+    """
+    Score one chunk of users with batched GEMMs and sum their metrics.
+    :param exclude: Optional CSR (chunk users x items) of training items to leave out.
+    :return: Dict of metric name -> sum over the chunk.
+    """
+    exclude_rows = None
+    if exclude is not None:
+        exclude_rows = np.split(exclude.indices, exclude.indptr[1:-1])
+    recommended = np.vstack([
+        top for _, top in model.scorer.recommend_batch(user_rows, top_n=k, exclude=exclude_rows)
+    ]) if len(user_rows) else np.empty((0, k), dtype=np.int64)
+    metrics = ranking_metrics(hit_matrix(recommended, truth), n_relevant)
+    return {name: float(values.sum()) for name, values in metrics.items()}
+
+
+def _init_worker(directory):
+    global _model
+    _model = load_version(directory)
+
+
+def _evaluate_chunk_in_worker(user_rows, truth, n_relevant, k, exclude):
+    return evaluate_chunk(_model, user_rows, truth, n_relevant, k, exclude)
+
+
+def evaluate(model, user_rows, truth, n_relevant, k=10, exclude=None, chunk_size=2000, n_workers=1, directory=None):
+    """
+    Mean ranking metrics@k over all evaluation users.
+    :param model: Loaded ModelVersion (scored in-process when n_workers == 1).
+    :param user_rows: Model user rows, aligned with the rows of truth.
+    :param truth: Boolean CSR of held-out item rows per user.
+    :param n_relevant: Held-out items per user, including books the model doesn't know.
+    :param exclude: Optional CSR of training item rows per user to leave out.
+    :param n_workers: Processes; each maps the artifacts of `directory` read-only.
+    :return: Dict like {"precision@10": ..., "users": ..., "seconds": ...}.
+    """
+    start = time.perf_counter()
+    chunks = [slice(lo, lo + chunk_size) for lo in range(0, len(user_rows), chunk_size)]
+    args = [
+        (user_rows[c], truth[c], n_relevant[c], k, exclude[c] if exclude is not None else None)
+        for c in chunks
+    ]
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(directory,)) as pool:
+            results = list(pool.map(_evaluate_chunk_in_worker, *zip(*args)))
+    else:
+        results = [evaluate_chunk(model, *a) for a in args]
+
+    n_users = max(len(user_rows), 1)
+    report = {f"{name}@{k}": sum(r[name] for r in results) / n_users for name in METRICS}
+    report["users"] = len(user_rows)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def evaluate_version(model, ratings_path=RATINGS_PATH, k=10, test_size=0.2, seed=42, exclude_train=False,
+                     chunk_size=2000, n_workers=1):
+    """
+    Evaluate a ModelVersion on a seeded hold-out split of a ratings CSV.
+    The CSV goes through the cached CSR ingestion, so repeated runs don't re-parse it.
+    :param exclude_train: Leave each user's training ratings out of the top-k.
+    :param n_workers: Processes; each memory-maps the artifacts of model.directory.
+    """
+    matrix, user_ids, isbns = load_ratings_matrix(ratings_path)
+    train, test = split_ratings(matrix, test_size=test_size, seed=seed)
+
+    user_rows, truth, n_relevant, source_rows = align_to_model(test, user_ids, isbns, model)
+    exclude = item_rows_matrix(train[source_rows], isbns, model) if exclude_train else None
+    return evaluate(model, user_rows, truth, n_relevant, k=k, exclude=exclude,
+                    chunk_size=chunk_size, n_workers=n_workers, directory=model.directory)
+
+
+def gate(report, thresholds):
+    """
+    Release gate: compare a report against minimum metric values.
+    :param thresholds: Dict like {"ndcg@10": 0.02}.
+    :return: List of failure messages (empty when the model passes).
+    """
+    return [
+        f"{name} = {report.get(name, 0.0):.4f} < {minimum:.4f}"
+        for name, minimum in thresholds.items()
+        if report.get(name, 0.0) < minimum
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline ranking evaluation of a model version")
+    parser.add_argument("--artifacts", default=None, help="Artifact set directory (default layout if omitted)")
+    parser.add_argument("--ratings", default=RATINGS_PATH)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--exclude-train", action="store_true", help="Leave training ratings out of the top-k")
+    parser.add_argument("--gate", action="append", default=[], metavar="METRIC=MIN",
+                        help="Fail (exit 1) if a metric is below MIN, e.g. --gate ndcg@10=0.02")
+    args = parser.parse_args(argv)
+
+    model = load_version(args.artifacts)
+    report = evaluate_version(
+        model, ratings_path=args.ratings, k=args.k, test_size=args.test_size, seed=args.seed,
+        exclude_train=args.exclude_train, chunk_size=args.chunk_size, n_workers=args.workers
+    )
+    print(f"Model {model.version_id}: {report['users']} users in {report['seconds']:.1f}s")
+    for name in METRICS:
+        print(f"  {name}@{args.k}: {report[f'{name}@{args.k}']:.4f}")
+
+    failures = gate(report, dict(_parse_threshold(g) for g in args.gate))
+    for failure in failures:
+        print(f"GATE FAILED: {failure}")
+    return 1 if failures else 0
+
+
+def _parse_threshold(spec):
+    name, _, value = spec.partition("=")
+    return name, float(value)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import numpy as np
+
+
+def fold_in(item_rows, ratings, item_factors, regularization=None):
+    """
+    Compute a latent vector for a user who has no row in user_factors.
+    Item factors stay fixed; only the new user's vector is solved for.
+
+    With TruncatedSVD factors (user_factors = X @ item_factors), the exact
+    fold-in is the same projection: u = r @ item_factors[items].
+    With a regularization weight the vector is the ridge solution
+    u = (V^T V + reg * I)^-1 V^T r, which matches ALS-trained factors.
+
+    :param item_rows: item_factors rows the user rated.
+    :param ratings: Ratings on the training scale, aligned with item_rows.
+    :param item_factors: (n_items x n_factors) item factor matrix.
+    :param regularization: Ridge weight, or None for the SVD projection.
+    :return: float32 vector of length n_factors.
+    """
+    item_vectors = np.asarray(item_factors[np.asarray(item_rows, dtype=np.int64)], dtype=np.float64)
+    ratings = np.asarray(ratings, dtype=np.float64)
+    if regularization is None:
+        return (ratings @ item_vectors).astype(np.float32)
+
+    n_factors = item_vectors.shape[1]
+    gram = item_vectors.T @ item_vectors + regularization * np.eye(n_factors)
+    return np.linalg.solve(gram, item_vectors.T @ ratings).astype(np.float32)
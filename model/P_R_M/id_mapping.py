@@ -0,0 +1,157 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+
+class IdMapping:
+    """
+    Bidirectional mapping between external IDs (User-IDs, ISBNs) and matrix rows.
+
+    ``keys[row]`` is the external ID of a row. A sorted copy of the keys plus the
+    permutation that sorts them lets ``encode`` resolve whole arrays of IDs with
+    one ``np.searchsorted`` call instead of per-item dict lookups.
+    """
+
+    def __init__(self, keys, order=None):
+        self.keys = np.asarray(keys)
+        if order is None:
+            order = np.argsort(self.keys, kind="stable")
+        self.order = np.asarray(order, dtype=np.int64)
+        self.sorted_keys = self.keys[self.order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return self.encode_one(key) is not None
+
+    @classmethod
+    def from_index_dict(cls, index_to_key):
+        """Build from a {row: key} dict such as the legacy index_to_isbn.pkl."""
+        keys = np.empty(len(index_to_key), dtype=object)
+        for idx, key in index_to_key.items():
+            keys[idx] = key
+        return cls(_compact(keys))
+
+    @classmethod
+    def from_key_dict(cls, key_to_index):
+        """Build from a {key: row} dict such as the legacy book_to_index.pkl."""
+        return cls.from_index_dict({idx: key for key, idx in key_to_index.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["keys"], data["order"])
+
+    def save(self, path):
+        np.savez(path, keys=self.keys, order=self.order)
+
+    def encode(self, ids, missing=-1):
+        """
+        Map external IDs to rows.
+        :param ids: Iterable or array of external IDs.
+        :param missing: Row value returned for unknown IDs.
+        :return: int64 array of rows, ``missing`` where an ID is unknown.
+        """
+        ids = np.asarray(ids)
+        if self.keys.dtype.kind in "iu" and ids.dtype.kind not in "iu":
+            ids = _as_int_ids(ids)
+        if len(self.sorted_keys) == 0 or ids.size == 0:
+            return np.full(ids.shape, missing, dtype=np.int64)
+
+        positions = np.searchsorted(self.sorted_keys, ids)
+        positions = np.minimum(positions, len(self.sorted_keys) - 1)
+        found = self.sorted_keys[positions] == ids
+        return np.where(found, self.order[positions], missing)
+
+    def encode_one(self, key):
+        """Row of a single external ID, or None when unknown."""
+        row = int(self.encode([key])[0])
+        return row if row >= 0 else None
+
+    def decode(self, rows):
+        """Map rows back to external IDs."""
+        return self.keys[np.asarray(rows, dtype=np.int64)]
+
+
+def _compact(keys):
+    """Turn an object array of IDs into a fixed-width int64 or unicode array."""
+    if all(isinstance(key, (int, np.integer)) for key in keys):
+        return keys.astype(np.int64)
+    return keys.astype(str)
+
+
+def _as_int_ids(ids):
+    """Coerce IDs for an integer mapping in one vectorized parse; non-integer values can never match."""
+    values = pd.to_numeric(pd.Series(ids.ravel()), errors="coerce")
+    if values.dtype.kind in "iu":
+        return values.to_numpy(dtype=np.int64).reshape(ids.shape)
+    values = values.to_numpy(dtype=np.float64)
+    integral = np.isfinite(values) & (values == np.round(values))
+    return np.where(integral, values, np.iinfo(np.int64).min).astype(np.int64).reshape(ids.shape)
+
+
+class IdMappings:
+    """
+    The three ID spaces of an artifact set.
+
+    - users: rows of user_factors (Ratings.csv User-IDs)
+    - items: rows of item_factors (rated ISBNs, collaborative filtering order)
+    - content_items: rows of the top-k neighbour graph (Books.csv ISBN order)
+    """
+
+    def __init__(self, users, items, content_items):
+        self.users = users
+        self.items = items
+        self.content_items = content_items
+
+    @classmethod
+    def load(cls, paths):
+        """
+        Load mappings from their .npz files, falling back to the legacy
+        pickled dicts when an artifact set predates the .npz format.
+        :param paths: Dict of artifact paths from model_loader.artifact_paths.
+        """
+        return cls(
+            _load_mapping(paths["user_ids"], paths.get("user_to_index"), IdMapping.from_key_dict),
+            _load_mapping(paths["item_isbns"], paths.get("book_to_index"), IdMapping.from_key_dict),
+            _load_mapping(paths["content_isbns"], paths.get("index_to_isbn"), IdMapping.from_index_dict),
+        )
+
+    def validate(self, user_factors, item_factors, top_k_indices):
+        """Raise ValueError if any mapping disagrees with the arrays it indexes."""
+        checks = [
+            ("users", len(self.users), "user_factors", user_factors.shape[0]),
+            ("items", len(self.items), "item_factors", item_factors.shape[0]),
+            ("content_items", len(self.content_items), "top_k_indices", top_k_indices.shape[0]),
+        ]
+        for mapping, n_keys, array, n_rows in checks:
+            if n_keys != n_rows:
+                raise ValueError(f"ID mapping '{mapping}' has {n_keys} keys but {array} has {n_rows} rows")
+
+
+def _load_mapping(path, legacy_path, from_legacy):
+    try:
+        return IdMapping.load(path)
+    except FileNotFoundError:
+        if legacy_path is None:
+            raise
+    with open(legacy_path, "rb") as f:
+        return from_legacy(pickle.load(f))
+
+
+if __name__ == "__main__":
+    # Convert the legacy pickled dicts of the default layout to .npz mappings
+    from model.P_R_M.model_loader import artifact_paths
+
+    paths = artifact_paths()
+    for name, legacy, from_legacy in [
+        ("user_ids", "user_to_index", IdMapping.from_key_dict),
+        ("item_isbns", "book_to_index", IdMapping.from_key_dict),
+        ("content_isbns", "index_to_isbn", IdMapping.from_index_dict),
+    ]:
+        with open(paths[legacy], "rb") as f:
+            mapping = from_legacy(pickle.load(f))
+        mapping.save(paths[name])
+        print(f"Saved {len(mapping)} keys to {paths[name]}")
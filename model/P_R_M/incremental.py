@@ -0,0 +1,290 @@
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from model.P_R_M.als import write_model_meta
+from model.P_R_M.id_mapping import IdMapping
+from model.P_R_M.model_loader import ARTIFACT_FILES, artifact_paths
+from model.P_R_M.quantization import QUANTIZATION_MODES, QuantizedFactors
+from model.P_R_M.registry import write_current_pointer
+from utils.config import MODEL_ARTIFACTS_DIR
+
+# Prefix of artifact versions written by the incremental updater
+INCREMENTAL_PREFIX = "incr-"
+
+
+class DeltaBuffer:
+    """
+    Ratings received since the last compaction.
+    A user re-rating a book replaces the earlier value.
+    """
+
+    def __init__(self):
+        self._user_ids = []
+        self._isbns = []
+        self._ratings = []
+
+    def __len__(self):
+        return len(self._ratings)
+
+    def add(self, user_ids, isbns, ratings):
+        self._user_ids.extend(user_ids)
+        self._isbns.extend(isbns)
+        self._ratings.extend(ratings)
+
+    def to_arrays(self):
+        """
+        :return: (user_ids, isbns, ratings) arrays with one entry per
+                 (user, book) pair, keeping the latest rating.
+        """
+        user_ids = np.asarray(self._user_ids, dtype=np.int64)
+        isbns = np.asarray(self._isbns, dtype=str)
+        ratings = np.asarray(self._ratings, dtype=np.float32)
+        if len(ratings) == 0:
+            return user_ids, isbns, ratings
+        # np.unique keeps the first occurrence, so look at the buffer back to front
+        pairs = np.char.add(np.char.add(user_ids[::-1].astype(str), ":"), isbns[::-1])
+        _, first = np.unique(pairs, return_index=True)
+        keep = np.sort(len(ratings) - 1 - first)
+        return user_ids[keep], isbns[keep], ratings[keep]
+
+    def clear(self):
+        self._user_ids, self._isbns, self._ratings = [], [], []
+
+
+def sgd_sweeps(user_factors, item_factors, user_rows, item_rows, ratings,
+               n_epochs=5, learning_rate=0.05, regularization=0.02, update_items=True):
+    """
+    Warm-started gradient sweeps over the delta ratings only, updating the
+    touched user and item rows in place.
+    Each sweep is one vectorized step: the squared-error gradient of every
+    delta rating is accumulated per row with np.add.at and averaged over the
+    row's delta ratings, so rows with many new ratings don't take huge steps.
+    :param update_items: False holds the item factors fixed (they are only read).
+    :return: RMSE on the delta ratings after each sweep.
+    """
+    touched_users, user_index = np.unique(user_rows, return_inverse=True)
+    touched_items, item_index = np.unique(item_rows, return_inverse=True)
+    user_counts = np.bincount(user_index)[:, None]
+    item_counts = np.bincount(item_index)[:, None]
+
+    users = np.asarray(user_factors[touched_users], dtype=np.float64)
+    items = np.asarray(item_factors[touched_items], dtype=np.float64)
+    rmse = []
+    for _ in range(n_epochs):
+        u, v = users[user_index], items[item_index]
+        errors = ratings - np.einsum("ij,ij->i", u, v)
+
+        user_grad = np.zeros_like(users)
+        item_grad = np.zeros_like(items)
+        np.add.at(user_grad, user_index, errors[:, None] * v)
+        np.add.at(item_grad, item_index, errors[:, None] * u)
+        users += learning_rate * (user_grad / user_counts - regularization * users)
+        if update_items:
+            items += learning_rate * (item_grad / item_counts - regularization * items)
+
+        errors = ratings - np.einsum("ij,ij->i", users[user_index], items[item_index])
+        rmse.append(float(np.sqrt(np.mean(errors ** 2))))
+
+    user_factors[touched_users] = users
+    if update_items:
+        item_factors[touched_items] = items
+    return rmse
+
+
+def overlay_user_vectors(version, user_ids, isbns, ratings, n_epochs=5, learning_rate=0.05, regularization=0.02):
+    """
+    Live user vectors for ratings received since the last compaction, without
+    copying or rewriting the served factors: the same sweeps as
+    IncrementalUpdater, on the touched users' rows only, with item factors
+    held fixed. Costs O(delta ratings) however large the model is.
+    Users without a factor row are folded in at request time instead, and
+    books the model has never seen wait for the next compaction.
+    :return: (user_ids, vectors) for the users with a factor row.
+    """
+    user_rows = version.users.encode(np.asarray(user_ids, dtype=np.int64))
+    item_rows = version.items.encode(np.asarray(isbns, dtype=str))
+    known = (user_rows >= 0) & (item_rows >= 0)
+    touched, user_index = np.unique(user_rows[known], return_inverse=True)
+    vectors = np.array(version.user_factors[touched], dtype=np.float32)
+    if len(touched):
+        sgd_sweeps(
+            vectors, version.item_factors, user_index, item_rows[known],
+            np.asarray(ratings, dtype=np.float64)[known], n_epochs=n_epochs, learning_rate=learning_rate,
+            regularization=regularization, update_items=False
+        )
+    return version.users.decode(touched), vectors
+
+
+class IncrementalUpdater:
+    """
+    Applies buffered ratings to a copy of a served ModelVersion and writes
+    the result as a new artifact version.
+
+    Users and books the model has never seen get new rows: users are
+    initialized by folding in their delta ratings (see fold_in), books with small random
+    vectors. The content graph is carried over unchanged; quantized factor
+    copies and the IVF index are rebuilt for the new factors.
+    """
+
+    def __init__(self, version, n_epochs=5, learning_rate=0.05, regularization=0.02, seed=42):
+        self.base = version
+        self.n_epochs = n_epochs
+        self.learning_rate = learning_rate
+        self.regularization = regularization
+        self.rng = np.random.default_rng(seed)
+
+        # Writable copies; the served arrays are read-only memory maps
+        self.user_factors = np.array(version.user_factors)
+        self.item_factors = np.array(version.item_factors)
+        self.users = version.users
+        self.items = version.items
+
+    def _extend_users(self, user_ids, item_rows, ratings):
+        is_new = self.users.encode(user_ids) < 0
+        if not is_new.any():
+            return
+        new_ids, owner = np.unique(user_ids[is_new], return_inverse=True)
+        # fold_in for every new user at once: u = r @ item_factors[items]
+        vectors = np.zeros((len(new_ids), self.user_factors.shape[1]), dtype=np.float64)
+        np.add.at(vectors, owner, ratings[is_new, None] * self.item_factors[item_rows[is_new]])
+        vectors = vectors.astype(self.user_factors.dtype)
+        self.user_factors = np.vstack([self.user_factors, vectors])
+        self.users = IdMapping(np.concatenate([self.users.keys, new_ids]))
+
+    def _extend_items(self, isbns):
+        new_isbns = np.unique(isbns[self.items.encode(isbns) < 0])
+        if len(new_isbns) == 0:
+            return
+        scale = self.item_factors.std() or 0.01
+        vectors = self.rng.normal(0, 0.1 * scale, (len(new_isbns), self.item_factors.shape[1]))
+        self.item_factors = np.vstack([self.item_factors, vectors.astype(self.item_factors.dtype)])
+        self.items = IdMapping(np.concatenate([self.items.keys, new_isbns]))
+
+    def apply(self, user_ids, isbns, ratings):
+        """
+        Fold a batch of ratings into the working factors.
+        :param user_ids: User IDs, one per rating.
+        :param isbns: Rated ISBNs.
+        :param ratings: Ratings on the training scale.
+        :return: Dict with counts, per-sweep RMSE on the delta and elapsed seconds.
+        """
+        start = time.perf_counter()
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        isbns = np.asarray(isbns, dtype=str)
+        ratings = np.asarray(ratings, dtype=np.float64)
+
+        # New books first, so new users can be folded in against every rated book
+        self._extend_items(isbns)
+        item_rows = self.items.encode(isbns)
+        self._extend_users(user_ids, item_rows, ratings)
+        user_rows = self.users.encode(user_ids)
+
+        rmse = sgd_sweeps(
+            self.user_factors, self.item_factors, user_rows, item_rows, ratings,
+            n_epochs=self.n_epochs, learning_rate=self.learning_rate, regularization=self.regularization
+        )
+        return {
+            "ratings": len(ratings),
+            "users": len(np.unique(user_rows)),
+            "items": len(np.unique(item_rows)),
+            "new_users": len(self.users) - len(self.base.users),
+            "new_items": len(self.items) - len(self.base.items),
+            "rmse": rmse,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def _content_scores(self):
+        """Per-item content scores for the working items, aligned as in ModelVersion."""
+        new_isbns = self.items.keys[len(self.base.items):]
+        content_rows = self.base.content_items.encode(new_isbns)
+        means = np.asarray(self.base.top_k_similarities[np.maximum(content_rows, 0)]).mean(axis=1)
+        return np.concatenate([self.base.content_scores, np.where(content_rows >= 0, means, 0.0)])
+
+    def _save_derived(self, staging):
+        """Rebuild the artifacts derived from the factors that the base version had."""
+        base_paths = artifact_paths(self.base.directory)
+        for mode in QUANTIZATION_MODES:
+            if not os.path.exists(QuantizedFactors.paths(base_paths["user_factors"], mode)[0]):
+                continue
+            for name in ("user_factors", "item_factors"):
+                QuantizedFactors.quantize(getattr(self, name), mode).save(
+                    os.path.join(staging, ARTIFACT_FILES[name])
+                )
+        if self.base.ann is not None:
+            # The drift of one compaction is small, so keep the trained centroids
+            index = self.base.ann.reassign(self.item_factors, self._content_scores())
+            index.save(os.path.join(staging, ARTIFACT_FILES["ann"]))
+
+    def compact(self, artifacts_dir=MODEL_ARTIFACTS_DIR, version_id=None, update_pointer=True):
+        """
+        Write the working factors as a new artifact version.
+        Unchanged content artifacts are hard-linked from the base version
+        when possible instead of copied; quantized copies and the IVF index
+        are rebuilt when the base version had them.
+        :param update_pointer: Point MODEL_ARTIFACTS_DIR/CURRENT at the new version.
+        :return: (version_id, directory).
+        """
+        version_id = version_id or INCREMENTAL_PREFIX + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        directory = os.path.join(artifacts_dir, version_id)
+        staging = directory + ".tmp"
+        os.makedirs(staging, exist_ok=True)
+
+        np.save(os.path.join(staging, ARTIFACT_FILES["user_factors"]), self.user_factors)
+        np.save(os.path.join(staging, ARTIFACT_FILES["item_factors"]), self.item_factors)
+        self.users.save(os.path.join(staging, ARTIFACT_FILES["user_ids"]))
+        self.items.save(os.path.join(staging, ARTIFACT_FILES["item_isbns"]))
+        self._save_derived(staging)
+
+        base_paths = artifact_paths(self.base.directory)
+        if not os.path.exists(base_paths["content_isbns"]):
+            # Base version still on the legacy pickled mappings
+            self.base.content_items.save(os.path.join(staging, ARTIFACT_FILES["content_isbns"]))
+        # Linked, so the new version keeps the base's content_version
+        for name in ("top_k_similarities", "top_k_indices", "content_isbns", "neighbour_graph"):
+            if os.path.exists(base_paths[name]):
+                _link_or_copy(base_paths[name], os.path.join(staging, ARTIFACT_FILES[name]))
+        if self.base.meta:
+            write_model_meta(
+                os.path.join(staging, ARTIFACT_FILES["model_meta"]),
+                **{**self.base.meta, "incremental_from": self.base.version_id}
+            )
+
+        # The registry only ever sees complete directories
+        os.replace(staging, directory)
+        if update_pointer:
+            write_current_pointer(version_id, artifacts_dir)
+        return version_id, directory
+
+
+def _link_or_copy(source, target):
+    if os.path.isdir(source):
+        os.makedirs(target, exist_ok=True)
+        for name in os.listdir(source):
+            _link_or_copy(os.path.join(source, name), os.path.join(target, name))
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def prune_versions(keep=5, artifacts_dir=MODEL_ARTIFACTS_DIR, current=None):
+    """
+    Delete all but the newest `keep` incremental versions (never the current
+    one); keep=0 disables pruning.
+    :return: List of removed version IDs.
+    """
+    if not os.path.isdir(artifacts_dir):
+        return []
+    versions = sorted(
+        name for name in os.listdir(artifacts_dir)
+        if name.startswith(INCREMENTAL_PREFIX) and not name.endswith(".tmp")
+    )
+    removed = [name for name in versions[:-keep] if name != current] if keep > 0 else []
+    for name in removed:
+        shutil.rmtree(os.path.join(artifacts_dir, name), ignore_errors=True)
+    return removed
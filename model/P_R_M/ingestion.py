@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix, csr_matrix
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: without pyarrow every read falls back to the CSV
+    pa = pq = None
+
+# Rows parsed per read_csv chunk
+DEFAULT_CHUNKSIZE = 200_000
+# Bump when the cached layout changes so stale caches are rebuilt
+CACHE_FORMAT = 1
+
+# Column types of the dataset CSVs, by file name. Unlisted columns are kept as
+# strings. Unparsable integers become -1 (below every rating threshold) and
+# unparsable floats NaN. "category" columns are strings that repeat a lot;
+# Parquet stores them dictionary-encoded and they are read as pandas categoricals.
+DATASET_SCHEMAS = {
+    "Ratings.csv": {"sep": ";", "columns": {"User-ID": "int32", "ISBN": "category", "Rating": "int8"}},
+    "Books.csv": {"sep": ";", "columns": {"ISBN": "string", "Title": "string", "Author": "string",
+                                          "Year": "float32", "Publisher": "string"}},
+    "Users.csv": {"sep": ";", "columns": {"User-ID": "int32", "Age": "float32"}},
+    # Simulated user ids are strings like "user_1"
+    "simulated_clicks.csv": {"sep": ",", "columns": {"user_id": "category", "book_id": "category"}},
+    "simulated_search_history.csv": {"sep": ",", "columns": {"user_id": "category", "query": "string"}},
+}
+_ARROW_TYPES = {"int32": "int32", "int8": "int8", "float32": "float32", "string": "string", "category": "string"}
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-1 of a file's contents, read in blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _schema_of(path):
+    name = os.path.basename(path)
+    if name not in DATASET_SCHEMAS:
+        raise ValueError(f"No dataset schema for {name}")
+    return DATASET_SCHEMAS[name]
+
+
+def _typed(df, schema):
+    """Cast a chunk of string columns to the dataset's column types (categoricals stay strings)."""
+    for column in df.columns:
+        kind = schema["columns"].get(column, "string")
+        if kind in ("int32", "int8"):
+            df[column] = pd.to_numeric(df[column], errors="coerce").fillna(-1).astype(kind)
+        elif kind == "float32":
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(np.float32)
+    return df
+
+
+def parquet_path(path):
+    """Parquet copy of a dataset CSV: <csv dir>/parquet/<name>.parquet."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(path)), "parquet", f"{stem}.parquet")
+
+
+def _parquet_is_fresh(path):
+    """
+    The Parquet copy records the size and mtime of the CSV it was converted
+    from, and the column types it was written with.
+    """
+    target = parquet_path(path)
+    if not os.path.exists(target):
+        return False
+    metadata = pq.read_schema(target).metadata or {}
+    stat = os.stat(path)
+    return (metadata.get(b"source_size") == str(stat.st_size).encode()
+            and metadata.get(b"source_mtime_ns") == str(stat.st_mtime_ns).encode()
+            and metadata.get(b"schema") == _schema_tag(_schema_of(path)).encode())
+
+
+def _schema_tag(schema):
+    """Short hash of a dataset schema, so copies written with older column types are rebuilt."""
+    return hashlib.sha1(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def convert_to_parquet(path, chunksize=DEFAULT_CHUNKSIZE, verbose=True):
+    """
+    Convert a dataset CSV to typed, zstd-compressed Parquet, streaming it in chunks.
+    :return: Path of the Parquet file.
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required for Parquet datasets (pip install pyarrow)")
+    start = time.perf_counter()
+    schema = _schema_of(path)
+    stat = os.stat(path)
+    target = parquet_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    # Per-process staging name: parallel pipeline stages may convert the same file
+    staging = f"{target}.{os.getpid()}.tmp"
+    writer = None
+    try:
+        for chunk in pd.read_csv(path, sep=schema["sep"], chunksize=chunksize, dtype=str):
+            chunk = _typed(chunk, schema)
+            if writer is None:
+                arrow_schema = pa.schema(
+                    [(c, _ARROW_TYPES[schema["columns"].get(c, "string")]) for c in chunk.columns],
+                    metadata={"source_size": str(stat.st_size), "source_mtime_ns": str(stat.st_mtime_ns),
+                              "schema": _schema_tag(schema)}
+                )
+                writer = pq.ParquetWriter(staging, arrow_schema, compression="zstd")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=arrow_schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(staging, target)
+    if verbose:
+        print(f"Converted {os.path.basename(path)} to Parquet in {time.perf_counter() - start:.2f}s")
+    return target
+
+
+def _ensure_parquet(path):
+    """Parquet copy of path when pyarrow is available (converted on first use), else None."""
+    if pq is None:
+        return None
+    if not _parquet_is_fresh(path):
+        convert_to_parquet(path)
+    return parquet_path(path)
+
+
+def read_table(path, columns=None):
+    """
+    Load a dataset CSV as a typed DataFrame.
+    Reads the memory-mapped Parquet copy (only the requested columns) when
+    pyarrow is installed, otherwise parses the CSV with the same types.
+    :param columns: Columns to load (all if None).
+    """
+    schema = _schema_of(path)
+    categories = [c for c, kind in schema["columns"].items() if kind == "category" and (columns is None or c in columns)]
+    source = _ensure_parquet(path)
+    if source is not None:
+        table = pq.read_table(source, columns=columns, memory_map=True, read_dictionary=categories)
+        return table.to_pandas()
+
+    df = _typed(pd.read_csv(path, sep=schema["sep"], usecols=columns, dtype=str), schema)
+    for column in categories:
+        df[column] = df[column].astype("category")
+    return df
+
+
+def iter_chunks(path, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Typed DataFrame chunks of a dataset CSV (categoricals as plain strings), from Parquet when available."""
+    schema = _schema_of(path)
+    source = _ensure_parquet(path)
+    if source is not None:
+        for batch in pq.ParquetFile(source, memory_map=True).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    for chunk in pd.read_csv(path, sep=schema["sep"], usecols=columns, chunksize=chunksize, dtype=str):
+        yield _typed(chunk, schema)
+
+
+class _Codes:
+    """Assigns compact int32 codes to IDs in order of first appearance."""
+
+    def __init__(self):
+        self.code_of = {}
+        self.keys = []
+
+    def encode(self, values):
+        local_codes, uniques = pd.factorize(values)
+        lookup = np.empty(len(uniques), dtype=np.int32)
+        for i, key in enumerate(uniques):
+            code = self.code_of.get(key)
+            if code is None:
+                code = self.code_of[key] = len(self.keys)
+                self.keys.append(key)
+            lookup[i] = code
+        return lookup[local_codes]
+
+
+def read_ratings(path, chunksize=DEFAULT_CHUNKSIZE, min_rating=0):
+    """
+    Stream Ratings.csv (its Parquet copy if pyarrow is installed) into COO arrays.
+    Users and ISBNs get int32 codes in order of first appearance, so rows and
+    columns match the row order of the previous dict-based mappings.
+    :param min_rating: Ratings <= this are dropped (0 is implicit feedback).
+    :return: (rows, cols, ratings, user_ids, isbns).
+    """
+    users, items = _Codes(), _Codes()
+    rows, cols, ratings = [], [], []
+    for chunk in iter_chunks(path, columns=["User-ID", "ISBN", "Rating"], chunksize=chunksize):
+        rating = chunk["Rating"].to_numpy(dtype=np.float32)
+        keep = rating > min_rating
+        if not keep.any():
+            continue
+        rows.append(users.encode(chunk["User-ID"].to_numpy()[keep]))
+        cols.append(items.encode(chunk["ISBN"].to_numpy()[keep]))
+        ratings.append(rating[keep])
+
+    if not ratings:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty, np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64), np.empty(0, dtype=str)
+    return (
+        np.concatenate(rows),
+        np.concatenate(cols),
+        np.concatenate(ratings),
+        np.asarray(users.keys, dtype=np.int64),
+        np.asarray(items.keys, dtype=str),
+    )
+
+
+def to_csr(rows, cols, ratings, shape):
+    """
+    Assemble COO arrays into a CSR matrix in one pass.
+    A user rating the same book twice keeps the later rating, as the
+    cell-by-cell assignment did (COO would otherwise sum duplicates).
+    """
+    keys = rows.astype(np.int64) * shape[1] + cols
+    _, last = np.unique(keys[::-1], return_index=True)
+    keep = len(keys) - 1 - last
+    if len(keep) < len(keys):
+        rows, cols, ratings = rows[keep], cols[keep], ratings[keep]
+    return coo_matrix((ratings, (rows, cols)), shape=shape).tocsr()
+
+
+def load_ratings_matrix(path, cache_dir=None, chunksize=DEFAULT_CHUNKSIZE, min_rating=0, verbose=True):
+    """
+    User-item rating matrix for Ratings.csv, cached as a binary artifact.
+    The cache key is the hash of the CSV contents plus the filter, so an
+    unchanged file is never parsed twice.
+    :param cache_dir: Cache directory (<csv dir>/cache if None).
+    :return: (csr_matrix, user_ids, isbns) where user_ids[row] and isbns[col]
+             are the external IDs.
+    """
+    start = time.perf_counter()
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), "cache")
+    key = f"{file_hash(path)}-min{min_rating}-v{CACHE_FORMAT}"
+    cache_path = os.path.join(cache_dir, f"ratings-{key}.npz")
+
+    if os.path.exists(cache_path):
+        with np.load(cache_path, allow_pickle=False) as data:
+            matrix = csr_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+            user_ids, isbns = data["user_ids"], data["isbns"]
+        if verbose:
+            print(f"Loaded cached rating matrix {matrix.shape} ({matrix.nnz} ratings) in {time.perf_counter() - start:.2f}s")
+        return matrix, user_ids, isbns
+
+    rows, cols, ratings, user_ids, isbns = read_ratings(path, chunksize=chunksize, min_rating=min_rating)
+    matrix = to_csr(rows, cols, ratings, (len(user_ids), len(isbns)))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = cache_path + ".tmp.npz"
+    np.savez(
+        staging,
+        data=matrix.data, indices=matrix.indices, indptr=matrix.indptr, shape=np.asarray(matrix.shape),
+        user_ids=user_ids, isbns=isbns
+    )
+    os.replace(staging, cache_path)
+    if verbose:
+        print(f"Built rating matrix {matrix.shape} ({matrix.nnz} ratings) in {time.perf_counter() - start:.2f}s")
+    return matrix, user_ids, isbns
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert dataset CSVs to typed Parquet")
+    parser.add_argument("paths", nargs="+", help="Ratings.csv, Books.csv, Users.csv or simulated interaction CSVs")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+    for csv_path in args.paths:
+        convert_to_parquet(csv_path, chunksize=args.chunksize)
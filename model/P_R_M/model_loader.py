@@ -0,0 +1,133 @@
+import json
+import mmap
+import os
+
+import numpy as np
+
+from model.P_R_M.id_mapping import IdMappings
+from utils.config import (
+    ANN_INDEX_DIR,
+    INDEX_TO_ISBN_PATH,
+    USER_TO_INDEX_PATH,
+    BOOK_TO_INDEX_PATH,
+    USER_IDS_PATH,
+    ITEM_ISBNS_PATH,
+    CONTENT_ISBNS_PATH,
+    USER_FACTORS_PATH,
+    ITEM_FACTORS_PATH,
+    MODEL_META_PATH,
+    NEIGHBOUR_GRAPH_PATH,
+    TOP_K_SIMILARITIES_PATH,
+    TOP_K_INDICES_PATH,
+    MODEL_MMAP,
+    MODEL_PREFAULT
+)
+
+
+def load_array(path, use_mmap=MODEL_MMAP, prefault=MODEL_PREFAULT):
+    """
+    Load a .npy artifact, memory-mapped read-only by default.
+    Mapped arrays live in the OS page cache, so every worker process that maps
+    the same file shares one physical copy instead of holding a private one.
+    :param path: Path to the .npy file.
+    :param use_mmap: Map the file instead of reading it into the heap.
+    :param prefault: Touch every page now so the first request doesn't pay for it.
+    :return: numpy array (np.memmap when mapped).
+    """
+    array = np.load(path, mmap_mode="r" if use_mmap else None)
+    if use_mmap and prefault:
+        prefault_array(array)
+    return array
+
+
+def prefault_array(array):
+    """
+    Pull all pages of a memory-mapped array into the page cache.
+    :param array: Array returned by load_array.
+    """
+    backing = getattr(array, "_mmap", None)
+    if backing is not None and hasattr(mmap, "MADV_WILLNEED"):
+        backing.madvise(mmap.MADV_WILLNEED)
+
+    # Read one byte per page; madvise is only a hint
+    flat = np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+    int(flat[::mmap.PAGESIZE].sum())
+
+
+# File names inside a versioned artifact directory
+ARTIFACT_FILES = {
+    "user_factors": "user_factors.npy",
+    "item_factors": "item_factors.npy",
+    "top_k_similarities": "top_k_similarities.npy",
+    "top_k_indices": "top_k_indices.npy",
+    "user_ids": "user_ids.npz",
+    "item_isbns": "item_isbns.npz",
+    "content_isbns": "content_isbns.npz",
+    "model_meta": "model_meta.json",
+    # Directory of memory-mappable CSR arrays (see NeighbourGraph.save)
+    "neighbour_graph": "neighbour_graph",
+    # Legacy pickled mappings, only read when the .npz files are missing
+    "user_to_index": "user_to_index.pkl",
+    "book_to_index": "book_to_index.pkl",
+    "index_to_isbn": "index_to_isbn.pkl",
+    # Optional IVF index directory
+    "ann": "ann",
+}
+
+# Artifacts that are plain .npy arrays
+ARRAY_ARTIFACTS = ("user_factors", "item_factors", "top_k_similarities", "top_k_indices")
+
+# Where the original flat layout keeps each artifact
+DEFAULT_ARTIFACT_PATHS = {
+    "user_factors": USER_FACTORS_PATH,
+    "item_factors": ITEM_FACTORS_PATH,
+    "top_k_similarities": TOP_K_SIMILARITIES_PATH,
+    "top_k_indices": TOP_K_INDICES_PATH,
+    "user_ids": USER_IDS_PATH,
+    "item_isbns": ITEM_ISBNS_PATH,
+    "content_isbns": CONTENT_ISBNS_PATH,
+    "model_meta": MODEL_META_PATH,
+    "neighbour_graph": NEIGHBOUR_GRAPH_PATH,
+    "user_to_index": USER_TO_INDEX_PATH,
+    "book_to_index": BOOK_TO_INDEX_PATH,
+    "index_to_isbn": INDEX_TO_ISBN_PATH,
+    "ann": ANN_INDEX_DIR,
+}
+
+
+def artifact_paths(directory=None):
+    """
+    Resolve artifact paths for a versioned directory, or the flat default layout.
+    :param directory: Artifact set directory, or None for the configured paths.
+    :return: Dict mapping artifact name to file path.
+    """
+    if directory is None:
+        return dict(DEFAULT_ARTIFACT_PATHS)
+    return {name: os.path.join(directory, filename) for name, filename in ARTIFACT_FILES.items()}
+
+
+def load_model_meta(directory=None):
+    """Training metadata of an artifact set, or {} for factors trained before it was recorded."""
+    path = artifact_paths(directory)["model_meta"]
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_model_arrays(directory=None, use_mmap=MODEL_MMAP, prefault=MODEL_PREFAULT):
+    """
+    Load the serving artifacts of the hybrid model.
+    :param directory: Artifact set directory, or None for the configured paths.
+    :return: Dict with user_factors, item_factors, top_k_similarities,
+             top_k_indices and the validated IdMappings under "mappings".
+    """
+    paths = artifact_paths(directory)
+    artifacts = {
+        name: load_array(paths[name], use_mmap=use_mmap, prefault=prefault)
+        for name in ARRAY_ARTIFACTS
+    }
+    mappings = IdMappings.load(paths)
+    mappings.validate(artifacts["user_factors"], artifacts["item_factors"], artifacts["top_k_indices"])
+    artifacts["mappings"] = mappings
+    return artifacts
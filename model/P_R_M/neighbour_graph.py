@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class NeighbourGraph:
+    """
+    Top-k content neighbour graph in CSR form.
+
+    Row i lists the neighbours of content item i (Books.csv order, see
+    content_isbns.npz) sorted by descending similarity. Weights are stored as
+    float16, so a 270k-book graph with 100 neighbours per book takes about
+    160 MB instead of the hundreds of GB of a dense similarity matrix.
+    The three arrays are saved as separate .npy files so they can be
+    memory-mapped and shared by every worker process.
+    """
+
+    FILES = ("indptr", "indices", "weights")
+
+    def __init__(self, indptr, indices, weights):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float16)
+
+    @property
+    def n_items(self):
+        return len(self.indptr) - 1
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def __len__(self):
+        return self.n_items
+
+    @classmethod
+    def from_top_k(cls, top_k_similarities, top_k_indices, drop_self=True):
+        """
+        Build from the (n_items x k) top-k arrays.
+        Padding (-1 indices) and non-positive similarities are dropped; so is
+        each item's own entry when drop_self is set.
+        """
+        similarities = np.asarray(top_k_similarities, dtype=np.float32)
+        indices = np.asarray(top_k_indices, dtype=np.int64)
+        rows = np.broadcast_to(np.arange(indices.shape[0])[:, None], indices.shape)
+        keep = (indices >= 0) & (similarities > 0)
+        if drop_self:
+            keep &= indices != rows
+
+        # Sort every row by descending similarity (dropped entries last) in one call
+        order = np.argsort(-np.where(keep, similarities, -np.inf), axis=1, kind="stable")
+        keep = np.take_along_axis(keep, order, axis=1)
+        similarities = np.take_along_axis(similarities, order, axis=1)
+        indices = np.take_along_axis(indices, order, axis=1)
+
+        indptr = np.zeros(indices.shape[0] + 1, dtype=np.int64)
+        np.cumsum(keep.sum(axis=1), out=indptr[1:])
+        return cls(indptr, indices[keep], similarities[keep])
+
+    @classmethod
+    def paths(cls, directory):
+        return {name: os.path.join(directory, f"{name}.npy") for name in cls.FILES}
+
+    @classmethod
+    def exists(cls, directory):
+        return all(os.path.exists(path) for path in cls.paths(directory).values())
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name, path in self.paths(directory).items():
+            np.save(path, getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, load_array=np.load):
+        """
+        Load a graph written by save().
+        :param load_array: Reads one .npy file; pass model_loader.load_array to
+                           memory-map the arrays instead of reading them.
+        """
+        return cls(**{name: load_array(path) for name, path in cls.paths(directory).items()})
+
+    def neighbours(self, item):
+        """
+        Neighbours of one content item, best first.
+        :param item: Row of the item (see content_isbns.npz).
+        :return: (indices int32, weights float16) views into the graph.
+        """
+        start, end = self.indptr[item], self.indptr[item + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def to_csr(self, dtype=np.float32):
+        """scipy CSR matrix (scipy has no float16 sparse support, so weights are upcast)."""
+        return csr_matrix(
+            (self.weights.astype(dtype), self.indices, self.indptr),
+            shape=(self.n_items, self.n_items)
+        )
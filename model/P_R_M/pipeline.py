@@ -0,0 +1,272 @@
+import argparse
+import hashlib
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from model.P_R_M.ingestion import file_hash
+from model.P_R_M.neighbour_graph import NeighbourGraph
+from utils.config import DATASETS_DIR, RATINGS_PATH
+
+PIPELINE_STATE_PATH = os.path.join(DATASETS_DIR, "pipeline_state.json")
+
+
+class Stage:
+    """
+    One pipeline step: func(**inputs, **outputs, **params) reads only the
+    files in inputs and writes only the files in outputs.
+    Inputs and outputs map the function's keyword arguments to paths;
+    writes lists any other files the function produces (e.g. into a
+    directory passed as a parameter).
+    """
+
+    def __init__(self, name, func, inputs, outputs, params=None, writes=()):
+        self.name = name
+        self.func = func
+        self.inputs = dict(inputs)
+        self.outputs = dict(outputs)
+        self.params = dict(params or {})
+        self.writes = list(writes)
+
+    @property
+    def files(self):
+        """Every file the stage writes."""
+        return list(self.outputs.values()) + self.writes
+
+    def key(self, input_hashes):
+        """Cache key: changes when an input's contents, a parameter or the stage function changes."""
+        payload = json.dumps({
+            "func": f"{self.func.__module__}.{self.func.__qualname__}",
+            "inputs": {name: input_hashes[path] for name, path in sorted(self.inputs.items())},
+            "params": self.params,
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _run_stage(stage):
+    """Runs in a fresh worker process, so ru_maxrss is the stage's own peak."""
+    start = time.perf_counter()
+    stage.func(**stage.inputs, **stage.outputs, **stage.params)
+    # ru_maxrss is in KB on Linux; children covers stages with their own process pool
+    peak_mb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    ) / 1024
+    return time.perf_counter() - start, peak_mb
+
+
+class Pipeline:
+    """
+    DAG of stages, wired by file paths: a stage depends on every stage that
+    writes one of its inputs. Stages whose input hashes and parameters match
+    the last successful run (and whose outputs are still in place) are
+    skipped; the rest run as soon as their dependencies finish, independent
+    stages in parallel worker processes.
+    """
+
+    def __init__(self, stages, state_path=PIPELINE_STATE_PATH):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        producers = {path: stage.name for stage in stages for path in stage.files}
+        self.dependencies = {
+            stage.name: {producers[path] for path in stage.inputs.values() if path in producers}
+            for stage in stages
+        }
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        done, visiting = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through stage '{name}'")
+            visiting.add(name)
+            for dependency in self.dependencies[name]:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {"stages": {}, "hashes": {}}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _hash(path, state):
+        """Content hash of a file, re-read only when its size or mtime changed."""
+        stat = os.stat(path)
+        cached = state["hashes"].get(path)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha1"]
+        digest = file_hash(path)
+        state["hashes"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest}
+        return digest
+
+    def _is_fresh(self, stage, key, state):
+        previous = state["stages"].get(stage.name)
+        if previous is None or previous["key"] != key:
+            return False
+        # Outputs deleted or edited since the last run invalidate it too
+        return all(
+            os.path.exists(path) and self._hash(path, state) == previous["outputs"].get(path)
+            for path in stage.files
+        )
+
+    def run(self, n_workers=None, force=(), verbose=True):
+        """
+        Run every stale stage.
+        :param n_workers: Stages run at the same time (CPU count if None).
+        :param force: Stage names to run even if they are up to date.
+        :return: Dict of stage name -> {"status": "ran"|"cached", "seconds", "peak_mb"}.
+        """
+        state = self._load_state()
+        report = {}
+        pending = dict(self.dependencies)
+        running = {}
+
+        with ProcessPoolExecutor(max_workers=n_workers or os.cpu_count(), max_tasks_per_child=1) as pool:
+            while pending or running:
+                for name in [n for n, deps in pending.items() if deps <= report.keys()]:
+                    del pending[name]
+                    stage = self.stages[name]
+                    missing = [path for path in stage.inputs.values() if not os.path.exists(path)]
+                    if missing:
+                        raise FileNotFoundError(f"Stage '{name}' is missing inputs: {', '.join(missing)}")
+                    key = stage.key({path: self._hash(path, state) for path in stage.inputs.values()})
+                    if name not in force and self._is_fresh(stage, key, state):
+                        report[name] = {"status": "cached", "seconds": 0.0, "peak_mb": 0.0}
+                        if verbose:
+                            print(f"[{name}] up to date")
+                        continue
+                    if verbose:
+                        print(f"[{name}] running")
+                    running[pool.submit(_run_stage, stage)] = (name, key)
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, key = running.pop(future)
+                    seconds, peak_mb = future.result()
+                    stage = self.stages[name]
+                    state["stages"][name] = {
+                        "key": key,
+                        "outputs": {path: self._hash(path, state) for path in stage.files},
+                        "seconds": seconds,
+                        "peak_mb": peak_mb,
+                    }
+                    # Saved after every stage, so an interrupted run keeps its progress
+                    self._save_state(state)
+                    report[name] = {"status": "ran", "seconds": seconds, "peak_mb": peak_mb}
+                    if verbose:
+                        print(f"[{name}] done in {seconds:.1f}s, peak {peak_mb:.0f} MB")
+
+        self._save_state(state)
+        return report
+
+
+def default_pipeline(datasets_dir=DATASETS_DIR, ratings_path=RATINGS_PATH, algorithm="svd", factors=50,
+                     regularization=0.1, iterations=15, top_k=100):
+    """The preprocessing.py, content_based_filtering.py and collaborative_filtering.py steps as one DAG."""
+    # Imported here so the runner itself does not pull in sklearn
+    from model.P_R_M.collaborative_filtering import train_factors
+    from model.P_R_M.content_based_filtering import build_content_neighbours
+    from model.datasets.preprocessing import (build_neighbour_graph, build_tfidf, build_user_item_matrix,
+                                              encode_books, encode_interactions, encode_users)
+
+    def path(*parts):
+        return os.path.join(datasets_dir, *parts)
+
+    books_path = path("bookcrossing_dataset", "Books.csv")
+    tfidf_path = path("tfidf_matrix_sparse.npz")
+    top_k_similarities_path = path("top_k_similarities.npy")
+    top_k_indices_path = path("top_k_indices.npy")
+
+    factor_params = {"algorithm": algorithm, "factors": factors}
+    if algorithm == "als":
+        factor_params.update(regularization=regularization, iterations=iterations)
+
+    return Pipeline([
+        Stage("encode_users", encode_users,
+              inputs={"users_path": path("bookcrossing_dataset", "Users.csv")},
+              outputs={"out_path": path("encoded_users.csv")}),
+        Stage("encode_books", encode_books,
+              inputs={"goodreads_path": path("goodreadsbooks", "books.csv"), "books_path": books_path},
+              outputs={"encoded_books_path": path("encoded_books.csv"),
+                       "encoded_books2_path": path("encoded_books2.csv"),
+                       "content_isbns_path": path("content_isbns.npz")}),
+        Stage("user_item_matrix", build_user_item_matrix,
+              inputs={"ratings_path": ratings_path},
+              outputs={"out_path": path("user_item_matrix_sparse.mtx")}),
+        Stage("encode_interactions", encode_interactions,
+              inputs={"clicks_path": path("UserInteractionData", "simulated_clicks.csv"),
+                      "search_path": path("UserInteractionData", "simulated_search_history.csv")},
+              outputs={"clicks_out": path("encoded_clicks.csv"), "search_out": path("encoded_search.csv")}),
+        Stage("tfidf", build_tfidf,
+              inputs={"books_path": books_path},
+              outputs={"tfidf_path": tfidf_path, "vectorizer_path": path("tfidf_vectorizer.pkl")}),
+        Stage("content_neighbours", build_content_neighbours,
+              inputs={"tfidf_path": tfidf_path},
+              outputs={"similarities_path": top_k_similarities_path, "indices_path": top_k_indices_path},
+              params={"top_k": top_k}),
+        # Derived from the top-k arrays: one similarity pass feeds both
+        Stage("neighbour_graph", build_neighbour_graph,
+              inputs={"similarities_path": top_k_similarities_path, "indices_path": top_k_indices_path},
+              outputs={},
+              params={"graph_path": path("neighbour_graph")},
+              writes=list(NeighbourGraph.paths(path("neighbour_graph")).values())),
+        Stage("factors", train_factors,
+              inputs={"ratings_path": ratings_path},
+              outputs={},
+              params={"out_dir": datasets_dir, **factor_params},
+              writes=[path(name) for name in ("user_factors.npy", "item_factors.npy", "user_ids.npz",
+                                              "item_isbns.npz", "model_meta.json")]),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the preprocessing and training stages that are out of date")
+    parser.add_argument("--workers", type=int, default=None, help="Stages run in parallel (CPU count if omitted)")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE", help="Re-run a stage even if cached")
+    parser.add_argument("--ratings", default=RATINGS_PATH)
+    parser.add_argument("--algorithm", choices=["svd", "als"], default="svd")
+    parser.add_argument("--factors", type=int, default=50)
+    parser.add_argument("--regularization", type=float, default=0.1, help="ALS L2 weight")
+    parser.add_argument("--iterations", type=int, default=15, help="ALS sweeps")
+    parser.add_argument("--top-k", type=int, default=100, help="Content neighbours per book")
+    args = parser.parse_args(argv)
+
+    pipeline = default_pipeline(
+        ratings_path=args.ratings, algorithm=args.algorithm, factors=args.factors,
+        regularization=args.regularization, iterations=args.iterations, top_k=args.top_k
+    )
+    unknown = set(args.force) - pipeline.stages.keys()
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    report = pipeline.run(n_workers=args.workers, force=set(args.force))
+    print(f"{'stage':<22}{'status':<8}{'seconds':>10}{'peak MB':>10}")
+    for name, row in report.items():
+        print(f"{name:<22}{row['status']:<8}{row['seconds']:>10.1f}{row['peak_mb']:>10.0f}")
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from model.P_R_M.model_loader import load_array
+
+QUANTIZATION_MODES = ("float32", "float16", "int8")
+
+# Rows dequantized per block while scoring (bounds temporary float32 memory)
+DEQUANTIZE_BLOCK_ROWS = 65536
+
+
+class QuantizedFactors:
+    """
+    Compressed factor matrix that can be scored without decompressing it whole.
+
+    - float32: values stored as float32 (2x smaller than float64); scored
+      directly by BLAS with no conversion, the fastest mode per query
+    - float16: values stored as float16 (4x smaller than float64)
+    - int8: values stored as int8 with one float32 scale per row (8x smaller);
+      ``row ~= values[row] * scales[row]``
+
+    float16 and int8 are scored by walking the matrix in blocks, upcasting
+    one block at a time to float32 for BLAS, so peak extra memory is one
+    block; but every query pays for converting the whole matrix, which makes
+    them slower than float32. They trade latency for memory.
+    """
+
+    def __init__(self, values, scales=None):
+        self.values = values
+        self.scales = scales
+
+    @property
+    def mode(self):
+        if self.scales is not None:
+            return "int8"
+        return "float32" if self.values.dtype == np.float32 else "float16"
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float32)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @classmethod
+    def quantize(cls, factors, mode):
+        """
+        :param factors: Full-precision (n x k) factor matrix.
+        :param mode: "float32", "float16" or "int8".
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        factors = np.asarray(factors, dtype=np.float32)
+        if mode == "float32":
+            return cls(factors)
+        if mode == "float16":
+            return cls(factors.astype(np.float16))
+
+        scales = np.abs(factors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        values = np.clip(np.rint(factors / scales[:, None]), -127, 127).astype(np.int8)
+        return cls(values, scales.astype(np.float32))
+
+    @staticmethod
+    def paths(factors_path, mode):
+        """Files holding the quantized copy of factors_path (e.g. item_factors.npy)."""
+        stem = os.path.splitext(factors_path)[0]
+        return f"{stem}.{mode}.npy", f"{stem}.{mode}_scales.npy"
+
+    def save(self, factors_path):
+        values_path, scales_path = self.paths(factors_path, self.mode)
+        np.save(values_path, self.values)
+        if self.scales is not None:
+            np.save(scales_path, self.scales)
+
+    @classmethod
+    def load(cls, factors_path, mode, use_mmap=True):
+        """Load the quantized copy of factors_path, or return None if it was never built."""
+        values_path, scales_path = cls.paths(factors_path, mode)
+        if not os.path.exists(values_path):
+            return None
+        values = load_array(values_path, use_mmap=use_mmap)
+        scales = load_array(scales_path, use_mmap=use_mmap) if mode == "int8" else None
+        return cls(values, scales)
+
+    def __getitem__(self, rows):
+        """Dequantized float32 rows."""
+        values = np.asarray(self.values[rows], dtype=np.float32)
+        if self.scales is not None:
+            values *= np.asarray(self.scales[rows], dtype=np.float32)[..., None]
+        return values
+
+    def dot(self, vector):
+        """Equivalent of ``factors @ vector`` for a single vector."""
+        return self.dot_many(np.asarray(vector, dtype=np.float32)[None, :])[0]
+
+    def dot_many(self, matrix):
+        """Equivalent of ``matrix @ factors.T``: (n_users x k) -> (n_users x n_rows)."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if self.mode == "float32":
+            # Already BLAS-ready: no per-request conversion
+            return matrix @ np.asarray(self.values).T
+        out = np.empty((matrix.shape[0], self.shape[0]), dtype=np.float32)
+        for start in range(0, self.shape[0], DEQUANTIZE_BLOCK_ROWS):
+            end = min(start + DEQUANTIZE_BLOCK_ROWS, self.shape[0])
+            block = np.asarray(self.values[start:end], dtype=np.float32)
+            np.matmul(matrix, block.T, out=out[:, start:end])
+            if self.scales is not None:
+                out[:, start:end] *= self.scales[start:end]
+        return out
+
+
+def accuracy_report(exact_scorer, quantized_scorer, user_rows, top_n=10):
+    """
+    Compare a quantized scorer with a baseline scorer. For an honest latency
+    comparison the baseline should be the fastest full-precision path
+    (float32 factors), not float64.
+    :return: Dict with recall@top_n against the baseline top-n, mean absolute
+             score error, mean milliseconds per user for both scorers and the
+             quantized/baseline latency ratio.
+    """
+    hits, errors = 0, []
+    exact_time = quantized_time = 0.0
+    for row in user_rows:
+        start = time.perf_counter()
+        exact_top = exact_scorer.recommend(row, top_n=top_n)
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        quantized_top = quantized_scorer.recommend(row, top_n=top_n)
+        quantized_time += time.perf_counter() - start
+
+        hits += len(np.intersect1d(exact_top, quantized_top))
+        errors.append(np.abs(quantized_scorer.score(row) - exact_scorer.score(row)).mean())
+
+    n = len(user_rows)
+    return {
+        f"recall@{top_n}": hits / (n * top_n),
+        "mean_abs_score_error": float(np.mean(errors)),
+        "baseline_ms_per_user": exact_time * 1000 / n,
+        "quantized_ms_per_user": quantized_time * 1000 / n,
+        "latency_ratio": quantized_time / exact_time if exact_time else float("nan"),
+    }
+
+
+if __name__ == "__main__":
+    from model.P_R_M.model_loader import artifact_paths
+    # The class HybridScorer checks for, rather than this script's __main__ copy
+    from model.P_R_M.quantization import QuantizedFactors
+    from model.P_R_M.registry import load_version
+    from model.P_R_M.scoring import HybridScorer
+
+    parser = argparse.ArgumentParser(description="Quantize factor matrices and report accuracy")
+    parser.add_argument("command", choices=["quantize", "report"])
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, default="int8")
+    parser.add_argument("--artifacts", default=None, help="Artifact set directory (default layout if omitted)")
+    parser.add_argument("--users", type=int, default=1000, help="Sampled users for the report")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--rerank", type=int, default=100, help="Shortlist size for exact re-ranking (0 disables)")
+    args = parser.parse_args()
+
+    paths = artifact_paths(args.artifacts)
+    if args.command == "quantize":
+        for name in ("user_factors", "item_factors"):
+            factors = load_array(paths[name])
+            quantized = QuantizedFactors.quantize(factors, args.mode)
+            quantized.save(paths[name])
+            print(f"{name}: {factors.nbytes / 2**20:.1f} MB -> {quantized.nbytes / 2**20:.1f} MB ({args.mode})")
+    else:
+        model = load_version(args.artifacts)
+        rng = np.random.default_rng(42)
+        user_rows = rng.choice(model.n_users, min(args.users, model.n_users), replace=False)
+
+        # Latency is compared with float32 scoring, the fastest full-precision
+        # path; float64 is timed too, since unconverted factors are served that way
+        baselines = {
+            dtype: HybridScorer(
+                np.asarray(model.user_factors, dtype=dtype),
+                np.asarray(model.item_factors, dtype=dtype),
+                model.content_scores,
+                alpha=model.scorer.alpha
+            )
+            for dtype in ("float64", "float32")
+        }
+        baseline = baselines["float32"]
+        float64_ms = accuracy_report(baseline, baselines["float64"], user_rows, top_n=args.top_n)["quantized_ms_per_user"]
+        users = QuantizedFactors.quantize(model.user_factors, args.mode)
+        items = QuantizedFactors.quantize(model.item_factors, args.mode)
+
+        print(f"Factor memory: {(baseline.user_factors.nbytes + baseline.item_factors.nbytes) / 2**20:.1f} MB (float32)"
+              f" -> {(users.nbytes + items.nbytes) / 2**20:.1f} MB ({args.mode})")
+        print(f"[float64] ms_per_user={float64_ms:.4f}")
+        for rerank in sorted({0, args.rerank} if args.mode != "float32" else {0}):
+            quantized = HybridScorer(users, items, model.content_scores, alpha=model.scorer.alpha,
+                                     exact_item_factors=model.item_factors, rerank_size=rerank)
+            report = accuracy_report(baseline, quantized, user_rows, top_n=args.top_n)
+            label = f"{args.mode}, rerank {rerank}" if rerank else f"{args.mode}, no rerank"
+            print(f"[{label}] " + ", ".join(f"{key}={value:.4f}" for key, value in report.items()))
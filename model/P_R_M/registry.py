@@ -0,0 +1,464 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from model.P_R_M.ann_index import IVFIndex
+from model.P_R_M.content_scoring import ContentScorer
+from model.P_R_M.fold_in import fold_in
+from model.P_R_M.model_loader import artifact_paths, load_array, load_model_arrays, load_model_meta
+from model.P_R_M.neighbour_graph import NeighbourGraph
+from model.P_R_M.quantization import QuantizedFactors
+from model.P_R_M.rerank import graph_similarity, mmr
+from model.P_R_M.scoring import HybridScorer
+from utils.config import (
+    ANN_NPROBE,
+    FACTOR_QUANTIZATION,
+    FACTOR_RERANK,
+    MMR_SHORTLIST,
+    MMR_SIMILARITY,
+    MODEL_ARTIFACTS_DIR,
+    MODEL_CURRENT_POINTER
+)
+
+logger = logging.getLogger(__name__)
+
+# Artifacts the content neighbours are derived from (the saved graph is built from the top-k arrays)
+CONTENT_ARTIFACTS = ("top_k_similarities", "top_k_indices", "content_isbns")
+
+
+class ModelNotReady(RuntimeError):
+    """Raised by ModelRegistry.current() while the first model version is still loading."""
+
+
+class ModelVersion:
+    """
+    One immutable, fully loaded artifact set.
+    Requests take a reference to a ModelVersion when they start, so a swap in
+    the registry never changes the arrays underneath a running request.
+    """
+
+    def __init__(self, version_id, artifacts, alpha=0.8, ann=None, quantized=None, directory=None, meta=None,
+                 graph=None, content_version=None):
+        self.version_id = version_id
+        # Changes only when the content artifacts do; incremental versions share it
+        self.content_version = content_version or version_id
+        # Artifact set directory, None for the flat default layout
+        self.directory = directory
+        self.meta = meta or {}
+        self._graph = graph
+        self._content = None
+        self.user_factors = artifacts["user_factors"]
+        self.item_factors = artifacts["item_factors"]
+        self.top_k_similarities = artifacts["top_k_similarities"]
+        self.top_k_indices = artifacts["top_k_indices"]
+        mappings = artifacts["mappings"]
+        self.users = mappings.users
+        self.items = mappings.items
+        self.content_items = mappings.content_items
+
+        # item_factors rows follow Ratings.csv while the top-k graph follows
+        # Books.csv, so line the content scores up by ISBN; books without
+        # content neighbours get no content boost
+        content_rows = self.content_items.encode(self.items.keys)
+        content_means = np.asarray(self.top_k_similarities).mean(axis=1)
+        self.content_scores = np.where(content_rows >= 0, content_means[np.maximum(content_rows, 0)], 0.0)
+        if quantized is not None:
+            # Score on the compressed copies; the full-precision item factors
+            # stay mapped but only the re-ranked shortlist rows are touched
+            quantized_users, quantized_items = quantized
+            # float32 copies score exactly; only lossy modes need the re-rank
+            rerank_size = FACTOR_RERANK if quantized_items.mode != "float32" else 0
+            self.scorer = HybridScorer(
+                quantized_users, quantized_items, self.content_scores, alpha=alpha,
+                exact_item_factors=self.item_factors, rerank_size=rerank_size
+            )
+        else:
+            self.scorer = HybridScorer(self.user_factors, self.item_factors, self.content_scores, alpha=alpha)
+
+        # The IVF index bakes alpha and the catalog into its vectors; ignore a stale one
+        if ann is not None and (ann.n_items != self.item_factors.shape[0] or ann.alpha != alpha):
+            logger.warning(f"Ignoring ANN index for model {version_id}: built for a different catalog or alpha")
+            ann = None
+        self.ann = ann
+
+    @property
+    def graph(self):
+        """Content NeighbourGraph; derived from the top-k arrays on first use if none was saved."""
+        if self._graph is None:
+            self._graph = NeighbourGraph.from_top_k(self.top_k_similarities, self.top_k_indices)
+        return self._graph
+
+    @property
+    def content(self):
+        """ContentScorer over the neighbour graph, built on first use."""
+        if self._content is None:
+            self._content = ContentScorer(self.graph)
+        return self._content
+
+    @property
+    def n_users(self):
+        return self.user_factors.shape[0]
+
+    def user_rows(self, user_ids):
+        """
+        Map user IDs to user_factors rows.
+        :raises KeyError: If any user has no row in user_factors.
+        """
+        rows = self.users.encode(user_ids)
+        if (rows < 0).any():
+            unknown = np.asarray(user_ids)[rows < 0]
+            raise KeyError(f"Unknown user ids: {unknown[:10].tolist()}")
+        return rows
+
+    def to_isbns(self, item_rows):
+        """Map item_factors rows to ISBNs."""
+        return self.items.decode(item_rows).tolist()
+
+    def recommend(self, user_id, top_n=10, exclude=None, diversity=0.0):
+        """
+        Recommend top-n books for a user.
+        :param user_id: ID of the user.
+        :param top_n: Number of recommendations to generate.
+        :param exclude: Sorted item_factors rows to leave out (see seen items).
+        :param diversity: MMR trade-off; 0 keeps pure score order (see diversify).
+        :return: List of recommended book ISBNs.
+        """
+        user_row = self.user_rows([user_id])[0]
+        return self.recommend_vector(self.user_factors[user_row], top_n=top_n, exclude=exclude, diversity=diversity)
+
+    def recommend_vector(self, user_vector, top_n=10, exclude=None, diversity=0.0):
+        """
+        Recommend top-n books for a latent user vector.
+        :return: List of recommended book ISBNs.
+        """
+        shortlist_size = max(MMR_SHORTLIST, top_n) if diversity > 0 else top_n
+        if self.ann is not None and ANN_NPROBE > 0:
+            top_books_indices = self.ann.search(user_vector, top_n=shortlist_size, nprobe=ANN_NPROBE, exclude=exclude)
+        else:
+            top_books_indices = self.scorer.recommend_vector(user_vector, top_n=shortlist_size, exclude=exclude)
+        if diversity > 0:
+            top_books_indices = self.diversify(user_vector, top_books_indices, top_n=top_n, diversity=diversity)
+        return self.to_isbns(top_books_indices)
+
+    def score_items(self, user_vector, item_rows):
+        """
+        Hybrid scores of a few item rows only (e.g. a candidate set), in full precision.
+        Without a user vector only the content prior is left.
+        :return: float32 scores aligned with item_rows.
+        """
+        item_rows = np.asarray(item_rows, dtype=np.int64)
+        scores = self.scorer.item_prior[item_rows].astype(np.float32)
+        if user_vector is not None:
+            factors = np.asarray(self.item_factors[item_rows], dtype=np.float32)
+            scores += self.scorer.alpha * (factors @ np.asarray(user_vector, dtype=np.float32))
+        return scores
+
+    def diversify(self, user_vector, item_rows, top_n=10, diversity=0.3):
+        """
+        Re-rank a shortlist with Maximal Marginal Relevance, so near-duplicates
+        (same author, other editions) don't fill the list.
+        Similarity is cosine over item_factors, or the content neighbour graph
+        when MMR_SIMILARITY is "content".
+        :param item_rows: Shortlisted item_factors rows.
+        :return: top_n item rows in MMR order.
+        """
+        item_rows = np.asarray(item_rows, dtype=np.int64)
+        factors = np.asarray(self.item_factors[item_rows], dtype=np.float32)
+        relevance = self.score_items(user_vector, item_rows)
+        if MMR_SIMILARITY == "content":
+            content_rows = self.content_items.encode(self.items.keys[item_rows])
+            similarity = graph_similarity(self.content.reverse, content_rows)
+            picks = mmr(relevance, top_n=top_n, diversity=diversity, similarity=similarity)
+        else:
+            picks = mmr(relevance, top_n=top_n, diversity=diversity, vectors=factors)
+        return item_rows[picks]
+
+    def fold_in(self, isbns, ratings):
+        """
+        Latent vector for a user without a factor row, from their ratings.
+        Uses the ridge solve for ALS factors and plain projection for SVD
+        (fold_in_regularization in model_meta.json).
+        :param isbns: Rated ISBNs.
+        :param ratings: Ratings on the training scale, aligned with isbns.
+        :return: float32 vector, or None if none of the books are in the model.
+        """
+        item_rows = self.items.encode(isbns)
+        known = item_rows >= 0
+        if not known.any():
+            return None
+        return fold_in(
+            item_rows[known], np.asarray(ratings)[known], self.item_factors,
+            self.meta.get("fold_in_regularization")
+        )
+
+    def recommend_batch(self, user_ids, top_n=10, chunk_size=None, exclude=None):
+        """
+        Recommend top-n books for many users, one GEMM per chunk.
+        :param exclude: Optional sequence with one array of item rows per user.
+        :return: Dict mapping user ID to a list of recommended book ISBNs.
+        """
+        user_ids = np.asarray(user_ids)
+        user_rows = self.user_rows(user_ids)
+        recommendations = {}
+        start = 0
+        for chunk, top_books_indices in self.scorer.recommend_batch(
+            user_rows, top_n=top_n, chunk_size=chunk_size, exclude=exclude
+        ):
+            chunk_ids = user_ids[start:start + len(chunk)].tolist()
+            start += len(chunk)
+            for user_id, top in zip(chunk_ids, top_books_indices):
+                recommendations[user_id] = self.items.decode(top[top >= 0]).tolist()
+        return recommendations
+
+    def warm_up(self, n_queries=100, top_n=10, seed=0):
+        """
+        Run synthetic queries so the first real requests don't pay for page
+        faults on the mapped factors or for building the content graph.
+        :param n_queries: Single-user queries; one batch of as many users follows.
+        :return: Seconds spent.
+        """
+        start = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        if self.n_users:
+            user_ids = self.users.keys[rng.integers(0, self.n_users, n_queries)]
+            for user_id in user_ids:
+                self.recommend(user_id, top_n=top_n)
+            self.recommend_batch(user_ids, top_n=top_n)
+        if self.content.n_items:
+            self.content.recommend(rng.integers(0, self.content.n_items, 5), top_n=top_n)
+        return time.perf_counter() - start
+
+
+def default_version_id(directory=None):
+    """
+    Version ID for an artifact set: the directory name for versioned sets, or a
+    short fingerprint of file sizes and mtimes for the flat default layout.
+    """
+    if directory is not None:
+        return os.path.basename(os.path.normpath(directory))
+    fingerprint = hashlib.sha1()
+    for path in sorted(artifact_paths().values()):
+        if not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        fingerprint.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"default-{fingerprint.hexdigest()[:8]}"
+
+
+def content_version_id(directory=None):
+    """
+    Fingerprint of the content artifacts (top-k graph and content ISBNs).
+    Incremental versions hard-link or copy2 them from their base, which keeps
+    sizes and mtimes, so they share the fingerprint of the version they came from.
+    """
+    paths = artifact_paths(directory)
+    fingerprint = hashlib.sha1()
+    for name in CONTENT_ARTIFACTS:
+        if not os.path.exists(paths[name]):
+            continue
+        stat = os.stat(paths[name])
+        fingerprint.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"content-{fingerprint.hexdigest()[:8]}"
+
+
+def load_version(directory=None, version_id=None):
+    """
+    Load an artifact set into a ModelVersion.
+    :param directory: Artifact set directory, or None for the configured paths.
+    :param version_id: Explicit version ID (derived from the files if None).
+    """
+    version_id = version_id or default_version_id(directory)
+    paths = artifact_paths(directory)
+    artifacts = load_model_arrays(directory)
+    ann = IVFIndex.load(paths["ann"]) if os.path.exists(os.path.join(paths["ann"], "meta.json")) else None
+    graph = None
+    if NeighbourGraph.exists(paths["neighbour_graph"]):
+        graph = NeighbourGraph.load(paths["neighbour_graph"], load_array=load_array)
+    if graph is not None and graph.n_items != len(artifacts["mappings"].content_items):
+        logger.warning(f"Ignoring neighbour graph for model {version_id}: built for a different catalog")
+        graph = None
+    if graph is None:
+        # Build it here, on the loader thread, rather than on the first request
+        graph = NeighbourGraph.from_top_k(artifacts["top_k_similarities"], artifacts["top_k_indices"])
+    return ModelVersion(
+        version_id, artifacts, ann=ann, quantized=load_quantized(directory),
+        directory=directory, meta=load_model_meta(directory), graph=graph,
+        content_version=content_version_id(directory)
+    )
+
+
+def load_quantized(directory=None, mode=FACTOR_QUANTIZATION):
+    """Quantized (user, item) factors for an artifact set, or None if disabled or not built."""
+    if not mode:
+        return None
+    paths = artifact_paths(directory)
+    users = QuantizedFactors.load(paths["user_factors"], mode)
+    items = QuantizedFactors.load(paths["item_factors"], mode)
+    if users is None or items is None:
+        logger.warning(f"FACTOR_QUANTIZATION={mode} but no {mode} factors in {directory or 'default layout'}")
+        return None
+    return users, items
+
+
+def write_current_pointer(version_id, artifacts_dir=MODEL_ARTIFACTS_DIR):
+    """Point CURRENT at version_id; written to a temp file and renamed so readers never see a partial ID."""
+    pointer = os.path.join(artifacts_dir, os.path.basename(MODEL_CURRENT_POINTER))
+    staging = pointer + ".tmp"
+    with open(staging, "w") as f:
+        f.write(version_id)
+    os.replace(staging, pointer)
+
+
+class ModelRegistry:
+    """Holds the live ModelVersion and swaps in new ones without a restart."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._current = None
+        self._loading = None
+        self._initializing = None
+        self._ready = threading.Event()
+        self._failure = None
+
+    def current(self):
+        """
+        Return the live ModelVersion; callers should hold on to it for the whole request.
+        :raises ModelNotReady: If no version has been loaded yet.
+        """
+        current = self._current
+        if current is None:
+            raise ModelNotReady("No model version loaded")
+        return current
+
+    def is_ready(self):
+        """True once a version is loaded (and warmed up, for the initial load)."""
+        return self._ready.is_set()
+
+    def failure(self):
+        """Why the initial load gave up after all its attempts, or None while it is still possible."""
+        return self._failure
+
+    def activate(self, version):
+        """Atomically make version the one served to new requests."""
+        with self._lock:
+            previous, self._current = self._current, version
+        logger.info(
+            f"Model version {version.version_id} activated"
+            + (f" (replacing {previous.version_id})" if previous else "")
+        )
+        return previous
+
+    def load(self, directory=None, version_id=None):
+        """Load an artifact set and activate it once it is fully built."""
+        version = load_version(directory, version_id)
+        self.activate(version)
+        return version
+
+    def load_in_background(self, directory=None, version_id=None):
+        """
+        Load an artifact set on a background thread and swap it in when ready.
+        Does nothing if another load is already running.
+        :return: The loader thread, or None if a load was already in progress.
+        """
+        with self._lock:
+            if self._loading is not None and self._loading.is_alive():
+                return None
+            self._loading = threading.Thread(
+                target=self._load_logged,
+                args=(directory, version_id),
+                name="model-registry-loader",
+                daemon=True
+            )
+            self._loading.start()
+            return self._loading
+
+    def _load_logged(self, directory, version_id):
+        try:
+            self.load(directory, version_id)
+            self._ready.set()
+        except Exception as e:
+            logger.error(f"Failed to load model artifacts from {directory}: {e}")
+
+    def refresh_from_pointer(self):
+        """
+        Start a background load if MODEL_ARTIFACTS_DIR/CURRENT names a version
+        other than the live one. Deploys only have to rewrite that file.
+        """
+        if not os.path.exists(MODEL_CURRENT_POINTER):
+            return None
+        if self._initializing is not None and self._initializing.is_alive():
+            return None  # The initial load reads the pointer itself
+        with open(MODEL_CURRENT_POINTER) as f:
+            version_id = f.read().strip()
+        if not version_id or (self._current is not None and self._current.version_id == version_id):
+            return None
+        return self.load_in_background(os.path.join(MODEL_ARTIFACTS_DIR, version_id), version_id)
+
+    def load_initial(self):
+        """Load the version named by the CURRENT pointer, or the flat default layout."""
+        if os.path.exists(MODEL_CURRENT_POINTER):
+            with open(MODEL_CURRENT_POINTER) as f:
+                version_id = f.read().strip()
+            if version_id:
+                return self.load(os.path.join(MODEL_ARTIFACTS_DIR, version_id), version_id)
+        return self.load()
+
+    def ensure_loaded(self):
+        """
+        Lazy, thread-safe initializer: load the initial version on first use.
+        Concurrent callers wait for the one load instead of each starting their own.
+        :return: The live ModelVersion.
+        """
+        if self._current is None:
+            with self._init_lock:
+                if self._current is None:
+                    self.load_initial()
+        return self._current
+
+    def initialize_in_background(self, warmup_queries=0, max_attempts=5, backoff=2.0):
+        """
+        Load the initial version (and run warm-up queries) on a background
+        thread; is_ready() flips when it is done. Repeated calls are no-ops.
+        A failed attempt is retried after backoff, 2 * backoff, ... seconds;
+        once max_attempts have failed, failure() reports the last error.
+        :return: The initializer thread.
+        """
+        with self._lock:
+            if self._initializing is None:
+                self._initializing = threading.Thread(
+                    target=self._initialize,
+                    args=(warmup_queries, max_attempts, backoff),
+                    name="model-registry-init",
+                    daemon=True
+                )
+                self._initializing.start()
+            return self._initializing
+
+    def _initialize(self, warmup_queries, max_attempts, backoff):
+        for attempt in range(1, max_attempts + 1):
+            try:
+                start = time.perf_counter()
+                version = self.ensure_loaded()
+                logger.info(f"Model {version.version_id} loaded in {time.perf_counter() - start:.2f}s")
+                if warmup_queries:
+                    seconds = version.warm_up(warmup_queries)
+                    logger.info(
+                        f"Model {version.version_id} warmed up with {warmup_queries} queries in {seconds:.2f}s"
+                    )
+                self._ready.set()
+                return
+            except Exception as e:
+                logger.error(f"Failed to load the initial model version (attempt {attempt}/{max_attempts}): {e}")
+                if attempt == max_attempts:
+                    # Reported by the liveness probe, so the process gets restarted
+                    self._failure = f"{type(e).__name__}: {e}"
+                    return
+                time.sleep(backoff * 2 ** (attempt - 1))
+
+
+registry = ModelRegistry()
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+def mmr(relevance, top_n=10, diversity=0.3, vectors=None, similarity=None):
+    """
+    Maximal Marginal Relevance selection over a candidate shortlist.
+
+    Each step picks the candidate maximizing
+    ``(1 - diversity) * relevance - diversity * max_sim_to_selected``.
+    The max similarity to the selected set is kept as a running vector and
+    updated with one product per pick (n x d for vectors, a row read for a
+    precomputed matrix), so a 200-candidate, top-10 list costs a few
+    microseconds per step rather than an n x n similarity matrix.
+    :param relevance: (n,) candidate scores; min-max scaled to [0, 1] so
+                      diversity weighs the two terms on the same scale.
+    :param top_n: Number of candidates to select.
+    :param diversity: 0 keeps score order, 1 ignores scores after the first pick.
+    :param vectors: (n x d) candidate vectors, compared by cosine similarity.
+    :param similarity: (n x n) precomputed candidate similarities (instead of vectors).
+    :return: Positions into the shortlist, in selection order.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    top_n = min(top_n, n)
+    if top_n <= 0:
+        return np.empty(0, dtype=np.int64)
+    if (vectors is None) == (similarity is None):
+        raise ValueError("Pass exactly one of vectors or similarity")
+
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.zeros_like(relevance)
+    if vectors is not None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+
+    gain = (1 - diversity) * relevance
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = np.empty(top_n, dtype=np.int64)
+    for step in range(top_n):
+        marginal = np.where(available, gain - diversity * max_similarity, -np.inf)
+        pick = int(np.argmax(marginal))
+        selected[step] = pick
+        available[pick] = False
+        row = vectors @ vectors[pick] if vectors is not None else similarity[pick]
+        np.maximum(max_similarity, row, out=max_similarity)
+    return selected
+
+
+def graph_similarity(graph_csr, rows):
+    """
+    Dense similarities among a few content rows, read from a sparse neighbour graph.
+    The graph is symmetrized (a pair counts if either book lists the other);
+    rows of -1 (books without content) get zero similarity.
+    :param graph_csr: (n_items x n_items) scipy CSR neighbour graph.
+    :param rows: (n,) content rows of the candidates.
+    :return: (n x n) float32 matrix.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    valid = rows >= 0
+    safe = np.where(valid, rows, 0)
+    block = graph_csr[safe][:, safe].toarray().astype(np.float32)
+    block = np.maximum(block, block.T)
+    block[~valid, :] = 0
+    block[:, ~valid] = 0
+    return block
@@ -0,0 +1,211 @@
+import numpy as np
+
+from model.P_R_M.quantization import QuantizedFactors
+
+# Upper bound on the size of one (users x items) score block in batch mode
+DEFAULT_MAX_CHUNK_BYTES = 256 * 1024 * 1024
+
+
+def select_top_n(scores, top_n):
+    """
+    Return the indices of the top-n scores in descending order.
+    Uses argpartition so only the selected slice gets fully sorted.
+    Items scored -inf (see exclude_items) are never returned: a 1-D result
+    is shortened, a 2-D result is padded with -1.
+    :param scores: 1-D score vector or 2-D (users x items) score matrix.
+    :param top_n: Number of indices to return per row.
+    :return: Array of indices, shape (<= top_n,) or (n_rows, top_n).
+    """
+    n_items = scores.shape[-1]
+    top_n = min(top_n, n_items)
+    if top_n <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+
+    if top_n < n_items:
+        candidates = np.argpartition(scores, -top_n, axis=-1)[..., -top_n:]
+    else:
+        candidates = np.broadcast_to(np.arange(n_items), scores.shape).copy()
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.argsort(-candidate_scores, axis=-1, kind="stable")
+    top = np.take_along_axis(candidates, order, axis=-1)
+    excluded = np.isneginf(np.take_along_axis(candidate_scores, order, axis=-1))
+    if excluded.any():
+        if top.ndim == 1:
+            return top[~excluded]
+        top[excluded] = -1
+    return top
+
+
+def exclude_items(scores, exclude):
+    """
+    Mask items out of top-n selection in place by setting their score to -inf.
+    :param scores: 1-D score vector or 2-D (users x items) score matrix.
+    :param exclude: For 1-D scores an array of item indices; for 2-D scores a
+                    sequence with one array of item indices per row.
+    :return: The same scores array.
+    """
+    if exclude is None:
+        return scores
+    if scores.ndim == 1:
+        scores[np.asarray(exclude, dtype=np.int64)] = -np.inf
+        return scores
+
+    lengths = np.fromiter((len(items) for items in exclude), dtype=np.int64, count=len(exclude))
+    if lengths.sum():
+        rows = np.repeat(np.arange(len(exclude)), lengths)
+        cols = np.concatenate([np.asarray(items, dtype=np.int64) for items in exclude])
+        scores[rows, cols] = -np.inf
+    return scores
+
+
+class HybridScorer:
+    """
+    Vectorized hybrid scorer.
+
+    The hybrid score of a book is ``alpha * cf_score + (1 - alpha) * cb_score``
+    where ``cf_score`` is the user/item factor dot product and ``cb_score`` is the
+    mean of the book's top-k content similarities. The content part does not
+    depend on the user, so it is computed once per item and reused as a prior.
+    Users and items are addressed by row; see id_mapping for external IDs.
+    """
+
+    def __init__(self, user_factors, item_factors, content_scores, alpha=0.8,
+                 exact_item_factors=None, rerank_size=0):
+        """
+        :param user_factors: (n_users x n_factors) latent user vectors (array or QuantizedFactors).
+        :param item_factors: (n_items x n_factors) latent item vectors (array or QuantizedFactors).
+        :param content_scores: Per-item content score aligned with item_factors rows.
+        :param alpha: Weight of the collaborative part.
+        :param exact_item_factors: Full-precision item factors for re-ranking a
+                                   shortlist when item_factors is quantized.
+        :param rerank_size: Shortlist size re-scored in float32 (0 disables).
+        """
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.alpha = alpha
+        self.exact_item_factors = exact_item_factors
+        self.rerank_size = rerank_size if exact_item_factors is not None else 0
+        self.item_prior = ((1 - alpha) * np.asarray(content_scores)).astype(item_factors.dtype, copy=False)
+
+    @property
+    def n_items(self):
+        return self.item_factors.shape[0]
+
+    def score(self, user_row):
+        """
+        Compute hybrid scores for every book for one user.
+        :param user_row: Row index into user_factors.
+        :return: Score vector of length n_items.
+        """
+        return self.score_vector(self.user_factors[user_row])
+
+    def score_vector(self, user_vector):
+        """
+        Compute hybrid scores for every book from a latent user vector.
+        :param user_vector: Latent vector with the same width as item_factors.
+        :return: Score vector of length n_items.
+        """
+        if isinstance(self.item_factors, QuantizedFactors):
+            scores = self.item_factors.dot(user_vector)
+        else:
+            scores = self.item_factors @ user_vector
+        scores *= self.alpha
+        scores += self.item_prior
+        return scores
+
+    def recommend(self, user_row, top_n=10, exclude=None):
+        """
+        Return the item indices of the top-n books for one user.
+        :param user_row: Row index into user_factors.
+        :param top_n: Number of recommendations to generate.
+        :param exclude: Item indices that must not be recommended (e.g. already rated).
+        :return: Array of item indices, best first.
+        """
+        return self.recommend_vector(self.user_factors[user_row], top_n=top_n, exclude=exclude)
+
+    def recommend_vector(self, user_vector, top_n=10, exclude=None):
+        """
+        Return the item indices of the top-n books for a latent user vector
+        (e.g. one folded in from live ratings).
+        :param user_vector: Latent vector with the same width as item_factors.
+        :param top_n: Number of recommendations to generate.
+        :param exclude: Item indices that must not be recommended.
+        :return: Array of item indices, best first.
+        """
+        scores = exclude_items(self.score_vector(user_vector), exclude)
+        if self.rerank_size:
+            top = self.rerank(np.asarray(user_vector)[None, :], scores[None, :], top_n)[0]
+            return top[top >= 0]
+        return select_top_n(scores, top_n)
+
+    def score_batch(self, user_rows):
+        """
+        Compute hybrid scores for a block of users with a single GEMM.
+        :param user_rows: Sequence of row indices into user_factors.
+        :return: Score matrix of shape (len(user_rows), n_items).
+        """
+        return self.score_vectors(self.user_factors[np.asarray(user_rows)])
+
+    def score_vectors(self, user_vectors):
+        """
+        Compute hybrid scores for a block of latent user vectors.
+        :param user_vectors: Matrix of shape (n_users, n_factors).
+        :return: Score matrix of shape (n_users, n_items).
+        """
+        if isinstance(self.item_factors, QuantizedFactors):
+            scores = self.item_factors.dot_many(user_vectors)
+        else:
+            scores = user_vectors @ self.item_factors.T
+        scores *= self.alpha
+        scores += self.item_prior
+        return scores
+
+    def chunk_size_for(self, max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+        """Number of users whose score rows fit in max_chunk_bytes."""
+        row_bytes = self.n_items * np.dtype(self.item_factors.dtype).itemsize
+        return max(1, max_chunk_bytes // max(row_bytes, 1))
+
+    def recommend_batch(self, user_rows, top_n=10, chunk_size=None, exclude=None):
+        """
+        Yield the top-n item indices for many users, one chunk at a time.
+        Only one (chunk_size x n_items) score block is alive at any moment.
+        :param user_rows: Sequence of row indices into user_factors.
+        :param top_n: Number of recommendations per user.
+        :param chunk_size: Users per GEMM; derived from DEFAULT_MAX_CHUNK_BYTES if None.
+        :param exclude: Optional sequence with one array of item indices per user.
+        :return: Generator of (user_rows_chunk, top_indices) pairs; top_indices
+                 is -1 where a user has fewer than top_n items left.
+        """
+        user_rows = np.asarray(user_rows)
+        chunk_size = chunk_size or self.chunk_size_for()
+        for start in range(0, len(user_rows), chunk_size):
+            chunk = user_rows[start:start + chunk_size]
+            scores = self.score_batch(chunk)
+            if exclude is not None:
+                exclude_items(scores, exclude[start:start + chunk_size])
+            if self.rerank_size:
+                yield chunk, self.rerank(self.user_factors[chunk], scores, top_n)
+            else:
+                yield chunk, select_top_n(scores, top_n)
+
+    def rerank(self, user_vectors, scores, top_n):
+        """
+        Re-score the best rerank_size items per user with full-precision factors.
+        :param user_vectors: (n_users x n_factors) latent user vectors.
+        :param scores: (n_users x n_items) approximate scores, -inf for excluded items.
+        :return: (n_users x top_n) item indices, best first, -1 padded.
+        """
+        shortlist = select_top_n(scores, max(self.rerank_size, top_n))
+        # Shortlist slots of excluded items are -1; score them -inf so they stay out
+        valid = shortlist >= 0
+        rows = np.where(valid, shortlist, 0)
+        exact_vectors = np.asarray(self.exact_item_factors[rows], dtype=np.float32)
+        exact = np.einsum("uk,urk->ur", np.asarray(user_vectors, dtype=np.float32), exact_vectors)
+        exact *= self.alpha
+        exact += self.item_prior[rows]
+        exact[~valid] = -np.inf
+        order = select_top_n(exact, top_n)
+        top = np.take_along_axis(shortlist, np.maximum(order, 0), axis=-1)
+        top[order < 0] = -1
+        return top
@@ -0,0 +1,126 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import load_npz
+
+from utils.config import DATASETS_DIR
+
+# Memory one worker's similarity block may take. A block of TF-IDF rows can
+# share a term with nearly every book, so its product is sized as if dense.
+DEFAULT_BLOCK_MEMORY_MB = 512
+# float32 similarity + int32 column index per stored entry
+BYTES_PER_ENTRY = 8
+
+# Set in each worker by _init_worker so blocks don't re-send the matrix
+_matrix = None
+_matrix_t = None
+
+
+def l2_normalize_rows(matrix):
+    """Scale every row of a CSR matrix to unit length so dot products are cosines."""
+    matrix = matrix.tocsr().astype(np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+    return matrix
+
+
+def top_k_rows(block, top_k, exclude_offset=None):
+    """
+    Row-wise top-k of a sparse CSR block, vectorized across all rows.
+    Stored entries are sorted once by (row, -similarity, column) with
+    np.lexsort; each entry's rank within its row then decides if it is kept.
+    :param block: (n_rows x n_items) CSR similarity block.
+    :param exclude_offset: If given, row i's own item (exclude_offset + i) is dropped.
+    :return: (similarities float32, indices int32), both (n_rows x top_k);
+             rows with fewer than top_k neighbours are padded with 0 / -1.
+    """
+    n_rows = block.shape[0]
+    rows = np.repeat(np.arange(n_rows), np.diff(block.indptr))
+    cols = block.indices
+    sims = block.data
+    if exclude_offset is not None:
+        keep = cols != rows + exclude_offset
+        rows, cols, sims = rows[keep], cols[keep], sims[keep]
+
+    order = np.lexsort((cols, -sims, rows))
+    rows, cols, sims = rows[order], cols[order], sims[order]
+    row_starts = np.searchsorted(rows, np.arange(n_rows))
+    rank = np.arange(len(rows)) - row_starts[rows]
+    keep = rank < top_k
+
+    top_sims = np.zeros((n_rows, top_k), dtype=np.float32)
+    top_indices = np.full((n_rows, top_k), -1, dtype=np.int32)
+    top_sims[rows[keep], rank[keep]] = sims[keep]
+    top_indices[rows[keep], rank[keep]] = cols[keep]
+    return top_sims, top_indices
+
+
+def block_rows_for_budget(n_items, memory_mb=DEFAULT_BLOCK_MEMORY_MB):
+    """Rows per block so that a dense (rows x n_items) product stays within memory_mb."""
+    return max(1, int(memory_mb * 2 ** 20 // (max(n_items, 1) * BYTES_PER_ENTRY)))
+
+
+def _init_worker(matrix):
+    global _matrix, _matrix_t
+    _matrix = matrix
+    _matrix_t = matrix.T.tocsr()
+
+
+def _block_top_k(start, end, top_k, exclude_self):
+    # Sparse x sparse^T only touches rows that share a term with the block
+    similarities = (_matrix[start:end] @ _matrix_t).tocsr()
+    return start, top_k_rows(similarities, top_k, start if exclude_self else None)
+
+
+def build_top_k(matrix, top_k=100, block_rows=None, n_workers=None, exclude_self=False, verbose=True):
+    """
+    Cosine top-k neighbours of every row of a TF-IDF matrix on CPU cores.
+    :param matrix: (n_books x n_terms) sparse TF-IDF matrix.
+    :param top_k: Neighbours kept per book.
+    :param block_rows: Rows per block; bounds each worker's sparse product.
+                       Sized from DEFAULT_BLOCK_MEMORY_MB if None.
+    :param n_workers: Worker processes (all cores if None).
+    :param exclude_self: Drop each book from its own neighbour list.
+    :return: (top_k_similarities float32, top_k_indices int32).
+    """
+    matrix = l2_normalize_rows(matrix)
+    n_rows = matrix.shape[0]
+    if block_rows is None:
+        block_rows = block_rows_for_budget(n_rows)
+    top_similarities = np.zeros((n_rows, top_k), dtype=np.float32)
+    top_indices = np.full((n_rows, top_k), -1, dtype=np.int32)
+
+    started = time.perf_counter()
+    blocks = [(start, min(start + block_rows, n_rows)) for start in range(0, n_rows, block_rows)]
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(matrix,)) as pool:
+        futures = [pool.submit(_block_top_k, start, end, top_k, exclude_self) for start, end in blocks]
+        for done, future in enumerate(futures, 1):
+            start, (sims, indices) = future.result()
+            top_similarities[start:start + len(sims)] = sims
+            top_indices[start:start + len(indices)] = indices
+            if verbose and (done % 10 == 0 or done == len(futures)):
+                print(f"{done}/{len(futures)} blocks, {time.perf_counter() - started:.1f}s")
+    return top_similarities, top_indices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the top-k content neighbour arrays from the TF-IDF matrix")
+    parser.add_argument("--tfidf", default=os.path.join(DATASETS_DIR, "tfidf_matrix_sparse.npz"))
+    parser.add_argument("--out", default=DATASETS_DIR, help="Directory for top_k_similarities.npy/top_k_indices.npy")
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--block-rows", type=int, default=None,
+                        help=f"Rows per block (default: sized for {DEFAULT_BLOCK_MEMORY_MB} MB per worker)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--exclude-self", action="store_true")
+    args = parser.parse_args()
+
+    similarities, indices = build_top_k(
+        load_npz(args.tfidf), top_k=args.top_k, block_rows=args.block_rows,
+        n_workers=args.workers, exclude_self=args.exclude_self
+    )
+    np.save(os.path.join(args.out, "top_k_similarities.npy"), similarities)
+    np.save(os.path.join(args.out, "top_k_indices.npy"), indices)
@@ -150,112 +150,149 @@ faiss.write_index(cpu_index, "faiss_index.index")
 print("Preprocessing completed and files saved!")
 """
 
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder
 from sklearn.feature_extraction.text import TfidfVectorizer
 from scipy.sparse import csr_matrix, save_npz
 from scipy.io import mmwrite
 import pickle
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+from model.P_R_M.content_based_filtering import build_content_neighbours
+from model.P_R_M.id_mapping import IdMapping
+from model.P_R_M.ingestion import read_table
+from model.P_R_M.neighbour_graph import NeighbourGraph
+from utils.config import DATASETS_DIR
 
-# Load Users.csv with Age as string
-users_df = pd.read_csv("bookcrossing_dataset/Users.csv", sep=";", dtype={"User-ID": str, "Age": str})
-# Replace empty strings and invalid entries with NaN
-users_df["Age"] = users_df["Age"].replace({"": None, " canada": None})
-# Convert Age to float
-users_df["Age"] = pd.to_numeric(users_df["Age"], errors="coerce")
-# Fill missing Age in users_df
-users_df["Age"] = users_df["Age"].fillna("Unknown")
-# Save the encoded users data
-users_df.to_csv("encoded_users.csv", index=False)
+# Each step is a function so model/P_R_M/pipeline.py can run it as a cached
+# stage; `python -m model.datasets.preprocessing` from the repository root
+# does all of them in order.
 
-# Load books data
-books_df = pd.read_csv("goodreadsbooks/books.csv", on_bad_lines='skip')
-books2_df = pd.read_csv("bookcrossing_dataset/Books.csv", delimiter=";")
 
-# Create a mapping from index to ISBN
-index_to_isbn = {idx: isbn for idx, isbn in enumerate(books2_df["ISBN"])}
+def encode_users(users_path="bookcrossing_dataset/Users.csv", out_path="encoded_users.csv"):
+    # Load Users.csv; the dataset layer parses Age as float (invalid entries become NaN)
+    users_df = read_table(users_path)
+    # Fill missing Age in users_df
+    users_df["Age"] = users_df["Age"].fillna("Unknown")
+    # Save the encoded users data
+    users_df.to_csv(out_path, index=False)
 
-# Save the mapping to a file
-with open("index_to_isbn.pkl", "wb") as f:
-    pickle.dump(index_to_isbn, f)
 
-# Fill missing values in books2_df
-books2_df["Author"] = books2_df["Author"].fillna("Unknown")
-books2_df["Publisher"] = books2_df["Publisher"].fillna("Unknown")
-# Ensure Year is numeric
-books2_df["Year"] = pd.to_numeric(books2_df["Year"], errors="coerce")
+def encode_books(goodreads_path="goodreadsbooks/books.csv", books_path="bookcrossing_dataset/Books.csv",
+                 encoded_books_path="encoded_books.csv", encoded_books2_path="encoded_books2.csv",
+                 content_isbns_path="content_isbns.npz"):
+    # Load books data
+    books_df = pd.read_csv(goodreads_path, on_bad_lines='skip')
+    books2_df = read_table(books_path)
 
-# Encode Author and Publisher
-author_encoder = LabelEncoder()
-books2_df["Author_Encoded"] = author_encoder.fit_transform(books2_df["Author"])
+    # Save the row -> ISBN mapping of the content matrices (Books.csv order)
+    IdMapping(books2_df["ISBN"].to_numpy(dtype=str)).save(content_isbns_path)
 
-publisher_encoder = LabelEncoder()
-books2_df["Publisher_Encoded"] = publisher_encoder.fit_transform(books2_df["Publisher"])
+    # Fill missing values in books2_df
+    books2_df["Author"] = books2_df["Author"].fillna("Unknown")
+    books2_df["Publisher"] = books2_df["Publisher"].fillna("Unknown")
+    # Ensure Year is numeric
+    books2_df["Year"] = pd.to_numeric(books2_df["Year"], errors="coerce")
+
+    # Encode Author and Publisher
+    author_encoder = LabelEncoder()
+    books2_df["Author_Encoded"] = author_encoder.fit_transform(books2_df["Author"])
 
-# One-hot encode language_code in books_df
-books_df = pd.get_dummies(books_df, columns=["language_code"])
+    publisher_encoder = LabelEncoder()
+    books2_df["Publisher_Encoded"] = publisher_encoder.fit_transform(books2_df["Publisher"])
 
-# Save the encoded books data
-books2_df.to_csv("encoded_books2.csv", index=False)
-books_df.to_csv("encoded_books.csv", index=False)
+    # One-hot encode language_code in books_df
+    books_df = pd.get_dummies(books_df, columns=["language_code"])
 
-# Load ratings data
-ratings_df = pd.read_csv("bookcrossing_dataset/Ratings.csv", sep=";")
+    # Save the encoded books data
+    books2_df.to_csv(encoded_books2_path, index=False)
+    books_df.to_csv(encoded_books_path, index=False)
 
-# Ensure ratings are numeric
-ratings_df["Rating"] = pd.to_numeric(ratings_df["Rating"], errors="coerce")
-# Filter out implicit feedback (ratings = 0)
-ratings_df = ratings_df[ratings_df["Rating"] > 0]
 
-# Filter users with at least 5 ratings
-user_counts = ratings_df["User-ID"].value_counts()
-ratings_df = ratings_df[ratings_df["User-ID"].isin(user_counts[user_counts >= 5].index)]
+def build_user_item_matrix(ratings_path="bookcrossing_dataset/Ratings.csv", out_path="user_item_matrix_sparse.mtx"):
+    # Load ratings data (typed columns, ISBN as categorical)
+    ratings_df = read_table(ratings_path, columns=["User-ID", "ISBN", "Rating"])
 
-# Filter books with at least 10 ratings
-book_counts = ratings_df["ISBN"].value_counts()
-ratings_df = ratings_df[ratings_df["ISBN"].isin(book_counts[book_counts >= 10].index)]
+    # Filter out implicit feedback (ratings = 0)
+    ratings_df = ratings_df[ratings_df["Rating"] > 0]
 
-# Map User-ID and ISBN to categorical codes for sparse matrix indices
-ratings_df["User-ID"] = ratings_df["User-ID"].astype("category").cat.codes
-ratings_df["ISBN"] = ratings_df["ISBN"].astype("category").cat.codes
+    # Filter users with at least 5 ratings
+    user_counts = ratings_df["User-ID"].value_counts()
+    ratings_df = ratings_df[ratings_df["User-ID"].isin(user_counts[user_counts >= 5].index)]
 
-# Create a sparse user-item matrix
-user_item_matrix = csr_matrix((ratings_df["Rating"], 
-                               (ratings_df["User-ID"], ratings_df["ISBN"])))
+    # Filter books with at least 10 ratings
+    book_counts = ratings_df["ISBN"].value_counts()
+    ratings_df = ratings_df[ratings_df["ISBN"].isin(book_counts[book_counts >= 10].index)]
 
-# Save the sparse matrix
-mmwrite("user_item_matrix_sparse.mtx", user_item_matrix)
+    # Map User-ID and ISBN to categorical codes for sparse matrix indices.
+    # read_table returns ISBN as a categorical over every ISBN in the file, so
+    # drop the categories the filters removed or they would become empty columns
+    for column in ("User-ID", "ISBN"):
+        ratings_df[column] = ratings_df[column].astype("category").cat.remove_unused_categories().cat.codes
 
-# Load simulated data
-clicks_df = pd.read_csv("UserInteractionData/simulated_clicks.csv")
-search_df = pd.read_csv("UserInteractionData/simulated_search_history.csv")
+    # Create a sparse user-item matrix
+    user_item_matrix = csr_matrix((ratings_df["Rating"],
+                                   (ratings_df["User-ID"], ratings_df["ISBN"])))
 
-# Encode query in search_df
-query_encoder = LabelEncoder()
-search_df["query_encoded"] = query_encoder.fit_transform(search_df["query"])
+    # Save the sparse matrix
+    mmwrite(out_path, user_item_matrix)
 
-# Save the encoded simulated data
-clicks_df.to_csv("encoded_clicks.csv", index=False)
-search_df.to_csv("encoded_search.csv", index=False)
 
-# Vectorize Title and Author for content-based filtering
-books2_df["Title_Author"] = books2_df["Title"] + " " + books2_df["Author"]
-tfidf = TfidfVectorizer(stop_words="english", max_features=5000)
-tfidf_matrix = tfidf.fit_transform(books2_df["Title_Author"])
+def encode_interactions(clicks_path="UserInteractionData/simulated_clicks.csv",
+                        search_path="UserInteractionData/simulated_search_history.csv",
+                        clicks_out="encoded_clicks.csv", search_out="encoded_search.csv"):
+    # Load simulated data
+    clicks_df = read_table(clicks_path)
+    search_df = read_table(search_path)
 
-# Save the TF-IDF matrix
-save_npz("tfidf_matrix_sparse.npz", tfidf_matrix)
+    # Encode query in search_df
+    query_encoder = LabelEncoder()
+    search_df["query_encoded"] = query_encoder.fit_transform(search_df["query"])
 
-# Save the TF-IDF vectorizer
-with open("tfidf_vectorizer.pkl", "wb") as f:
-    pickle.dump(tfidf, f)
+    # Save the encoded simulated data
+    clicks_df.to_csv(clicks_out, index=False)
+    search_df.to_csv(search_out, index=False)
 
-# Compute cosine similarity matrix
-similarity_matrix = cosine_similarity(tfidf_matrix)
 
-# Save the similarity matrix
-with open("similarity_matrix.pkl", "wb") as f:
-    pickle.dump(similarity_matrix, f)
+def build_tfidf(books_path="bookcrossing_dataset/Books.csv", tfidf_path="tfidf_matrix_sparse.npz",
+                vectorizer_path="tfidf_vectorizer.pkl"):
+    books2_df = read_table(books_path, columns=["Title", "Author"])
+    books2_df["Author"] = books2_df["Author"].fillna("Unknown")
 
-print("Preprocessing completed and files saved!")
+    # Vectorize Title and Author for content-based filtering
+    books2_df["Title_Author"] = books2_df["Title"] + " " + books2_df["Author"]
+    tfidf = TfidfVectorizer(stop_words="english", max_features=5000)
+    tfidf_matrix = tfidf.fit_transform(books2_df["Title_Author"])
+
+    # Save the TF-IDF matrix
+    save_npz(tfidf_path, tfidf_matrix)
+
+    # Save the TF-IDF vectorizer
+    with open(vectorizer_path, "wb") as f:
+        pickle.dump(tfidf, f)
+
+
+def build_neighbour_graph(similarities_path="top_k_similarities.npy", indices_path="top_k_indices.npy",
+                          graph_path="neighbour_graph"):
+    # Top-k cosine neighbours per book from content_based_filtering.py, so the
+    # graph and the served top-k arrays come from the same similarity pass;
+    # each book's own entry is dropped
+    top_k_similarities = np.load(similarities_path, mmap_mode="r")
+    top_k_indices = np.load(indices_path, mmap_mode="r")
+
+    # Save the neighbour graph (CSR, float16 weights) as .npy files in graph_path
+    NeighbourGraph.from_top_k(top_k_similarities, top_k_indices, drop_self=True).save(graph_path)
+
+
+if __name__ == "__main__":
+    # The default paths are relative to model/datasets
+    os.chdir(DATASETS_DIR)
+    encode_users()
+    encode_books()
+    build_user_item_matrix()
+    encode_interactions()
+    build_tfidf()
+    build_content_neighbours()
+    build_neighbour_graph()
+
+    print("Preprocessing completed and files saved!")
@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pytest
+
+from model.P_R_M.id_mapping import IdMapping
+from model.P_R_M.model_loader import ARTIFACT_FILES
+
+
+@pytest.fixture
+def artifact_dir(tmp_path):
+    """
+    A small versioned artifact set: 30 users, 40 rated books and a 50-book
+    content catalog whose first 40 books are the rated ones.
+    """
+    rng = np.random.default_rng(0)
+    directory = tmp_path / "artifacts" / "v1"
+    directory.mkdir(parents=True)
+
+    def path(name):
+        return os.path.join(directory, ARTIFACT_FILES[name])
+
+    np.save(path("user_factors"), rng.normal(size=(30, 4)).astype(np.float32))
+    np.save(path("item_factors"), rng.normal(size=(40, 4)).astype(np.float32))
+    IdMapping(np.arange(100, 130)).save(path("user_ids"))
+    isbns = np.array([f"isbn{i:03d}" for i in range(50)])
+    IdMapping(isbns[:40]).save(path("item_isbns"))
+    IdMapping(isbns).save(path("content_isbns"))
+
+    # Five neighbours per book, never the book itself
+    indices = (np.arange(50)[:, None] + np.arange(1, 6)[None, :]) % 50
+    np.save(path("top_k_indices"), indices.astype(np.int32))
+    np.save(path("top_k_similarities"), rng.uniform(0.1, 0.9, size=(50, 5)).astype(np.float32))
+    return str(directory)
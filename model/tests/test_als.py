@@ -0,0 +1,71 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from model.P_R_M.als import row_blocks, solve_block, train_als
+
+
+def _low_rank_ratings(n_users=60, n_items=40, rank=3, density=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    dense = rng.normal(size=(n_users, rank)) @ rng.normal(size=(rank, n_items))
+    observed = rng.random(dense.shape) < density
+    # User 7 and item 11 have no ratings at all
+    observed[7] = False
+    observed[:, 11] = False
+    return csr_matrix(np.where(observed, dense, 0))
+
+
+def test_solve_block_matches_per_row_normal_equations():
+    matrix = _low_rank_ratings()
+    fixed = np.random.default_rng(1).normal(size=(matrix.shape[1], 4))
+    out = np.full((matrix.shape[0], 4), np.nan)
+
+    solve_block(matrix, fixed, 0.5, out, 5, 20)
+
+    for user in range(5, 20):
+        items = matrix[user].indices
+        ratings = matrix[user].data
+        vectors = fixed[items]
+        expected = (np.linalg.solve(vectors.T @ vectors + 0.5 * np.eye(4), vectors.T @ ratings)
+                    if len(items) else np.zeros(4))
+        np.testing.assert_allclose(out[user], expected, rtol=1e-6, atol=1e-9)
+    # Rows outside the block are untouched
+    assert np.isnan(out[:5]).all() and np.isnan(out[20:]).all()
+
+
+def test_row_blocks_cover_every_row_once():
+    indptr = np.array([0, 3, 3, 10, 11, 12, 20])
+
+    blocks = row_blocks(indptr, block_nnz=4)
+
+    assert blocks[0][0] == 0 and blocks[-1][1] == 6
+    assert all(end == next_start for (_, end), (next_start, _) in zip(blocks, blocks[1:]))
+
+
+def test_converges_on_low_rank_data():
+    matrix = _low_rank_ratings()
+
+    _, _, history = train_als(matrix, n_factors=3, regularization=0.01, n_iter=15, n_threads=2, verbose=False)
+
+    rmse = [step["rmse"] for step in history]
+    assert rmse[-1] < 0.05 * rmse[0]
+    assert all(later <= earlier + 1e-6 for earlier, later in zip(rmse, rmse[1:]))
+
+
+def test_same_seed_gives_the_same_factors():
+    matrix = _low_rank_ratings()
+
+    first = train_als(matrix, n_factors=3, n_iter=3, n_threads=4, seed=7, verbose=False)
+    second = train_als(matrix, n_factors=3, n_iter=3, n_threads=1, seed=7, verbose=False)
+    other_seed = train_als(matrix, n_factors=3, n_iter=3, seed=8, verbose=False)
+
+    np.testing.assert_array_equal(first[0], second[0])
+    np.testing.assert_array_equal(first[1], second[1])
+    assert not np.array_equal(first[1], other_seed[1])
+
+
+def test_unrated_users_and_items_get_zero_rows():
+    user_factors, item_factors, _ = train_als(_low_rank_ratings(), n_factors=3, n_iter=2, verbose=False)
+
+    assert np.isfinite(user_factors).all() and np.isfinite(item_factors).all()
+    assert not user_factors[7].any()
+    assert not item_factors[11].any()
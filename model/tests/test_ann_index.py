@@ -0,0 +1,30 @@
+import numpy as np
+
+from model.P_R_M.ann_index import IVFIndex
+from model.P_R_M.scoring import HybridScorer
+
+
+def _index(n_items=20, n_lists=2):
+    rng = np.random.default_rng(0)
+    item_factors = rng.normal(size=(n_items, 4)).astype(np.float32)
+    content_scores = rng.random(n_items)
+    return IVFIndex.build(item_factors, content_scores, n_lists=n_lists), item_factors, content_scores
+
+
+def test_full_probe_matches_exact_scoring():
+    index, item_factors, content_scores = _index()
+    scorer = HybridScorer(np.eye(4, dtype=np.float32), item_factors, content_scores)
+    user_vector = np.array([0.5, -1.0, 0.2, 0.3], dtype=np.float32)
+
+    top = index.search(user_vector, top_n=5, nprobe=index.n_lists)
+
+    assert top.tolist() == scorer.recommend_vector(user_vector, top_n=5).tolist()
+
+
+def test_search_skips_excluded_items():
+    index, _, _ = _index()
+
+    # Scanning every list leaves only two items
+    top = index.search(np.ones(4, dtype=np.float32), top_n=5, nprobe=index.n_lists, exclude=np.arange(18))
+
+    assert sorted(top.tolist()) == [18, 19]
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from model.P_R_M.candidates import CandidatePipeline, cf_candidates, content_candidates, popular_candidates
+from model.P_R_M.registry import load_version
+
+
+@pytest.fixture
+def model(artifact_dir):
+    return load_version(artifact_dir)
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = CandidatePipeline()
+    yield pipeline
+    pipeline.shutdown()
+
+
+def test_cf_candidates_are_the_exact_top_k(model):
+    user_vector = np.asarray(model.user_factors[3])
+
+    rows = cf_candidates(model, {"user_vector": user_vector, "exclude": np.array([0, 1])}, k=5)
+
+    scores = model.score_items(user_vector, np.arange(40))
+    scores[[0, 1]] = -np.inf
+    assert rows.tolist() == np.argsort(-scores, kind="stable")[:5].tolist()
+    assert len(cf_candidates(model, {}, k=5)) == 0
+
+
+def test_content_candidates_sum_neighbour_similarities(model):
+    # isbn000 lists content rows 1..5 and isbn001 lists 2..6; rows listed twice add up
+    rows = content_candidates(model, {"recent_isbns": ["isbn000", "isbn001", "unknown"]}, k=4)
+
+    totals = np.zeros(50)
+    for row in (0, 1):
+        np.add.at(totals, model.top_k_indices[row], model.top_k_similarities[row])
+    assert rows.tolist() == np.argsort(-totals, kind="stable")[:4].tolist()
+
+
+def test_content_candidates_skip_books_without_factors(model):
+    # isbn045's neighbours are content rows 46..49 and 0; only isbn000 has an item_factors row
+    assert content_candidates(model, {"recent_isbns": ["isbn045"]}).tolist() == [0]
+    assert len(content_candidates(model, {"recent_isbns": ["unknown"]})) == 0
+    assert len(content_candidates(model, {})) == 0
+
+
+def test_popular_candidates_drop_unknown_isbns(model):
+    context = {"popular_isbns": ["isbn007", "unknown", "isbn045", "isbn002"]}
+
+    assert popular_candidates(model, context).tolist() == [7, 2]
+    assert popular_candidates(model, context, k=1).tolist() == [7]
+
+
+def test_merges_sources_and_applies_the_exclusion_mask(model):
+    sources = {"a": lambda model, context: [1, 2, 3, 3], "b": lambda model, context: [3, 4, 5]}
+    pipeline = CandidatePipeline(sources)
+    try:
+        ranked, report = pipeline.recommend(model, {"exclude": np.array([4])}, top_n=10)
+    finally:
+        pipeline.shutdown()
+
+    assert sorted(ranked.tolist()) == [1, 2, 3, 5]
+    assert report["candidates"] == {"a": 4, "b": 3, "merged": 4}
+
+
+def test_ranks_candidates_by_hybrid_score(model, pipeline):
+    user_vector = np.asarray(model.user_factors[0])
+    context = {
+        "user_vector": user_vector,
+        "recent_isbns": ["isbn010", "isbn020"],
+        "popular_isbns": ["isbn030", "isbn031"],
+        "exclude": np.array([11, 30]),
+    }
+
+    ranked, report = pipeline.recommend(model, context, top_n=5)
+
+    candidates = np.unique(np.concatenate([
+        cf_candidates(model, context), content_candidates(model, context), popular_candidates(model, context)
+    ]))
+    candidates = candidates[~np.isin(candidates, [11, 30])]
+    scores = model.score_items(user_vector, candidates)
+    assert ranked.tolist() == candidates[np.argsort(-scores, kind="stable")[:5]].tolist()
+    assert report["candidates"]["merged"] == len(candidates)
+    assert {"cf", "content", "popular", "generate", "merge", "rank", "total"} <= report["ms"].keys()
+
+
+def test_no_candidates(model, pipeline):
+    ranked, report = pipeline.recommend(model, {"recent_isbns": ["unknown"], "popular_isbns": ["unknown"]})
+
+    assert ranked.tolist() == []
+    assert report["candidates"] == {"cf": 0, "content": 0, "popular": 0, "merged": 0}
@@ -0,0 +1,67 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from model.P_R_M.content_scoring import ContentScorer
+from model.P_R_M.neighbour_graph import NeighbourGraph
+
+
+def _graph(n_items=30, k=4, seed=0):
+    rng = np.random.default_rng(seed)
+    indices = np.array([rng.choice(n_items, size=k, replace=False) for _ in range(n_items)])
+    similarities = rng.uniform(0.1, 1.0, size=(n_items, k)).astype(np.float32)
+    return NeighbourGraph.from_top_k(similarities, indices)
+
+
+def test_score_matches_dense_graph_product():
+    graph = _graph()
+    dense = graph.to_csr().toarray()
+    scorer = ContentScorer(graph)
+    profile = np.array([3, 7, 7, 20])
+    weights = np.array([1.0, 0.5, 2.0, 3.0], dtype=np.float32)
+
+    # x counts a repeated item once per occurrence
+    x = np.bincount(profile, minlength=30).astype(np.float32)
+    np.testing.assert_allclose(scorer.score(profile), dense @ x, rtol=1e-6)
+    x_weighted = np.bincount(profile, weights=weights, minlength=30).astype(np.float32)
+    np.testing.assert_allclose(scorer.score(profile, weights), dense @ x_weighted, rtol=1e-6)
+
+
+def test_recommend_matches_dense_ranking():
+    graph = _graph()
+    dense = graph.to_csr().toarray()
+    scorer = ContentScorer(graph)
+    profile = np.array([1, 2, 5])
+
+    expected = dense[:, profile].sum(axis=1)
+    expected[profile] = 0
+    top = scorer.recommend(profile, top_n=5)
+
+    assert top.tolist() == np.argsort(-expected, kind="stable")[:5].tolist()
+    assert (expected[top] > 0).all()
+
+
+def test_batch_matches_single_profiles():
+    graph = _graph()
+    scorer = ContentScorer(graph)
+    dense_profiles = np.zeros((3, 30), dtype=np.float32)
+    dense_profiles[0, [1, 2, 5]] = 1
+    dense_profiles[1, [0, 29]] = 1
+    dense_profiles[2, 4] = 1
+    profiles = csr_matrix(dense_profiles)
+
+    scores = scorer.score_batch(profiles).toarray()
+    top = scorer.recommend_batch(profiles, top_n=3)
+
+    for user in range(3):
+        rows = profiles[user].indices
+        np.testing.assert_allclose(scores[user], scorer.score(rows), rtol=1e-6)
+        single = scorer.recommend(rows, top_n=3)
+        assert top[user][top[user] >= 0].tolist() == single.tolist()
+
+
+def test_user_without_rated_items():
+    scorer = ContentScorer(_graph())
+
+    assert not scorer.score([]).any()
+    assert scorer.recommend([], top_n=5).tolist() == []
+    assert (scorer.recommend_batch(csr_matrix((2, 30), dtype=np.float32), top_n=3) == -1).all()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from model.P_R_M.evaluation import hit_matrix, ranking_metrics, split_ratings
+
+
+def _truth(rows, n_items):
+    indptr = np.cumsum([0] + [len(row) for row in rows])
+    indices = np.concatenate([np.sort(row) for row in rows]).astype(np.int32)
+    return csr_matrix((np.ones(len(indices), dtype=bool), indices, indptr), shape=(len(rows), n_items))
+
+
+def test_hit_matrix_matches_set_membership():
+    truth = _truth([[1, 4], [], [0, 2, 3]], n_items=5)
+    recommended = np.array([[4, 0, 1], [1, 2, 3], [3, -1, -1]])
+
+    hits = hit_matrix(recommended, truth)
+
+    assert hits.tolist() == [[True, False, True], [False, False, False], [True, False, False]]
+
+
+def test_hit_matrix_with_empty_truth():
+    truth = _truth([[], []], n_items=3)
+
+    assert not hit_matrix(np.array([[0, 1], [2, 0]]), truth).any()
+
+
+def test_ranking_metrics_against_hand_computed_values():
+    hits = np.array([[True, False, True], [False, False, False]])
+
+    metrics = ranking_metrics(hits, n_relevant=[4, 1])
+
+    assert metrics["precision"] == pytest.approx([2 / 3, 0])
+    assert metrics["recall"] == pytest.approx([2 / 4, 0])
+    dcg = 1 + 1 / np.log2(4)
+    ideal = 1 + 1 / np.log2(3) + 1 / np.log2(4)
+    assert metrics["ndcg"] == pytest.approx([dcg / ideal, 0])
+    # Precision at the hit ranks (1 and 2/3) over min(relevant, k)
+    assert metrics["map"] == pytest.approx([(1 + 2 / 3) / 3, 0])
+
+
+def test_split_ratings_partitions_the_matrix():
+    rng = np.random.default_rng(0)
+    matrix = csr_matrix(rng.integers(0, 3, (20, 15)).astype(np.float32))
+
+    train, test = split_ratings(matrix, test_size=0.25, seed=1)
+
+    assert train.shape == test.shape == matrix.shape
+    assert train.nnz + test.nnz == matrix.nnz
+    assert abs(train + test - matrix).sum() == 0
+    assert train.multiply(test).nnz == 0
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from model.P_R_M.als import write_model_meta
+from model.P_R_M.fold_in import fold_in
+from model.P_R_M.model_loader import ARTIFACT_FILES
+from model.P_R_M.registry import load_version
+
+
+def test_svd_fold_in_reproduces_the_user_factor_row():
+    rng = np.random.default_rng(0)
+    ratings = rng.uniform(0, 10, size=(5, 12)) * (rng.random((5, 12)) < 0.5)
+    # TruncatedSVD: user_factors = X @ V with orthonormal item factors V
+    item_factors = np.linalg.svd(ratings, full_matrices=False)[2][:3].T
+    user_factors = ratings @ item_factors
+
+    rated = np.nonzero(ratings[2])[0]
+    vector = fold_in(rated, ratings[2, rated], item_factors)
+
+    assert vector.dtype == np.float32
+    np.testing.assert_allclose(vector, user_factors[2], rtol=1e-5, atol=1e-6)
+
+
+def test_ridge_fold_in_solves_the_normal_equations():
+    item_factors = np.random.default_rng(1).normal(size=(10, 3))
+    rows, ratings = np.array([1, 4, 7, 8]), np.array([8.0, 6.0, 10.0, 2.0])
+
+    vector = fold_in(rows, ratings, item_factors, regularization=0.5)
+
+    vectors = item_factors[rows]
+    expected = np.linalg.solve(vectors.T @ vectors + 0.5 * np.eye(3), vectors.T @ ratings)
+    np.testing.assert_allclose(vector, expected, rtol=1e-5)
+
+
+def test_model_version_fold_in(artifact_dir):
+    model = load_version(artifact_dir)
+
+    assert model.fold_in(["unknown", "isbn045"], [8, 6]) is None
+    # Books without a factor row are ignored
+    projected = model.fold_in(["isbn003", "unknown", "isbn010"], np.array([8.0, 6.0, 4.0]))
+    np.testing.assert_allclose(projected, fold_in([3, 10], [8.0, 4.0], model.item_factors), rtol=1e-6)
+
+
+def test_model_version_fold_in_uses_the_trained_regularization(artifact_dir):
+    write_model_meta(os.path.join(artifact_dir, ARTIFACT_FILES["model_meta"]), "als", fold_in_regularization=0.1)
+    model = load_version(artifact_dir)
+
+    vector = model.fold_in(["isbn003", "isbn010"], [8.0, 4.0])
+
+    np.testing.assert_allclose(vector, fold_in([3, 10], [8.0, 4.0], model.item_factors, 0.1), rtol=1e-6)
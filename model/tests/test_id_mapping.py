@@ -0,0 +1,42 @@
+import numpy as np
+
+from model.P_R_M.id_mapping import IdMapping
+
+
+def test_encode_returns_rows_and_missing_for_unknown_ids():
+    mapping = IdMapping(np.array(["isbn3", "isbn1", "isbn2"]))
+
+    rows = mapping.encode(["isbn2", "nope", "isbn3", "isbn1", "zzz"])
+
+    assert rows.dtype == np.int64
+    assert rows.tolist() == [2, -1, 0, 1, -1]
+    assert mapping.encode([], missing=-7).tolist() == []
+    assert IdMapping(np.array([], dtype=str)).encode(["isbn1"]).tolist() == [-1]
+
+
+def test_integer_mapping_accepts_string_ids():
+    mapping = IdMapping(np.array([30, 10, 20], dtype=np.int64))
+
+    assert mapping.encode(["20", "10", "user_1", "40"]).tolist() == [2, 1, -1, -1]
+    assert mapping.encode(np.array([30, 25])).tolist() == [0, -1]
+
+
+def test_encode_one_decode_and_contains():
+    mapping = IdMapping(np.array([7, 3, 5]))
+
+    assert mapping.encode_one(5) == 2
+    assert mapping.encode_one(4) is None
+    assert 3 in mapping and 8 not in mapping
+    assert mapping.decode([2, 0]).tolist() == [5, 7]
+
+
+def test_save_load_and_legacy_dicts(tmp_path):
+    mapping = IdMapping.from_key_dict({"b": 1, "a": 0, "c": 2})
+    path = str(tmp_path / "isbns.npz")
+    mapping.save(path)
+
+    loaded = IdMapping.load(path)
+
+    assert loaded.keys.tolist() == ["a", "b", "c"]
+    assert loaded.encode(["c", "a"]).tolist() == [2, 0]
+    assert IdMapping.from_index_dict({0: 11, 1: 12}).keys.dtype == np.int64
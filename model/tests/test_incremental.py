@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+from model.P_R_M.ann_index import IVFIndex
+from model.P_R_M.incremental import DeltaBuffer, IncrementalUpdater, overlay_user_vectors, prune_versions
+from model.P_R_M.model_loader import artifact_paths
+from model.P_R_M.quantization import QuantizedFactors
+from model.P_R_M.registry import load_version
+
+
+def test_delta_buffer_keeps_latest_rating_per_pair():
+    buffer = DeltaBuffer()
+    buffer.add([1, 2, 1], ["a", "a", "a"], [3.0, 4.0, 8.0])
+    buffer.add([1], ["b"], [5.0])
+
+    user_ids, isbns, ratings = buffer.to_arrays()
+
+    assert list(zip(user_ids.tolist(), isbns.tolist(), ratings.tolist())) == [(2, "a", 4.0), (1, "a", 8.0), (1, "b", 5.0)]
+
+
+def test_overlay_leaves_served_factors_untouched(artifact_dir):
+    version = load_version(artifact_dir)
+    before = np.array(version.user_factors)
+    items_before = np.array(version.item_factors)
+
+    # User 100 rates two known books; 999 has no factor row; "new" is not in the model
+    user_ids, vectors = overlay_user_vectors(
+        version, [100, 100, 999, 100], ["isbn001", "isbn002", "isbn001", "new"], [9.0, 8.0, 7.0, 10.0], n_epochs=20
+    )
+
+    assert user_ids.tolist() == [100]
+    np.testing.assert_array_equal(version.user_factors, before)
+    np.testing.assert_array_equal(version.item_factors, items_before)
+    items = items_before[[1, 2]]
+    # The sweeps move the vector towards the new ratings
+    assert np.abs(items @ vectors[0] - [9.0, 8.0]).sum() < np.abs(items @ before[0] - [9.0, 8.0]).sum()
+
+
+def test_compact_rebuilds_quantized_factors_and_ann_index(artifact_dir):
+    base_paths = artifact_paths(artifact_dir)
+    base = load_version(artifact_dir)
+    IVFIndex.build(base.item_factors, base.content_scores, n_lists=3).save(base_paths["ann"])
+    for name in ("user_factors", "item_factors"):
+        QuantizedFactors.quantize(np.load(base_paths[name]), "int8").save(base_paths[name])
+    base = load_version(artifact_dir)
+
+    updater = IncrementalUpdater(base)
+    updater.apply([100, 200], ["isbn001", "isbn045"], [8.0, 6.0])
+    version_id, directory = updater.compact(artifacts_dir=os.path.dirname(artifact_dir), update_pointer=False)
+    compacted = load_version(directory)
+
+    assert compacted.n_users == 31 and compacted.item_factors.shape[0] == 41
+    # The new book has Books.csv content, so it gets a content score like the others
+    assert compacted.content_scores[-1] > 0
+    assert compacted.ann is not None and compacted.ann.n_items == 41
+    assert compacted.ann.n_lists == base.ann.n_lists
+    paths = artifact_paths(directory)
+    for name in ("user_factors", "item_factors"):
+        quantized = QuantizedFactors.load(paths[name], "int8")
+        assert quantized.shape == np.load(paths[name]).shape
+    assert not os.path.exists(QuantizedFactors.paths(paths["user_factors"], "float16")[0])
+
+
+def test_prune_keeps_newest_and_current(tmp_path):
+    for name in ("incr-1", "incr-2", "incr-3", "incr-4.tmp", "v1"):
+        (tmp_path / name).mkdir()
+
+    removed = prune_versions(keep=1, artifacts_dir=str(tmp_path), current="incr-1")
+
+    assert removed == ["incr-2"]
+    assert sorted(os.listdir(tmp_path)) == ["incr-1", "incr-3", "incr-4.tmp", "v1"]
+
+
+def test_compacted_version_keeps_the_content_version(artifact_dir):
+    base = load_version(artifact_dir)
+    updater = IncrementalUpdater(base)
+    updater.apply([100], ["isbn001"], [8.0])
+    version_id, directory = updater.compact(artifacts_dir=os.path.dirname(artifact_dir), update_pointer=False)
+
+    compacted = load_version(directory)
+
+    assert compacted.version_id != base.version_id
+    assert compacted.content_version == base.content_version
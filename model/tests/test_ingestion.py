@@ -0,0 +1,96 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from model.P_R_M import ingestion
+from utils.config import DATASETS_DIR
+
+SIMULATED_DIR = os.path.join(DATASETS_DIR, "UserInteractionData")
+
+
+@pytest.fixture(params=["parquet", "csv"])
+def reader(request, monkeypatch):
+    """Run each test through the Parquet copy and through the plain CSV fallback."""
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(ingestion, "pq", None)
+    return request.param
+
+
+def _copy(tmp_path, name):
+    # Reading converts next to the CSV, so work on a copy outside the repository
+    target = tmp_path / name
+    shutil.copy(os.path.join(SIMULATED_DIR, name), target)
+    return str(target)
+
+
+@pytest.mark.parametrize("name, column", [
+    ("simulated_clicks.csv", "book_id"),
+    ("simulated_search_history.csv", "query"),
+])
+def test_read_table_keeps_simulated_user_ids(tmp_path, reader, name, column):
+    path = _copy(tmp_path, name)
+    expected = pd.read_csv(path)
+
+    df = ingestion.read_table(path)
+
+    assert df["user_id"].astype(str).tolist() == expected["user_id"].tolist()
+    assert df[column].astype(str).tolist() == expected[column].astype(str).tolist()
+
+
+def test_read_table_types_ratings(tmp_path, reader):
+    path = tmp_path / "Ratings.csv"
+    path.write_text("User-ID;ISBN;Rating\n7;0001;5\n8;000X;bad\n7;0002;0\n")
+
+    df = ingestion.read_table(str(path), columns=["User-ID", "ISBN", "Rating"])
+
+    assert df["User-ID"].dtype == np.int32
+    assert df["Rating"].dtype == np.int8
+    assert isinstance(df["ISBN"].dtype, pd.CategoricalDtype)
+    # ISBNs keep leading zeros and letters; an unparsable rating becomes -1
+    assert df["ISBN"].astype(str).tolist() == ["0001", "000X", "0002"]
+    assert df["Rating"].tolist() == [5, -1, 0]
+
+
+def test_parquet_copy_rebuilt_when_csv_changes(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "Ratings.csv"
+    path.write_text("User-ID;ISBN;Rating\n1;a;5\n")
+    assert len(ingestion.read_table(str(path))) == 1
+
+    path.write_text("User-ID;ISBN;Rating\n1;a;5\n2;b;6\n")
+    os.utime(path, ns=(1, 1))
+
+    assert len(ingestion.read_table(str(path))) == 2
+
+
+def test_to_csr_keeps_the_later_duplicate():
+    rows = np.array([0, 1, 0], dtype=np.int32)
+    cols = np.array([2, 0, 2], dtype=np.int32)
+    ratings = np.array([3.0, 4.0, 9.0], dtype=np.float32)
+
+    matrix = ingestion.to_csr(rows, cols, ratings, (2, 3))
+
+    assert matrix.nnz == 2
+    assert matrix[0, 2] == 9.0
+    assert matrix[1, 0] == 4.0
+
+
+def test_load_ratings_matrix_drops_implicit_and_caches(tmp_path, reader):
+    path = tmp_path / "Ratings.csv"
+    path.write_text("User-ID;ISBN;Rating\n10;x;5\n11;y;0\n10;y;7\n12;x;8\n")
+
+    matrix, user_ids, isbns = ingestion.load_ratings_matrix(str(path), cache_dir=str(tmp_path / "cache"),
+                                                            verbose=False)
+    cached = ingestion.load_ratings_matrix(str(path), cache_dir=str(tmp_path / "cache"), verbose=False)
+
+    # Codes follow first appearance among the explicit ratings
+    assert user_ids.tolist() == [10, 12]
+    assert isbns.tolist() == ["x", "y"]
+    assert matrix.toarray().tolist() == [[5, 7], [8, 0]]
+    assert (cached[0] != matrix).nnz == 0
+    assert len(os.listdir(tmp_path / "cache")) == 1
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+
+from model.P_R_M.model_loader import artifact_paths, load_array
+from model.P_R_M.neighbour_graph import NeighbourGraph
+from model.P_R_M.registry import load_version
+
+
+def _graph():
+    similarities = np.array([[1.0, 0.5, 0.9], [0.2, 0.0, 0.7], [0.3, 0.4, 1.0]], dtype=np.float32)
+    indices = np.array([[0, 1, 2], [0, 2, -1], [0, 1, 2]])
+    return NeighbourGraph.from_top_k(similarities, indices)
+
+
+def test_from_top_k_sorts_rows_and_drops_self_and_padding():
+    graph = _graph()
+
+    assert graph.n_items == 3 and graph.nnz == 5
+    indices, weights = graph.neighbours(0)
+    assert indices.tolist() == [2, 1]
+    assert weights.astype(np.float32).tolist() == [np.float16(0.9), 0.5]
+    # Item 1: the zero similarity to 2 and the -1 padding are dropped
+    assert graph.neighbours(1)[0].tolist() == [0]
+    assert graph.to_csr().toarray()[2].tolist() == [np.float32(np.float16(0.3)), np.float32(np.float16(0.4)), 0]
+
+
+def test_save_and_load_memory_mapped(tmp_path):
+    directory = str(tmp_path / "neighbour_graph")
+    _graph().save(directory)
+
+    graph = NeighbourGraph.load(directory, load_array=lambda path: load_array(path, use_mmap=True, prefault=False))
+
+    assert sorted(os.listdir(directory)) == ["indices.npy", "indptr.npy", "weights.npy"]
+    # No heap copy: the arrays are views of the mapped files
+    assert all(isinstance(getattr(graph, name).base, np.memmap) for name in NeighbourGraph.FILES)
+    assert graph.neighbours(0)[0].tolist() == [2, 1]
+
+
+def test_registry_loads_a_saved_graph(artifact_dir):
+    base = load_version(artifact_dir)
+    base.graph.save(artifact_paths(artifact_dir)["neighbour_graph"])
+
+    version = load_version(artifact_dir)
+
+    assert version._graph is not None
+    assert version.graph.nnz == base.graph.nnz
+
+
+def test_registry_builds_a_missing_graph_at_load(artifact_dir):
+    version = load_version(artifact_dir)
+
+    # Built on the loader thread, not by the first request that needs it
+    assert version._graph is not None
+    assert version.graph.n_items == len(version.content_items)
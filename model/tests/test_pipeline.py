@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+from model.P_R_M.pipeline import Pipeline, Stage
+
+
+# Stage functions run in worker processes, so they live at module level
+
+
+def upper(source, target, suffix=""):
+    with open(source) as f, open(target, "w") as out:
+        out.write(f.read().upper() + suffix)
+
+
+def concat(first, second, target):
+    with open(first) as a, open(second) as b, open(target, "w") as out:
+        out.write(a.read() + b.read())
+
+
+@pytest.fixture
+def files(tmp_path):
+    names = ("a.txt", "b.txt", "upper_a.txt", "upper_b.txt", "joined.txt")
+    paths = {name: str(tmp_path / name) for name in names}
+    for name in ("a.txt", "b.txt"):
+        with open(paths[name], "w") as f:
+            f.write(name[0])
+    paths["state"] = str(tmp_path / "state.json")
+    return paths
+
+
+def _pipeline(files, suffix=""):
+    return Pipeline([
+        # Listed before its dependencies on purpose
+        Stage("join", concat, {"first": files["upper_a.txt"], "second": files["upper_b.txt"]},
+              {"target": files["joined.txt"]}),
+        Stage("upper_a", upper, {"source": files["a.txt"]}, {"target": files["upper_a.txt"]},
+              params={"suffix": suffix}),
+        Stage("upper_b", upper, {"source": files["b.txt"]}, {"target": files["upper_b.txt"]}),
+    ], state_path=files["state"])
+
+
+def _statuses(report):
+    return {name: result["status"] for name, result in report.items()}
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_stages_run_in_dependency_order_then_are_cached(files):
+    first = _pipeline(files).run(n_workers=1, verbose=False)
+    second = _pipeline(files).run(n_workers=1, verbose=False)
+
+    assert _statuses(first) == {"upper_a": "ran", "upper_b": "ran", "join": "ran"}
+    assert list(first)[-1] == "join"
+    assert _read(files["joined.txt"]) == "AB"
+    assert _statuses(second) == {"upper_a": "cached", "upper_b": "cached", "join": "cached"}
+
+
+def test_changed_input_reruns_the_stage_and_its_dependents(files):
+    _pipeline(files).run(n_workers=1, verbose=False)
+    with open(files["b.txt"], "w") as f:
+        f.write("c")
+
+    report = _pipeline(files).run(n_workers=1, verbose=False)
+
+    assert _statuses(report) == {"upper_a": "cached", "upper_b": "ran", "join": "ran"}
+    assert _read(files["joined.txt"]) == "AC"
+
+
+def test_changed_parameter_reruns_the_stage(files):
+    _pipeline(files).run(n_workers=1, verbose=False)
+
+    report = _pipeline(files, suffix="!").run(n_workers=1, verbose=False)
+
+    assert _statuses(report) == {"upper_a": "ran", "upper_b": "cached", "join": "ran"}
+    assert _read(files["joined.txt"]) == "A!B"
+
+
+def test_deleted_output_and_force_rerun_only_that_stage(files):
+    _pipeline(files).run(n_workers=1, verbose=False)
+    os.remove(files["joined.txt"])
+
+    assert _statuses(_pipeline(files).run(n_workers=1, verbose=False))["join"] == "ran"
+    report = _pipeline(files).run(n_workers=1, force=("upper_a",), verbose=False)
+    # Same output contents, so the dependent stage stays cached
+    assert _statuses(report) == {"upper_a": "ran", "upper_b": "cached", "join": "cached"}
+
+
+def test_missing_input_and_cycles_are_rejected(files):
+    os.remove(files["a.txt"])
+    with pytest.raises(FileNotFoundError):
+        _pipeline(files).run(n_workers=1, verbose=False)
+
+    with pytest.raises(ValueError):
+        Pipeline([
+            Stage("x", upper, {"source": files["a.txt"]}, {"target": files["b.txt"]}),
+            Stage("y", upper, {"source": files["b.txt"]}, {"target": files["a.txt"]}),
+        ], state_path=files["state"])
+
+
+def test_default_pipeline_builds_the_graph_from_the_content_neighbours(tmp_path):
+    from model.P_R_M.pipeline import default_pipeline
+
+    pipeline = default_pipeline(datasets_dir=str(tmp_path), ratings_path=str(tmp_path / "Ratings.csv"))
+
+    # One top-k pass over the TF-IDF matrix feeds both artifacts
+    assert pipeline.dependencies["neighbour_graph"] == {"content_neighbours"}
+    assert pipeline.dependencies["content_neighbours"] == {"tfidf"}
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from scipy.io import mmread
+
+from model.datasets import preprocessing
+
+
+def test_user_item_matrix_has_no_columns_for_filtered_books(tmp_path):
+    lines = ["User-ID;ISBN;Rating"]
+    for user in range(1, 11):
+        # Three books rated by this user only, then two rated by all ten users
+        lines += [f"{user};own{user}-{i};7" for i in range(3)]
+        lines += [f"{user};popular;8", f"{user};popular2;6"]
+    lines.append("1;implicit;0")
+    ratings_path = tmp_path / "Ratings.csv"
+    ratings_path.write_text("\n".join(lines) + "\n")
+    out_path = tmp_path / "user_item_matrix_sparse.mtx"
+
+    preprocessing.build_user_item_matrix(str(ratings_path), str(out_path))
+
+    matrix = mmread(str(out_path)).tocsr()
+    # Only the two books with 10 ratings get a column
+    assert matrix.shape == (10, 2)
+    assert matrix.nnz == 20
+
+
+def test_encode_books_reads_generated_catalog(tmp_path):
+    from model.datasets.UserInteractionData import generate
+
+    rng = np.random.default_rng(0)
+    books_df, _ = generate.make_books(50, 100, 1.1, rng)
+    generate.FileWriter(str(tmp_path), "csv").write("books", books_df)
+    goodreads_path = tmp_path / "goodreads.csv"
+    goodreads_path.write_text("bookID,title,language_code\n1,a,eng\n2,b,fre\n")
+
+    preprocessing.encode_books(
+        str(goodreads_path), str(tmp_path / "Books.csv"), str(tmp_path / "encoded_books.csv"),
+        str(tmp_path / "encoded_books2.csv"), str(tmp_path / "content_isbns.npz")
+    )
+
+    encoded = pd.read_csv(tmp_path / "encoded_books2.csv")
+    assert encoded.columns[:5].tolist() == ["ISBN", "Title", "Author", "Year", "Publisher"]
+    assert len(encoded) == 50
+    assert encoded["Year"].notna().all() and encoded["Publisher_Encoded"].nunique() > 1
+
+
+def test_neighbour_graph_built_from_top_k_arrays_without_self(tmp_path):
+    from model.P_R_M.neighbour_graph import NeighbourGraph
+
+    similarities = np.array([[1.0, 0.5, 0.0], [1.0, 0.5, 0.25], [1.0, 0.0, 0.0]], dtype=np.float32)
+    indices = np.array([[0, 1, -1], [1, 0, 2], [2, -1, -1]], dtype=np.int32)
+    np.save(tmp_path / "sims.npy", similarities)
+    np.save(tmp_path / "indices.npy", indices)
+
+    preprocessing.build_neighbour_graph(str(tmp_path / "sims.npy"), str(tmp_path / "indices.npy"),
+                                        str(tmp_path / "graph"))
+
+    graph = NeighbourGraph.load(str(tmp_path / "graph"))
+    assert graph.neighbours(0)[0].tolist() == [1]
+    assert graph.neighbours(1)[0].tolist() == [0, 2]
+    assert graph.neighbours(2)[0].tolist() == []
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from model.P_R_M.quantization import QUANTIZATION_MODES, QuantizedFactors, accuracy_report
+from model.P_R_M.scoring import HybridScorer
+
+
+@pytest.mark.parametrize("mode, tolerance", [("float32", 1e-5), ("float16", 1e-2), ("int8", 5e-2)])
+def test_dot_many_matches_full_precision(mode, tolerance):
+    rng = np.random.default_rng(0)
+    factors = rng.normal(size=(300, 8))
+    queries = rng.normal(size=(3, 8))
+
+    quantized = QuantizedFactors.quantize(factors, mode)
+
+    assert quantized.mode == mode
+    np.testing.assert_allclose(quantized.dot_many(queries), queries @ factors.T, atol=tolerance * 8, rtol=tolerance)
+    np.testing.assert_allclose(quantized[[0, 5]], factors[[0, 5]], atol=tolerance * 3)
+
+
+def test_float32_copy_is_scored_without_conversion():
+    factors = np.random.default_rng(0).normal(size=(50, 4)).astype(np.float32)
+
+    quantized = QuantizedFactors.quantize(factors, "float32")
+
+    assert np.shares_memory(quantized.values, factors)
+
+
+def test_save_and_load_every_mode(tmp_path):
+    factors = np.random.default_rng(0).normal(size=(20, 4))
+    path = str(tmp_path / "item_factors.npy")
+    for mode in QUANTIZATION_MODES:
+        QuantizedFactors.quantize(factors, mode).save(path)
+    for mode in QUANTIZATION_MODES:
+        loaded = QuantizedFactors.load(path, mode, use_mmap=False)
+        assert loaded.mode == mode and loaded.shape == factors.shape
+
+
+def test_accuracy_report_against_itself():
+    rng = np.random.default_rng(0)
+    scorer = HybridScorer(rng.normal(size=(5, 4)).astype(np.float32), rng.normal(size=(30, 4)).astype(np.float32),
+                          rng.random(30))
+
+    report = accuracy_report(scorer, scorer, [0, 1, 2], top_n=5)
+
+    assert report["recall@5"] == 1.0
+    assert report["mean_abs_score_error"] == 0.0
+    assert report["latency_ratio"] > 0
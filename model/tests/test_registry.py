@@ -0,0 +1,39 @@
+import pytest
+
+from model.P_R_M.registry import ModelNotReady, ModelRegistry, load_version
+
+
+def _flaky_loader(registry, failures, version):
+    calls = []
+
+    def load_initial():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise OSError("CURRENT names a missing version")
+        registry.activate(version)
+        return version
+    registry.load_initial = load_initial
+    return calls
+
+
+def test_initial_load_is_retried_until_it_succeeds(artifact_dir):
+    registry = ModelRegistry()
+    calls = _flaky_loader(registry, 2, load_version(artifact_dir))
+
+    registry.initialize_in_background(max_attempts=3, backoff=0).join()
+
+    assert len(calls) == 3
+    assert registry.is_ready() and registry.failure() is None
+
+
+def test_initial_load_reports_failure_after_the_last_attempt(artifact_dir):
+    registry = ModelRegistry()
+    calls = _flaky_loader(registry, 5, load_version(artifact_dir))
+
+    registry.initialize_in_background(max_attempts=2, backoff=0).join()
+
+    assert len(calls) == 2
+    assert not registry.is_ready()
+    assert "CURRENT names a missing version" in registry.failure()
+    with pytest.raises(ModelNotReady):
+        registry.current()
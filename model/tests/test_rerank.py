@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from model.P_R_M.rerank import graph_similarity, mmr
+
+
+def test_mmr_without_diversity_keeps_score_order():
+    relevance = np.array([0.2, 0.9, 0.5, 0.7])
+    vectors = np.eye(4)
+
+    assert mmr(relevance, top_n=3, diversity=0.0, vectors=vectors).tolist() == [1, 3, 2]
+    assert mmr(relevance, top_n=10, diversity=0.0, vectors=vectors).tolist() == [1, 3, 2, 0]
+    assert mmr(relevance, top_n=0, vectors=vectors).tolist() == []
+
+
+def test_mmr_penalizes_a_near_duplicate():
+    relevance = np.array([1.0, 0.95, 0.6])
+    # Candidate 1 points the same way as the top pick, candidate 2 does not
+    vectors = np.array([[1.0, 0.0], [2.0, 0.01], [0.0, 1.0]])
+
+    assert mmr(relevance, top_n=2, diversity=0.0, vectors=vectors).tolist() == [0, 1]
+    assert mmr(relevance, top_n=2, diversity=0.5, vectors=vectors).tolist() == [0, 2]
+
+
+def test_mmr_with_precomputed_similarity():
+    relevance = np.array([1.0, 0.95, 0.6])
+    similarity = np.array([[0, 1, 0], [1, 0, 0], [0, 0, 0]], dtype=np.float32)
+
+    assert mmr(relevance, top_n=3, diversity=0.5, similarity=similarity).tolist() == [0, 2, 1]
+
+
+def test_mmr_needs_exactly_one_similarity_source():
+    with pytest.raises(ValueError):
+        mmr([1.0, 0.5], top_n=1)
+    with pytest.raises(ValueError):
+        mmr([1.0, 0.5], top_n=1, vectors=np.eye(2), similarity=np.eye(2))
+
+
+def test_graph_similarity_is_symmetric_and_zero_for_missing_rows():
+    # Book 0 lists book 2 (0.8); book 1 lists book 0 (0.3)
+    graph = csr_matrix(np.array([[0, 0, 0.8], [0.3, 0, 0], [0, 0, 0]], dtype=np.float32))
+
+    block = graph_similarity(graph, [2, 0, -1, 1])
+
+    assert block.dtype == np.float32
+    assert np.allclose(block, block.T)
+    assert block[0, 1] == pytest.approx(0.8)
+    assert block[1, 3] == pytest.approx(0.3)
+    assert block[0, 3] == 0
+    assert not block[2].any() and not block[:, 2].any()
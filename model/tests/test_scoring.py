@@ -0,0 +1,61 @@
+import numpy as np
+
+from model.P_R_M.scoring import HybridScorer, exclude_items, select_top_n
+
+
+def test_select_top_n_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+
+    assert select_top_n(scores, 2).tolist() == [1, 3]
+    assert select_top_n(scores, 10).tolist() == [1, 3, 2, 0]
+    assert select_top_n(scores, 0).tolist() == []
+
+
+def test_select_top_n_rows():
+    scores = np.array([[0.1, 0.9, 0.5], [0.8, 0.2, 0.4]], dtype=np.float32)
+
+    assert select_top_n(scores, 2).tolist() == [[1, 2], [0, 2]]
+
+
+def test_excluded_items_are_never_returned():
+    scores = exclude_items(np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32), np.array([1, 3]))
+
+    # Asking for more than remain shortens the result instead of returning excluded items
+    assert select_top_n(scores, 3).tolist() == [2, 0]
+
+
+def test_excluded_items_are_padded_in_rows():
+    scores = np.array([[0.1, 0.9, 0.5], [0.8, 0.2, 0.4]], dtype=np.float32)
+    exclude_items(scores, [np.array([0, 2]), np.array([], dtype=np.int64)])
+
+    assert select_top_n(scores, 3).tolist() == [[1, -1, -1], [0, 2, 1]]
+
+
+def _scorer(rerank_size=0):
+    rng = np.random.default_rng(0)
+    user_factors = rng.normal(size=(3, 4)).astype(np.float32)
+    item_factors = rng.normal(size=(6, 4)).astype(np.float32)
+    return HybridScorer(user_factors, item_factors, rng.random(6), alpha=0.8,
+                        exact_item_factors=item_factors if rerank_size else None, rerank_size=rerank_size)
+
+
+def test_recommend_excludes_items():
+    for rerank_size in (0, 4):
+        scorer = _scorer(rerank_size)
+        exclude = np.array([0, 1, 2, 3])
+
+        top = scorer.recommend(0, top_n=5, exclude=exclude)
+
+        assert sorted(top.tolist()) == [4, 5]
+
+
+def test_recommend_batch_pads_users_with_few_items_left():
+    for rerank_size in (0, 4):
+        scorer = _scorer(rerank_size)
+        exclude = [np.arange(5), np.array([], dtype=np.int64)]
+
+        (_, top), = scorer.recommend_batch([0, 1], top_n=3, exclude=exclude)
+
+        assert top[0].tolist() == [5, -1, -1]
+        assert (top[1] >= 0).all()
+
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from scipy.sparse import random as sparse_random
+from sklearn.metrics.pairwise import cosine_similarity
+
+from model.P_R_M.similarity_builder import block_rows_for_budget, build_top_k
+
+
+def _tfidf(n_rows=23, n_terms=15, seed=0):
+    matrix = sparse_random(n_rows, n_terms, density=0.3, format="csr", dtype=np.float32, random_state=seed)
+    # An all-zero row has no neighbours and must come back fully padded
+    matrix.data[matrix.indptr[4]:matrix.indptr[5]] = 0
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def _expected_top_k(matrix, top_k, exclude_self):
+    similarities = cosine_similarity(matrix).astype(np.float32)
+    if exclude_self:
+        np.fill_diagonal(similarities, 0)
+    expected = []
+    for row in similarities:
+        # Same tie-break as build_top_k: similarity descending, then column ascending
+        order = np.lexsort((np.arange(len(row)), -row))
+        expected.append([(int(col), row[col]) for col in order[:top_k] if row[col] > 0])
+    return expected
+
+
+def _as_lists(similarities, indices):
+    return [
+        [(int(col), sim) for col, sim in zip(index_row, sim_row) if col >= 0]
+        for sim_row, index_row in zip(similarities, indices)
+    ]
+
+
+@pytest.mark.parametrize("exclude_self", [False, True])
+def test_matches_sklearn_cosine_top_k(exclude_self):
+    matrix = _tfidf()
+
+    # 23 rows in blocks of 5: the last block is partial
+    similarities, indices = build_top_k(matrix, top_k=6, block_rows=5, n_workers=2,
+                                        exclude_self=exclude_self, verbose=False)
+
+    assert similarities.shape == indices.shape == (23, 6)
+    assert similarities.dtype == np.float32 and indices.dtype == np.int32
+    actual = _as_lists(similarities, indices)
+    for actual_row, expected_row in zip(actual, _expected_top_k(matrix, 6, exclude_self)):
+        assert [col for col, _ in actual_row] == [col for col, _ in expected_row]
+        np.testing.assert_allclose([sim for _, sim in actual_row], [sim for _, sim in expected_row], rtol=1e-5)
+    if exclude_self:
+        assert not (indices == np.arange(23)[:, None]).any()
+    # The empty row is padded with 0 / -1
+    assert indices[4].tolist() == [-1] * 6 and similarities[4].tolist() == [0] * 6
+
+
+def test_block_size_does_not_change_the_result():
+    matrix = _tfidf(seed=1)
+
+    single = build_top_k(matrix, top_k=4, block_rows=100, n_workers=1, verbose=False)
+    blocked = build_top_k(matrix, top_k=4, block_rows=3, n_workers=2, verbose=False)
+
+    np.testing.assert_array_equal(single[1], blocked[1])
+    np.testing.assert_array_equal(single[0], blocked[0])
+
+
+def test_block_rows_for_budget():
+    # 512 MB of 8-byte entries over 2**20 items
+    assert block_rows_for_budget(2 ** 20, memory_mb=512) == 64
+    assert block_rows_for_budget(10 ** 9, memory_mb=1) == 1
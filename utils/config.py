@@ -11,7 +11,49 @@ RATINGS_PATH = os.path.join(DATASETS_DIR, "bookcrossing_dataset", "Ratings.csv")
 
 # Precomputed data paths
 INDEX_TO_ISBN_PATH = os.path.join(DATASETS_DIR, "index_to_isbn.pkl")
+USER_TO_INDEX_PATH = os.path.join(DATASETS_DIR, "user_to_index.pkl")
+BOOK_TO_INDEX_PATH = os.path.join(DATASETS_DIR, "book_to_index.pkl")
+# ID mappings (sorted NumPy arrays); the pickles above are the legacy format
+USER_IDS_PATH = os.path.join(DATASETS_DIR, "user_ids.npz")
+ITEM_ISBNS_PATH = os.path.join(DATASETS_DIR, "item_isbns.npz")
+CONTENT_ISBNS_PATH = os.path.join(DATASETS_DIR, "content_isbns.npz")
 USER_FACTORS_PATH = os.path.join(DATASETS_DIR, "user_factors.npy")
 ITEM_FACTORS_PATH = os.path.join(DATASETS_DIR, "item_factors.npy")
+# Training algorithm and hyperparameters of the factors (written by collaborative_filtering.py)
+MODEL_META_PATH = os.path.join(DATASETS_DIR, "model_meta.json")
 TOP_K_SIMILARITIES_PATH = os.path.join(TOP_K_PATH, "top_k_similarities.npy")
-TOP_K_INDICES_PATH = os.path.join(TOP_K_PATH, "top_k_indices.npy")
\ No newline at end of file
+TOP_K_INDICES_PATH = os.path.join(TOP_K_PATH, "top_k_indices.npy")
+# Top-k content neighbours as CSR with float16 weights: a directory of .npy
+# arrays (written by preprocessing.py)
+NEIGHBOUR_GRAPH_PATH = os.path.join(DATASETS_DIR, "neighbour_graph")
+
+# IVF index over item factors (model/P_R_M/ann_index.py); 0 nprobe means exact scoring
+ANN_INDEX_DIR = os.path.join(DATASETS_DIR, "ann_index")
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", 0))
+
+# Score on converted factor copies built by model/P_R_M/quantization.py: "float32"
+# is the fastest per query; "float16" and "int8" save memory but convert the
+# whole matrix on every query. Empty scores the factors as stored.
+# With float16/int8, FACTOR_RERANK items are re-scored exactly.
+FACTOR_QUANTIZATION = os.getenv("FACTOR_QUANTIZATION", "")
+FACTOR_RERANK = int(os.getenv("FACTOR_RERANK", 100))
+
+# Diversity re-ranking (model/P_R_M/rerank.py): MMR over this many top-scored
+# candidates, with similarity from "factors" (cosine) or "content" (neighbour graph)
+MMR_SHORTLIST = int(os.getenv("MMR_SHORTLIST", 200))
+MMR_SIMILARITY = os.getenv("MMR_SIMILARITY", "factors")
+
+# Two-stage recommendations (model/P_R_M/candidates.py): candidates taken from
+# the CF top-k and from the content neighbours of recently rated books
+CANDIDATE_CF_K = int(os.getenv("CANDIDATE_CF_K", 200))
+CANDIDATE_CONTENT_K = int(os.getenv("CANDIDATE_CONTENT_K", 200))
+
+# Versioned artifact sets live in MODEL_ARTIFACTS_DIR/<version>/; the CURRENT
+# file names the version to serve. Without it the flat paths above are used.
+MODEL_ARTIFACTS_DIR = os.getenv("MODEL_ARTIFACTS_DIR", os.path.join(DATASETS_DIR, "artifacts"))
+MODEL_CURRENT_POINTER = os.path.join(MODEL_ARTIFACTS_DIR, "CURRENT")
+
+# Model loading: memory-map artifacts so uvicorn workers share one page-cache copy
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") == "1"
+# Touch every mapped page at boot instead of on first request
+MODEL_PREFAULT = os.getenv("MODEL_PREFAULT", "0") == "1"
\ No newline at end of file